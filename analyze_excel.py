@@ -1,9 +1,8 @@
-import openpyxl
-import pandas as pd
+from excel_cache import CachedWorkbook
 
-# Load the Excel file
+# Load the Excel file once (read-only); parsed sheets are cached on disk
 file_path = 'fullreport.xlsm'
-workbook = openpyxl.load_workbook(file_path, data_only=True)
+workbook = CachedWorkbook(file_path)
 
 # List all sheet names
 print("=" * 80)
@@ -23,8 +22,8 @@ for sheet_name in workbook.sheetnames:
     print(f"{'='*60}")
     
     try:
-        # Read the sheet with pandas
-        df = pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl')
+        # Read the sheet (from the cache when the file is unchanged)
+        df = workbook.read(sheet_name)
         
         print(f"Rows: {len(df)}")
         print(f"Columns: {len(df.columns)}")
@@ -39,6 +38,8 @@ for sheet_name in workbook.sheetnames:
     except Exception as e:
         print(f"Error reading sheet: {e}")
 
+workbook.close()
+
 print("\n" + "=" * 80)
 print("ANALYSIS COMPLETE")
 print("=" * 80)
@@ -1,34 +1,33 @@
-import pandas as pd
-import json
 import os
 import re
-from pathlib import Path
 
-base_path = "C:/Users/shubh/Downloads/ecommerce-app/allproductdata"
-images_base = "C:/Users/shubh/Downloads/ecommerce-app/public/products"
-output_path = "C:/Users/shubh/Downloads/ecommerce-app/src/data"
+import image_manifest
+from catalog_paths import APP_ROOT
+
+base_path = f"{APP_ROOT}/allproductdata"
+images_base = f"{APP_ROOT}/public/products"
+output_path = f"{APP_ROOT}/src/data"
 
 # First, build a comprehensive image index
 print("=== BUILDING IMAGE INDEX ===")
 all_images = []
-for root, dirs, files in os.walk(images_base):
+for root, files in image_manifest.walk(images_base):
     for f in files:
-        if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-            full_path = os.path.join(root, f)
-            rel_path = os.path.relpath(full_path, "C:/Users/shubh/Downloads/ecommerce-app/public")
-            img_url = "/" + rel_path.replace("\\", "/")
-            
-            # Extract SKU pattern from filename
-            sku_match = re.match(r'^([A-Z0-9]+-[A-Z0-9]+(?:-[A-Z0-9]+)?)', f.upper())
-            sku_prefix = sku_match.group(1) if sku_match else None
-            
-            all_images.append({
-                'url': img_url,
-                'filename': f,
-                'folder': os.path.basename(root),
-                'parent_folder': os.path.basename(os.path.dirname(root)),
-                'sku_prefix': sku_prefix
-            })
+        full_path = os.path.join(root, f)
+        rel_path = os.path.relpath(full_path, f"{APP_ROOT}/public")
+        img_url = "/" + rel_path.replace("\\", "/")
+        
+        # Extract SKU pattern from filename
+        sku_match = re.match(r'^([A-Z0-9]+-[A-Z0-9]+(?:-[A-Z0-9]+)?)', f.upper())
+        sku_prefix = sku_match.group(1) if sku_match else None
+        
+        all_images.append({
+            'url': img_url,
+            'filename': f,
+            'folder': os.path.basename(root),
+            'parent_folder': os.path.basename(os.path.dirname(root)),
+            'sku_prefix': sku_prefix
+        })
 
 print(f"Total images: {len(all_images)}")
 
@@ -1,8 +1,8 @@
 import pandas as pd
-import json
-import os
 
-base_path = "C:/Users/shubh/Downloads/ecommerce-app/allproductdata"
+from catalog_paths import APP_ROOT
+
+base_path = f"{APP_ROOT}/allproductdata"
 
 # Read SKU Master - skip rows to find header
 sku_df = pd.read_excel(f"{base_path}/SKU Aliases, Parent & Child Master Data (1).xlsx", header=None)
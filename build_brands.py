@@ -0,0 +1,272 @@
+"""
+Build several brands' catalogs side by side and merge them into one.
+
+    python build_brands.py [brands.json] [--jobs=N] [--families]
+
+brands.json (default: allproductdata/brands.json, or just Bluewud without
+one) lists the brands, each with its own masters, image tree and category map:
+
+    [
+      {"name": "Bluewud"},
+      {"name": "Woodsworth",
+       "sku_master": "allproductdata/woodsworth/SKU Master.xlsx",
+       "dimensions": "allproductdata/woodsworth/Dimensions Master.xlsx",
+       "images": "public/products/woodsworth",
+       "category_map": {"B-": {"id": "bedroom", "name": "Beds", "type": "bed"}}}
+    ]
+
+Relative paths are under the app root (see catalog_paths); image trees must
+be under public/ so their urls resolve. "Bluewud" takes everything it does
+not set from generate_products.BLUEWUD; other brands default to its category
+map and keep their reports next to their SKU master.
+
+Each brand is a full generate_products build (incremental, with its own
+cache, metrics and <key>Products outputs) in a worker process, at most --jobs
+at a time (default: one per core, or per brand if fewer). The image pools
+inside each build share the cores between the jobs. A build's output goes to
+.cache/brands/<key>/build.log. The brands' NDJSON outputs are then streamed
+into a combined catalogProducts (or catalogFamilies) output, images first as
+in a single build:
+
+    _id    prefixed with the brand key ("woodsworth-prod-12"), so ids of
+           different brands never clash
+    slug   repeats get the SKU appended, then the brand key (as catalog_db does)
+
+The combined output is indexed by _id, slug and SKU and gets a brand facet;
+it is only rewritten when one of the brands' outputs changed. After the merge
+each brand is loaded into the backend database, one at a time, and the site's
+sitemap (see catalog_sitemap) is written from the combined output with the
+slugs the database serves, rather than by the brand builds.
+"""
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_products
+from catalog_db import load_catalog, print_stats, product_slugs, read_catalog
+from catalog_paths import APP_ROOT, CRM_EXPORT_PATH
+from catalog_sitemap import write_sitemap
+from catalog_transform import PLACEHOLDER_IMAGE
+from catalog_writer import CatalogWriter
+from excel_cache import file_hash
+from facet_index import FACETS
+from incremental_build import IncrementalBuild, code_version
+from pipeline_metrics import Metrics, options_from_argv
+from search_index import SEARCH_FIELDS
+
+BRANDS_FILE = f"{APP_ROOT}/allproductdata/brands.json"
+BRANDS_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "brands")
+COMBINED = "catalog"
+REQUIRED = ("sku_master", "dimensions", "images")
+
+
+def brand_key(name):
+    return re.sub(r'[^a-z0-9]+', '', name.lower())
+
+
+def brand_config(entry):
+    """A generate_products brand dict for one brands.json entry."""
+    key = entry.get("key") or brand_key(entry["name"])
+    if key == generate_products.BLUEWUD["key"]:
+        brand = dict(generate_products.BLUEWUD)
+    else:
+        missing = [k for k in REQUIRED if k not in entry]
+        if missing:
+            raise ValueError(f"{entry['name']}: missing {', '.join(missing)}")
+        cache = os.path.join(BRANDS_CACHE, key)
+        brand = {"category_map": generate_products.CATEGORY_MAP, "cache": cache,
+                 "image_cache": cache, "metrics": f"generate_products-{key}"}
+    brand.update(entry, key=key)
+    for field in ("sku_master", "dimensions", "images", "reports"):
+        if field in entry:
+            brand[field] = os.path.join(APP_ROOT, entry[field])
+    brand.setdefault("reports", os.path.dirname(brand["sku_master"]))
+
+    public = os.path.abspath(generate_products.public_path)
+    if not os.path.abspath(brand["images"]).startswith(public + os.sep):
+        raise ValueError(f"{brand['name']}: image tree {brand['images']} is not under {public}")
+    return brand
+
+
+def load_brands(path=BRANDS_FILE):
+    if not os.path.exists(path):
+        return [generate_products.BLUEWUD]
+    with open(path, 'r', encoding='utf-8') as f:
+        brands = [brand_config(entry) for entry in json.load(f)]
+    keys = [b["key"] for b in brands]
+    if len(set(keys)) != len(keys):
+        raise ValueError(f"{path}: brand keys must be unique ({', '.join(keys)})")
+    return brands
+
+
+def build_brand(brand, families, workers):
+    """Runs in a worker process: one generate_products build, its output in build.log."""
+    log_path = os.path.join(BRANDS_CACHE, brand["key"], "build.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        try:
+            summary = generate_products.main(brand, families, workers, database=False, sitemap=False)
+        except Exception:
+            traceback.print_exc(file=log)
+            raise
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    summary["log"] = log_path
+    return summary
+
+
+def output_build(brand, families):
+    """Build id (content hash, see catalog_diff) of the brand's last output."""
+    name = os.path.splitext(os.path.basename(generate_products.output_file(families, brand)))[0]
+    with open(f"{generate_products.shards_path}/{name}/manifest.json", 'r', encoding='utf-8') as f:
+        return json.load(f)["build"]
+
+
+def ndjson_records(path):
+    """The records of an NDJSON output, streamed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def brand_records(brand, families):
+    """The brand's last NDJSON output with brand-prefixed _ids, streamed."""
+    path = os.path.splitext(generate_products.output_file(families, brand))[0] + ".ndjson"
+    for record in ndjson_records(path):
+        record["_id"] = f"{brand['key']}-{record['_id']}"
+        for variant in record.get("variants", []):
+            variant["_id"] = f"{brand['key']}-{variant['_id']}"
+        yield brand["key"], record
+
+
+def merge(brands, families):
+    """Stream the brands' outputs into the combined catalog; returns its manifest."""
+    code = "parentSku" if families else "sku"
+    name = f"{COMBINED}{'Families' if families else 'Products'}"
+    search_fields = generate_products.FAMILY_SEARCH_FIELDS if families else SEARCH_FIELDS
+    facets = dict(generate_products.FAMILY_FACETS if families else FACETS, brand=("brand", None))
+    writer = CatalogWriter(generate_products.output_path, name, f"{generate_products.shards_path}/{name}",
+                           "categoryId", ("_id", "slug", code), search_fields=search_fields, facets=facets)
+
+    streams = [brand_records(b, families) for b in brands]
+    if families:
+        records = itertools.chain(*streams)
+    else:
+        # each brand is sorted images first; merge keeps that across brands, brand order within
+        records = heapq.merge(*streams, key=lambda item: not item[1]["images"]
+                              or item[1]["images"][0] == PLACEHOLDER_IMAGE)
+    seen = set()
+    for key, record in records:
+        slug = record["slug"]
+        for suffix in (str(record.get(code)).lower(), key):
+            if slug not in seen:
+                break
+            slug = f"{slug}-{suffix}"
+        n = 2
+        while slug in seen:
+            slug, n = f"{record['slug']}-{key}-{n}", n + 1
+        seen.add(slug)
+        record["slug"] = slug
+        writer.write(record)
+    manifest = writer.close()
+    print(f"Saved to {name}.json ({manifest['total']} records, {len(manifest['pages'])} pages, "
+          f"{len(manifest['categories'])} category shards)")
+    return manifest
+
+
+def main(argv):
+    families = "--families" in argv
+    jobs = next((int(a.split("=", 1)[1]) for a in argv if a.startswith("--jobs=")), None)
+    paths = [a for a in argv if not a.startswith("--")]
+    brands = load_brands(paths[0] if paths else BRANDS_FILE)
+
+    cores = os.cpu_count() or 1
+    jobs = max(1, min(jobs or cores, len(brands)))
+    workers = max(1, cores // jobs)
+    metrics = Metrics("build_brands", **options_from_argv(argv))
+    print(f"Building {len(brands)} brands, {jobs} at a time ({workers} image workers each)")
+
+    failed, results = [], {}
+    with metrics.stage("builds"):
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(build_brand, b, families, workers): b for b in brands}
+            for future, brand in futures.items():
+                try:
+                    results[brand["key"]] = r = future.result()
+                except Exception as e:
+                    failed.append(brand)
+                    print(f"  {brand['name']}: FAILED ({e}); see "
+                          f"{os.path.join(BRANDS_CACHE, brand['key'], 'build.log')}")
+                    continue
+                print(f"  {r['brand']}: {r['products']} products, {r['with_images']} with images "
+                      f"in {r['seconds']}s")
+    builds = metrics.stages[-1]["wall"]
+    busy = sum(r["seconds"] for r in results.values())
+    print(f"Brand builds took {busy:.1f}s of work in {builds:.1f}s ({busy / max(builds, 1e-9):.1f}x)")
+
+    # a failed brand is merged from its last good output, if it has one
+    merged = [b for b in brands if os.path.exists(
+        os.path.splitext(generate_products.output_file(families, b))[0] + ".ndjson")]
+    for b in brands:
+        if b not in merged:
+            print(f"  {b['name']}: no output yet, left out of the combined catalog")
+    # the combined output is only rewritten when a brand's output changed
+    build = IncrementalBuild(BRANDS_CACHE, code_version(__name__, *generate_products.PIPELINE_MODULES))
+    name = f"{COMBINED}{'Families' if families else 'Products'}"
+    with metrics.stage("merge"):
+        manifest = build.stage("merge", [[[b["key"], output_build(b, families)] for b in merged], families],
+                               lambda: merge(merged, families),
+                               outputs=[f"{generate_products.output_path}/{name}.json",
+                                        f"{generate_products.shards_path}/{name}/manifest.json"])
+    if "merge" in build.report["reused"]:
+        print(f"{name}.json is up to date")
+
+    # SQLite takes one writer at a time; each load deactivates only its own brand's
+    # SKUs. products rows are keyed by SKU, so a SKU stays with the first brand using it.
+    database = generate_products.database_path
+    if not families and os.path.exists(database):
+        with metrics.stage("database"):
+            claimed = set()
+            for b in merged:
+                if b["key"] not in results:
+                    continue
+                products = read_catalog(results[b["key"]]["output"])
+                clashes = sum(1 for p in products if p["sku"] in claimed)
+                stats = load_catalog(database, [p for p in products if p["sku"] not in claimed])
+                claimed.update(p["sku"] for p in products)
+                print(f"{b['name']}: ", end="")
+                print_stats(stats)
+                if clashes:
+                    print(f"  {clashes} SKUs already used by another brand were not loaded")
+
+    # streamed from the combined NDJSON; lastmod comes from the CRM export, so it is an input too
+    if not families:
+        public = generate_products.public_path
+        slugs = product_slugs(database) if os.path.exists(database) else None
+        crm = file_hash(CRM_EXPORT_PATH) if os.path.exists(CRM_EXPORT_PATH) else None
+        with metrics.stage("sitemap"):
+            build.stage("sitemap", [build.current["merge"], slugs, crm],
+                        lambda: write_sitemap(ndjson_records(f"{generate_products.output_path}/{name}.ndjson"),
+                                              public, slugs),
+                        persist=False, outputs=[f"{public}/sitemap.xml"])
+    build.save()
+
+    metrics.set("brands", results)
+    metrics.set("jobs", jobs)
+    metrics.set("records", manifest["total"])
+    print(f"\n=== METRICS ===")
+    metrics.finish()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,160 @@
+"""
+One entry point for the catalog scripts.
+
+    python catalog.py <command> [args...] [+ <command> [args...]]...
+
+Build and analysis commands run the existing scripts in this process with
+their own arguments (generate_products.py --families, check_duplicates.py
+--keep=last, ...). Commands chained with "+" share the process, so pandas is
+imported once and a workbook parsed by one command is reused by the next
+(see excel_cache.read_snapshot):
+
+    python catalog.py dedup --keep=modified + families + extract
+
+Nothing heavy is imported until a command needs it: last, get and search
+only read the .bcat and search.json outputs and start in a few tens of ms.
+
+    --app-root DIR    ecommerce-app checkout (allproductdata/, public/, src/data/,
+                      backend/); default $CATALOG_APP_ROOT or the one in catalog_paths
+    --data-root DIR   folder with Productslist.csv / fullreport.xlsm, where the
+                      CRM scripts also write their outputs; default: current folder
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# command -> (script, what it does)
+SCRIPTS = {
+    "build": ("generate_products.py", "SKU/dimensions masters + images -> catalog outputs"),
+    "build-brands": ("build_brands.py", "build every brand in brands.json in parallel and merge them"),
+    "extract": ("extract_simple.py", "CRM export -> products.json and siblings"),
+    "extract-all": ("extract.py", "CRM export -> extracted_products.json (one indented file)"),
+    "dedup": ("check_duplicates.py", "report/remove duplicate codes and names in the CRM export"),
+    "families": ("find_unique.py", "cluster the CRM export into product families"),
+    "load-db": ("catalog_db.py", "load a catalog output into the backend database"),
+    "map-images": (os.path.join("scripts", "map_images.py"), "attach public/images to products"),
+    "analyze-images": ("analyze_images.py", "image tree vs SKU master coverage"),
+    "analyze-products": ("analyze_products.py", "SKU master overview"),
+    "analyze-skus": ("analyze_skus.py", "SKU master structure"),
+    "analyze-excel": ("analyze_excel.py", "every sheet of fullreport.xlsm"),
+    "examine-sheets": ("examine_sheets.py", "Images / Data Definitions sheets"),
+    "list-sheets": ("list_sheets.py", "sheet names and sizes of fullreport.xlsm"),
+}
+QUICK = {
+    "last": "last N records of a .bcat (default products.bcat, 3)",
+    "get": "record by key: get <value> [--file products.bcat] [--field code]",
+    "search": "search <query> [--shards products] [--file products.bcat]",
+}
+
+
+def usage():
+    print(__doc__.strip().split("\n\n")[1])
+    print("\nCommands:")
+    for name, (_, text) in SCRIPTS.items():
+        print(f"  {name:<18}{text}")
+    for name, text in QUICK.items():
+        print(f"  {name:<18}{text}")
+
+
+def option(args, name, default):
+    """Value of --name VALUE or --name=VALUE in args (removed from args)."""
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        if arg.startswith(name + "="):
+            del args[i]
+            return arg.split("=", 1)[1]
+    return default
+
+
+def run_script(script, args):
+    import runpy
+    argv = sys.argv
+    sys.argv = [script] + args
+    try:
+        runpy.run_path(os.path.join(HERE, script), run_name="__main__")
+    except SystemExit as e:
+        # scripts end with sys.exit(0) after their report; only failures stop a chain
+        if e.code not in (None, 0):
+            raise
+    finally:
+        sys.argv = argv
+
+
+def last(args):
+    from catalog_binary import CatalogReader
+    path = option(args, "--file", "products.bcat")
+    n = int(args[0]) if args else 3
+    with CatalogReader(path) as cat:
+        print(f"Total products: {len(cat)}")
+        for i, p in enumerate(cat.tail(n), len(cat) - n + 1):
+            print(f"{i}. {p.get('name', '')[:50]} - {p.get(cat.key_fields[0])}")
+
+
+def get(args):
+    import json
+    from catalog_binary import CatalogReader
+    path = option(args, "--file", "products.bcat")
+    with CatalogReader(path) as cat:
+        field = option(args, "--field", cat.key_fields[0])
+        record = cat.find(field, " ".join(args))
+    if record is None:
+        print(f"No record with {field} = {' '.join(args)}")
+        sys.exit(1)
+    print(json.dumps(record, indent=2, ensure_ascii=False))
+
+
+def search(args):
+    import json
+    from catalog_binary import CatalogReader
+    from search_index import SearchIndex
+    # the manifest names the current build's search index
+    shards = option(args, "--shards", "products")
+    with open(os.path.join(shards, "manifest.json"), 'r', encoding='utf-8') as f:
+        index = SearchIndex.load(os.path.join(shards, json.load(f)["search"]))
+    with CatalogReader(option(args, "--file", "products.bcat")) as cat:
+        for doc, score in index.search(" ".join(args), limit=10):
+            p = cat[doc]
+            print(f"{score:>7.2f}  {p.get(cat.key_fields[0])}  {p.get('name', '')[:60]}")
+
+
+def main(argv):
+    app_root = option(argv, "--app-root", None)
+    data_root = option(argv, "--data-root", None)
+    if app_root:
+        os.environ["CATALOG_APP_ROOT"] = os.path.abspath(app_root)
+    if data_root:
+        os.environ["CATALOG_CRM_EXPORT"] = os.path.join(os.path.abspath(data_root), "Productslist.csv")
+        os.chdir(data_root)
+    # scripts import their sibling modules from this folder
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+
+    commands, current = [], []
+    for arg in argv:
+        if arg == "+":
+            commands.append(current)
+            current = []
+        else:
+            current.append(arg)
+    commands.append(current)
+    if not commands[0] or commands[0][0] in ("-h", "--help", "help"):
+        usage()
+        return
+
+    for name, *args in commands:
+        if name in SCRIPTS:
+            run_script(SCRIPTS[name][0], args)
+        elif name in QUICK:
+            globals()[name.replace("-", "_")](args)
+        else:
+            print(f"Unknown command: {name}\n")
+            usage()
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,200 @@
+"""
+Indexed binary catalog file (.bcat) and its memory-mapped reader.
+
+Tools that need one product, a page or the last few records should not have
+to json.load the whole catalog. A .bcat file holds the same records as the
+JSON output, each as minified UTF-8 JSON, plus what is needed to find them:
+
+    header    fixed HEADER struct: magic, version, record count, index size
+              and the positions of the sections below
+    records   the records back to back
+    offsets   count + 1 little-endian uint64 positions (record i is the bytes
+              between offsets i and i + 1)
+    index     open-addressing hash table of SLOT structs (key hash, record
+              number) over "<field>=<value>" for each key field (sku, slug)
+    sections  optional JSON blobs added by the writer's caller (catalog_diff
+              stores each record's key and content hash as "hashes")
+    meta      JSON: the key fields and the position of each section
+
+Only the header, one offset pair, a few index slots and the wanted records
+are ever read:
+
+    with CatalogReader("products.bcat") as cat:
+        cat.by_sku("SR-CLE-W"), cat[10], cat[20:40], cat.tail(3)
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"BWCATLG\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIIQQQI")  # magic, version, flags, count, slots, offsets, index, meta, meta len
+SLOT = struct.Struct("<QI")            # key hash (0 = empty), record number
+OFFSET = struct.Struct("<Q")
+
+
+def key_hash(field, value):
+    """64-bit hash of one index key; never 0 (0 marks an empty slot)."""
+    digest = hashlib.blake2b(f"{field}={value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class CatalogFileWriter:
+    """Writes records to <path>.tmp as they come; close() adds the tables and renames."""
+
+    def __init__(self, path, key_fields=("sku", "slug")):
+        self.path = path
+        self.key_fields = list(key_fields)
+        self.f = open(path + ".tmp", 'wb')
+        self.f.write(b"\0" * HEADER.size)
+        self.offsets = [HEADER.size]
+        self.keys = []  # (hash, record number)
+
+    def write(self, record, text=None):
+        """Append a record (text: its JSON if the caller already has it)."""
+        if text is None:
+            text = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        n = len(self.offsets) - 1
+        for field in self.key_fields:
+            if record.get(field) not in (None, ""):
+                self.keys.append((key_hash(field, record[field]), n))
+        self.f.write(text.encode("utf-8"))
+        self.offsets.append(self.f.tell())
+
+    def close(self, sections=None):
+        """Write the tables and rename into place; sections: {name: JSON-able value}."""
+        count = len(self.offsets) - 1
+        offsets_pos = self.f.tell()
+        self.f.write(b"".join(OFFSET.pack(o) for o in self.offsets))
+
+        # power of two with load factor <= 0.5, linear probing
+        slots = 1
+        while slots < 2 * len(self.keys):
+            slots *= 2
+        table = [(0, 0)] * slots
+        for h, n in self.keys:
+            i = h & (slots - 1)
+            while table[i][0]:
+                i = (i + 1) & (slots - 1)
+            table[i] = (h, n)
+        index_pos = self.f.tell()
+        self.f.write(b"".join(SLOT.pack(h, n) for h, n in table))
+
+        positions = {}
+        for name, value in (sections or {}).items():
+            data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            positions[name] = [self.f.tell(), len(data)]
+            self.f.write(data)
+
+        meta = json.dumps({"keys": self.key_fields, "sections": positions}).encode("utf-8")
+        meta_pos = self.f.tell()
+        self.f.write(meta)
+
+        self.f.seek(0)
+        self.f.write(HEADER.pack(MAGIC, VERSION, 0, count, slots, offsets_pos, index_pos,
+                                 meta_pos, len(meta)))
+        self.f.close()
+        os.replace(self.path + ".tmp", self.path)
+
+
+def write_catalog(path, records, key_fields=("sku", "slug")):
+    writer = CatalogFileWriter(path, key_fields)
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+
+class CatalogReader:
+    def __init__(self, path):
+        self.f = open(path, 'rb')
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.count, self.slots, self.offsets_pos, self.index_pos,
+         meta_pos, meta_len) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} catalog file")
+        meta = json.loads(self.mm[meta_pos:meta_pos + meta_len])
+        self.key_fields = meta["keys"]
+        self.sections = meta.get("sections", {})
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.range(*i.indices(self.count)[:2]) if i.step in (None, 1) else \
+                [self.get(j) for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("catalog index out of range")
+        return self.get(i)
+
+    def section(self, name):
+        """A section written by close(sections=...), or None if the file has none by that name."""
+        if name not in self.sections:
+            return None
+        pos, size = self.sections[name]
+        return json.loads(self.mm[pos:pos + size])
+
+    def _span(self, i):
+        pos = self.offsets_pos + i * OFFSET.size
+        return OFFSET.unpack_from(self.mm, pos)[0], OFFSET.unpack_from(self.mm, pos + OFFSET.size)[0]
+
+    def raw(self, i):
+        """The JSON bytes of record i."""
+        start, end = self._span(i)
+        return self.mm[start:end]
+
+    def get(self, i):
+        return json.loads(self.raw(i))
+
+    def range(self, start, stop):
+        """Records start..stop-1, read as one contiguous slice."""
+        start, stop = max(start, 0), min(stop, self.count)
+        if start >= stop:
+            return []
+        bounds = [OFFSET.unpack_from(self.mm, self.offsets_pos + j * OFFSET.size)[0]
+                  for j in range(start, stop + 1)]
+        data = self.mm[bounds[0]:bounds[-1]]
+        base = bounds[0]
+        return [json.loads(data[a - base:b - base]) for a, b in zip(bounds, bounds[1:])]
+
+    def tail(self, n):
+        return self.range(self.count - n, self.count)
+
+    def find(self, field, value):
+        """The record whose `field` is `value`, or None (field must be a key field)."""
+        if field not in self.key_fields:
+            raise KeyError(f"{field} is not indexed (indexed: {', '.join(self.key_fields)})")
+        if not self.slots:
+            return None
+        h = key_hash(field, value)
+        i = h & (self.slots - 1)
+        while True:
+            slot_hash, n = SLOT.unpack_from(self.mm, self.index_pos + i * SLOT.size)
+            if not slot_hash:
+                return None
+            if slot_hash == h:
+                record = self.get(n)
+                if record.get(field) == value:  # guard against a 64-bit collision
+                    return record
+            i = (i + 1) & (self.slots - 1)
+
+    def by_sku(self, sku):
+        return self.find("sku", sku)
+
+    def by_slug(self, slug):
+        return self.find("slug", slug)
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
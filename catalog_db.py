@@ -0,0 +1,239 @@
+"""
+Bulk load of the generated catalog into the backend SQLite database.
+
+Instead of inserting row by row, the whole catalog is diffed against the
+products (and product_images) already in backend/mulary.db and only the
+difference is written, with one executemany per statement inside a single
+transaction:
+
+    - new SKUs are inserted, keeping the catalog _id unless it is taken
+    - changed rows are updated in place (id, created_at and any orders or
+      cart items pointing at them are untouched); unchanged rows are skipped
+    - SKUs of the loaded brand that left the catalog are deactivated, not
+      deleted, since order_items may still reference them
+    - products whose categoryId is not in the categories table are skipped
+      with a warning (their rows, if any, are left as they are), so a bad
+      category never fails a build whose outputs are already written
+
+The database is switched to WAL so the backend keeps reading while a load
+runs. When a load writes more than INDEX_DEFER_ROWS rows the secondary
+indexes are dropped first and rebuilt once at the end; the unique sku/slug
+indexes stay, they are what the diff is checked against.
+
+    stats = load_catalog("backend/mulary.db", products)
+    python catalog_db.py src/data/bluewudProducts.json backend/mulary.db
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+import uuid
+
+INDEX_DEFER_ROWS = 1000
+
+# products column -> value taken from a catalog record
+PRODUCT_COLUMNS = {
+    "name": lambda p: p["name"],
+    "slug": lambda p: p["slug"],
+    "description": lambda p: p.get("description"),
+    "category_id": lambda p: p.get("categoryId"),
+    "brand": lambda p: p.get("brand"),
+    "price": lambda p: float(p["price"]),
+    "original_price": lambda p: None if p.get("originalPrice") is None else float(p["originalPrice"]),
+    "discount_percentage": lambda p: p.get("discountPercentage"),
+    "sku": lambda p: p["sku"],
+    "stock": lambda p: p.get("stock", 0),
+    "rating": lambda p: p.get("rating", 0),
+    "review_count": lambda p: p.get("reviewCount", 0),
+    "thumbnail_url": lambda p: p.get("thumbnail"),
+    "is_active": lambda p: int(p.get("isActive", True)),
+    "is_featured": lambda p: int(p.get("isFeatured", False)),
+    "type": lambda p: p.get("category"),
+    "specifications": lambda p: _json(p.get("specifications")),
+    "tags": lambda p: _json(p.get("tags", [])),
+}
+IMAGE_COLUMNS = ["product_id", "image_url", "color", "is_primary", "display_order"]
+
+
+def _json(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def connect(db_path):
+    """Connection in autocommit mode (transactions are explicit), WAL journal."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def unique_slugs(products, taken):
+    """Slug per product; repeats (and slugs in `taken`) get the SKU appended."""
+    seen, slugs = set(taken), []
+    for p in products:
+        slug = p["slug"]
+        if slug in seen:
+            slug = f"{slug}-{p['sku'].lower()}"
+        seen.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def image_rows(product_id, product):
+    """product_images rows of one product, with ids derived from their content."""
+    color = product.get("color")
+    rows = []
+    for i, url in enumerate(product.get("images") or []):
+        row_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{product_id}|{i}|{url}"))
+        rows.append((row_id, product_id, url, color, int(i == 0), i))
+    return rows
+
+
+def _secondary_indexes(conn, tables):
+    marks = ",".join("?" * len(tables))
+    return conn.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                        f"AND sql IS NOT NULL AND tbl_name IN ({marks})", tables).fetchall()
+
+
+def load_catalog(db_path, products):
+    """Upsert the catalog records into db_path; returns counts and elapsed seconds."""
+    start = time.perf_counter()
+    products = list(products)
+    columns = list(PRODUCT_COLUMNS)
+    conn = connect(db_path)
+    try:
+        existing = {row[0]: row for row in conn.execute(
+            f"SELECT sku, id, {', '.join(columns)} FROM products")}
+        ids_taken = {row[1] for row in existing.values()}
+        skus = {p["sku"] for p in products}
+
+        categories = {row[0] for row in conn.execute("SELECT id FROM categories")}
+        unknown = sorted({p.get("categoryId") for p in products} - categories - {None})
+        if unknown:
+            products = [p for p in products if p.get("categoryId") not in unknown]
+        loaded = {p["sku"] for p in products}
+
+        # slugs of rows that stay outside the load (or are skipped) cannot be reused
+        taken = {row[2 + columns.index("slug")] for sku, row in existing.items() if sku not in loaded}
+        slugs = unique_slugs(products, taken)
+
+        inserts, updates, moved, catalog_ids, wanted_images = [], [], [], set(), {}
+        for p, slug in zip(products, slugs):
+            values = [PRODUCT_COLUMNS[c](p) for c in columns]
+            values[columns.index("slug")] = slug
+            old = existing.get(p["sku"])
+            if old is None:
+                product_id = p.get("_id") or f"prod-{p['sku']}"
+                if product_id in ids_taken:
+                    product_id = f"prod-{p['sku'].lower()}"
+                ids_taken.add(product_id)
+                inserts.append([product_id] + values)
+            else:
+                product_id = old[1]
+                if list(old[2:]) != values:
+                    updates.append(values + [product_id])
+                    if old[2 + columns.index("slug")] != slug:
+                        moved.append((product_id,))
+            catalog_ids.add(product_id)
+            for row in image_rows(product_id, p):
+                wanted_images[row[0]] = row
+
+        brands = sorted({p.get("brand") for p in products})
+        deactivate = [(row[1],) for sku, row in existing.items()
+                      if sku not in skus and row[2 + columns.index("brand")] in brands
+                      and row[2 + columns.index("is_active")]]
+
+        old_images = {row[0]: row for row in conn.execute(
+            f"SELECT id, {', '.join(IMAGE_COLUMNS)} FROM product_images")
+            if row[1] in catalog_ids}
+        image_deletes = [(i,) for i, row in old_images.items() if wanted_images.get(i) != row]
+        image_inserts = [row for i, row in wanted_images.items() if old_images.get(i) != row]
+
+        written = len(inserts) + len(updates) + len(image_inserts) + len(image_deletes)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deferred = []
+            if written > INDEX_DEFER_ROWS:
+                deferred = _secondary_indexes(conn, ["products", "product_images"])
+                for name, _ in deferred:
+                    conn.execute(f'DROP INDEX "{name}"')
+
+            conn.executemany("DELETE FROM product_images WHERE id = ?", image_deletes)
+            # park renamed slugs first so two rows can swap slugs without a unique clash
+            conn.executemany("UPDATE products SET slug = id || ':moving' WHERE id = ?", moved)
+            conn.executemany(
+                f"UPDATE products SET {', '.join(f'{c} = ?' for c in columns)}, "
+                f"updated_at = CURRENT_TIMESTAMP WHERE id = ?", updates)
+            conn.executemany(
+                f"INSERT INTO products (id, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 1))})", inserts)
+            conn.executemany(
+                "UPDATE products SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                deactivate)
+            conn.executemany(
+                f"INSERT INTO product_images (id, {', '.join(IMAGE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(IMAGE_COLUMNS) + 1))})", image_inserts)
+
+            for _, sql in deferred:
+                conn.execute(sql)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if written:
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "unchanged": len(products) - len(inserts) - len(updates),
+        "deactivated": len(deactivate),
+        "skipped": len(skus) - len(loaded),
+        "unknown_categories": unknown,
+        "images_written": len(image_inserts),
+        "images_deleted": len(image_deletes),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def product_slugs(db_path):
+    """{sku: slug} of the active products, the slugs the backend serves them under."""
+    conn = connect(db_path)
+    try:
+        return dict(conn.execute("SELECT sku, slug FROM products WHERE is_active = 1"))
+    finally:
+        conn.close()
+
+
+def read_catalog(path):
+    """Records of a catalog output: .json, .ndjson or .bcat."""
+    if path.endswith(".bcat"):
+        from catalog_binary import CatalogReader
+        with CatalogReader(path) as cat:
+            return cat[:]
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".ndjson"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def print_stats(stats):
+    print(f"Database: {stats['inserted']} inserted, {stats['updated']} updated, "
+          f"{stats['unchanged']} unchanged, {stats['deactivated']} deactivated; images "
+          f"{stats['images_written']} written, {stats['images_deleted']} removed "
+          f"({stats['seconds']}s)")
+    if stats["skipped"]:
+        print(f"WARNING: {stats['skipped']} products not loaded, categories missing from the "
+              f"database: {', '.join(stats['unknown_categories'])}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python catalog_db.py <catalog.json|.ndjson|.bcat> [database]")
+        sys.exit(1)
+    db = sys.argv[2] if len(sys.argv) > 2 else os.path.join("backend", "mulary.db")
+    print_stats(load_catalog(db, read_catalog(sys.argv[1])))
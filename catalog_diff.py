@@ -0,0 +1,144 @@
+"""
+Build-to-build patches of a catalog output.
+
+Each build gets an id: a hash over the content hash of every record, in
+order. While CatalogWriter writes a new build, the previous one is still on
+disk as <name>.bcat, whose "hashes" section holds the key (sku, parentSku or
+code) and content hash of each of its records. PatchBuilder compares each new
+record's hash with the old one of its key, so only changed records are
+decoded and compared field by field. The resulting patch:
+
+    {"from": "<old build>", "to": "<new build>", "key": "sku",
+     "added":   [{"key": "<key>", "after": "<key or null>", "record": {...}}],
+     "removed": ["<key>", ...],
+     "changed": {"<key>": {"set": {"price": 5299}, "unset": ["weight"]}},
+     "order":   ["<key>", ...]}   only if surviving records were reordered
+
+apply_patch(old_records, patch) rebuilds the new build from the old one, so
+consumers holding build X can apply the patches chained from X in the
+manifest instead of reloading the catalog.
+"""
+import hashlib
+import json
+import os
+
+from catalog_binary import CatalogReader
+
+
+def content_hash(record):
+    """Stable hash of a record: canonical JSON, independent of key order."""
+    text = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_id(hashes):
+    """Id of a build from its records' (key, content hash) pairs, in order."""
+    h = hashlib.sha1()
+    for key, digest in hashes:
+        h.update(f"{key}\0{digest}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def record_key(record, key_field, seen):
+    """record[key_field], with #2, #3... appended to repeats."""
+    key = str(record.get(key_field))
+    seen[key] = seen.get(key, 0) + 1
+    return key if seen[key] == 1 else f"{key}#{seen[key]}"
+
+
+def field_patch(old, new):
+    """{"set": {...}, "unset": [...]} turning record old into new (top-level fields)."""
+    patch = {}
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    if changed:
+        patch["set"] = changed
+    unset = [k for k in old if k not in new]
+    if unset:
+        patch["unset"] = unset
+    return patch
+
+
+class PatchBuilder:
+    """Diffs records, as they are written, against the build in previous_path (.bcat)."""
+
+    def __init__(self, previous_path, key_field):
+        self.key_field = key_field
+        self.seen = {}
+        self.hashes = []          # (key, content hash) of the new build
+        self.added, self.changed = [], {}
+        self.previous = None      # key -> (record number, content hash)
+        self.reader = None
+        if os.path.exists(previous_path):
+            self.reader = CatalogReader(previous_path)
+            stored = self.reader.section("hashes")
+            if stored and stored["key"] == key_field:
+                old = stored["records"]
+            else:
+                # a file written without hashes (or keyed differently): hash it once
+                old_seen = {}
+                old = [(record_key(r, key_field, old_seen), content_hash(r))
+                       for r in map(self.reader.get, range(len(self.reader)))]
+            self.previous = {key: (i, digest) for i, (key, digest) in enumerate(old)}
+            self.old_order = [key for key, _ in old]
+            self.old_id = build_id(old)
+
+    def add(self, record):
+        key = record_key(record, self.key_field, self.seen)
+        digest = content_hash(record)
+        if self.previous is not None:
+            old = self.previous.get(key)
+            if old is None:
+                self.added.append({"key": key, "after": self.hashes[-1][0] if self.hashes else None,
+                                   "record": record})
+            elif old[1] != digest:
+                self.changed[key] = field_patch(self.reader.get(old[0]), record)
+        self.hashes.append((key, digest))
+
+    def sections(self):
+        """The .bcat section for the next build to diff against (CatalogFileWriter.close)."""
+        return {"hashes": {"key": self.key_field, "records": self.hashes}}
+
+    def finish(self):
+        """(new build id, patch or None). Closes the previous file (it is about to be replaced)."""
+        new_id = build_id(self.hashes)
+        if self.reader is None:
+            return new_id, None
+        self.reader.close()
+        if new_id == self.old_id:
+            return new_id, None
+
+        new_keys = [k for k, _ in self.hashes]
+        current = set(new_keys)
+        patch = {"from": self.old_id, "to": new_id, "key": self.key_field,
+                 "added": self.added,
+                 "removed": [k for k in self.old_order if k not in current],
+                 "changed": self.changed}
+        survivors = [k for k in new_keys if k in self.previous]
+        if survivors != [k for k in self.old_order if k in current]:
+            patch["order"] = new_keys
+        return new_id, patch
+
+
+def apply_patch(records, patch):
+    """The records of patch["to"], given the records of patch["from"]."""
+    seen, by_key, order = {}, {}, []
+    for record in records:
+        key = record_key(record, patch["key"], seen)
+        by_key[key] = record
+        order.append(key)
+
+    removed = set(patch["removed"])
+    order = [k for k in order if k not in removed]
+    for key, change in patch["changed"].items():
+        record = {k: v for k, v in by_key[key].items() if k not in change.get("unset", ())}
+        record.update(change.get("set", {}))
+        by_key[key] = record
+
+    for entry in patch["added"]:
+        by_key[entry["key"]] = entry["record"]
+        if "order" not in patch:
+            at = order.index(entry["after"]) + 1 if entry["after"] is not None else 0
+            order.insert(at, entry["key"])
+    if "order" in patch:
+        order = patch["order"]
+    return [by_key[k] for k in order]
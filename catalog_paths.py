@@ -0,0 +1,19 @@
+"""
+Root of the ecommerce-app checkout the catalog scripts read and write.
+
+The scripts used to hardcode one machine's checkout. The default is still
+that path, but it can be set with the CATALOG_APP_ROOT environment variable
+(catalog.py sets it from --app-root). Scripts that work on files in the
+current directory (Productslist.csv, fullreport.xlsm, products.json) are
+pointed elsewhere with catalog.py --data-root.
+
+The catalog build runs from any folder but reads the CRM export for sitemap
+lastmod dates, so its path does not depend on the current directory: it is
+$CATALOG_CRM_EXPORT (catalog.py sets it from --data-root), by default the
+Productslist.csv next to these scripts.
+"""
+import os
+
+APP_ROOT = os.environ.get("CATALOG_APP_ROOT", "C:/Users/shubh/Downloads/ecommerce-app").rstrip("/\\")
+CRM_EXPORT_PATH = os.environ.get("CATALOG_CRM_EXPORT",
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), "Productslist.csv"))
@@ -0,0 +1,229 @@
+"""
+Sitemap index and split sitemaps for the storefront, streamed from the catalog.
+
+    public/sitemap.xml                 sitemap index (robots.txt points here)
+    public/sitemaps/pages.xml          home, listing, policy and category pages
+    public/sitemaps/products-<n>.xml   product pages
+
+SitemapWriter takes the product records one at a time (write_sitemap feeds
+it a catalog after the database load) and appends each one's <url> entry to
+a temp file, so the sitemap is never held in memory. A product goes to the
+shard picked by a hash of its slug, so it stays in the same shard from build
+to build. The shard count is the smallest power of two that keeps every
+shard within MAX_URLS urls and MAX_BYTES bytes (the protocol's 50,000 and
+50 MB). close() splits the temp file into the shards and renders them one at
+a time, urls sorted so record order does not matter; a file is only replaced
+if its bytes changed, so an edit to one product rewrites one shard (and the
+index, if the shard's lastmod moved).
+
+Product urls use the slug the backend serves the product under: `slugs`
+({sku: slug}, catalog_db.product_slugs after load_catalog) is read from the
+database, and products it does not have are left out. Without a database the
+record's own slug is used, a repeat getting the SKU appended. lastmod is the
+CRM Modified Time of the product's code (crm_modified_times, read in chunks
+from the export at catalog_paths.CRM_EXPORT_PATH), or the date of its
+updatedAt.
+
+    write_sitemap(products, public_path, product_slugs(database_path))
+"""
+import hashlib
+import os
+import re
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from catalog_paths import CRM_EXPORT_PATH
+from crm_reader import iter_chunks
+
+SITE_URL = os.environ.get("CATALOG_SITE_URL", "https://srcry.in").rstrip("/")
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+BUCKET_BITS = 12  # shards are unions of 2**BUCKET_BITS slug-hash buckets
+
+# path, changefreq, priority (as in src/utils/sitemapGenerator.ts)
+STATIC_PAGES = [
+    ("/", "daily", "1.0"),
+    ("/products", "daily", "0.9"),
+    ("/about-us", "monthly", "0.5"),
+    ("/contact-us", "monthly", "0.5"),
+    ("/privacy-policy", "monthly", "0.3"),
+    ("/terms-of-service", "monthly", "0.3"),
+    ("/returns-policy", "monthly", "0.3"),
+    ("/shipping-policy", "monthly", "0.3"),
+]
+
+XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+URLSET_HEAD = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n'
+URLSET_TAIL = "</urlset>\n"
+INDEX_HEAD = f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n'
+INDEX_TAIL = "</sitemapindex>\n"
+
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def crm_modified_times(path=CRM_EXPORT_PATH):
+    """{PRODUCT CODE: newest Modified Time date} from the CRM export; {} without one."""
+    if not os.path.exists(path):
+        return {}
+    times = {}
+    for chunk in iter_chunks(path, ['Product Code', 'Modified Time'], active_only=False):
+        for code, modified in zip(chunk['Product Code'], chunk['Modified Time']):
+            date = _DATE.match(str(modified))
+            if isinstance(code, str) and date:
+                code = code.strip().upper()
+                times[code] = max(times.get(code, ""), date.group())
+    return times
+
+
+def url_entry(loc, lastmod=None, changefreq=None, priority=None):
+    parts = [f"<loc>{escape(loc)}</loc>"]
+    if lastmod:
+        parts.append(f"<lastmod>{lastmod}</lastmod>")
+    if changefreq:
+        parts.append(f"<changefreq>{changefreq}</changefreq>")
+    if priority:
+        parts.append(f"<priority>{priority}</priority>")
+    return f"  <url>{''.join(parts)}</url>"
+
+
+def slug_bucket(slug):
+    digest = hashlib.blake2b(slug.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") >> (32 - BUCKET_BITS)
+
+
+def shard_bits(counts, sizes, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+    """Fewest slug-hash bits (shards: 2**bits) for which every shard is within the limits."""
+    overhead = len(URLSET_HEAD) + len(URLSET_TAIL)
+    for bits in range(BUCKET_BITS + 1):
+        shift = BUCKET_BITS - bits
+        urls, size = [0] * (1 << bits), [overhead] * (1 << bits)
+        for bucket, (n, b) in enumerate(zip(counts, sizes)):
+            urls[bucket >> shift] += n
+            size[bucket >> shift] += b
+        if max(urls) <= max_urls and max(size) <= max_bytes:
+            return bits
+    return BUCKET_BITS
+
+
+def _replace_if_changed(path, data):
+    """Write data to path unless it already holds exactly that; True if written."""
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    with open(path + ".tmp", 'wb') as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return True
+
+
+def write_sitemap(records, public_dir, slugs=None, lastmod=None):
+    """Sitemap of the records (lastmod: crm_modified_times() by default); returns counts."""
+    sitemap = SitemapWriter(public_dir, crm_modified_times() if lastmod is None else lastmod, slugs)
+    for record in records:
+        sitemap.add(record)
+    return sitemap.close()
+
+
+class SitemapWriter:
+    def __init__(self, public_dir, lastmod=None, slugs=None, site_url=SITE_URL, code_field="sku",
+                 category_key="categoryId"):
+        self.public_dir = public_dir
+        self.served = slugs
+        self.dir = os.path.join(public_dir, "sitemaps")
+        self.lastmod = lastmod or {}
+        self.site_url = site_url
+        self.code_field = code_field
+        self.category_key = category_key
+        os.makedirs(self.dir, exist_ok=True)
+        self.entries_path = os.path.join(self.dir, "entries.tmp")
+        self.entries = open(self.entries_path, 'w', encoding='utf-8')  # "<bucket>\t<date>\t<url>"
+        self.counts = [0] * (1 << BUCKET_BITS)
+        self.sizes = [0] * (1 << BUCKET_BITS)
+        self.categories = {}  # category id -> newest lastmod of its products
+        self.slugs = set()
+
+    def add(self, record):
+        code = str(record.get(self.code_field) or "")
+        slug = record.get("slug") if self.served is None else self.served.get(code)
+        if not slug or not record.get("isActive", True):
+            return
+        if self.served is not None:
+            if slug in self.slugs:  # another record with the same SKU: the same page
+                return
+        elif slug in self.slugs:
+            slug = f"{slug}-{code.lower()}"
+        self.slugs.add(slug)
+        code = code.upper()
+        date = self.lastmod.get(code) or str(record.get("updatedAt") or "")[:10]
+        line = url_entry(f"{self.site_url}/products/{quote(slug)}", date, "weekly", "0.8")
+        bucket = slug_bucket(slug)
+        self.entries.write(f"{bucket}\t{date}\t{line}\n")
+        self.counts[bucket] += 1
+        self.sizes[bucket] += len(line.encode("utf-8")) + 1
+
+        category = record.get(self.category_key)
+        if category:
+            self.categories[category] = max(self.categories.get(category, ""), date)
+
+    def close(self):
+        """Write the changed sitemap files and the index; returns counts."""
+        self.entries.close()
+        bits = shard_bits(self.counts, self.sizes)
+        shift = BUCKET_BITS - bits
+        names = [f"products-{i + 1}.xml" for i in range(1 << bits)]
+
+        # one pass splits the entries into per-shard temp files...
+        parts = [open(os.path.join(self.dir, f"{name}.part"), 'w', encoding='utf-8') for name in names]
+        try:
+            with open(self.entries_path, 'r', encoding='utf-8') as f:
+                for entry in f:
+                    bucket, rest = entry.split("\t", 1)
+                    parts[int(bucket) >> shift].write(rest)
+        finally:
+            for part in parts:
+                part.close()
+        os.remove(self.entries_path)
+
+        # ...then each shard is rendered on its own
+        sitemaps, written = [], []
+        for name in names:
+            part_path = os.path.join(self.dir, f"{name}.part")
+            with open(part_path, 'r', encoding='utf-8') as f:
+                entries = [line.split("\t", 1) for line in f]
+            os.remove(part_path)
+            if not entries:
+                continue
+            lastmod = max(date for date, _ in entries)
+            body = URLSET_HEAD + "".join(sorted(line for _, line in entries)) + URLSET_TAIL
+            if _replace_if_changed(os.path.join(self.dir, name), body.encode("utf-8")):
+                written.append(name)
+            sitemaps.append((name, lastmod))
+
+        newest = max(self.categories.values(), default="")
+        pages = [url_entry(f"{self.site_url}{path}", newest if freq == "daily" else None, freq, priority)
+                 for path, freq, priority in STATIC_PAGES]
+        pages += [url_entry(f"{self.site_url}/category/{quote(category)}", date, "weekly", "0.7")
+                  for category, date in sorted(self.categories.items())]
+        body = URLSET_HEAD + "".join(line + "\n" for line in pages) + URLSET_TAIL
+        if _replace_if_changed(os.path.join(self.dir, "pages.xml"), body.encode("utf-8")):
+            written.append("pages.xml")
+        sitemaps.insert(0, ("pages.xml", newest))
+
+        index = INDEX_HEAD + "".join(
+            f"  <sitemap><loc>{escape(self.site_url)}/sitemaps/{name}</loc>"
+            + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</sitemap>\n"
+            for name, lastmod in sitemaps) + INDEX_TAIL
+        if _replace_if_changed(os.path.join(self.public_dir, "sitemap.xml"), index.encode("utf-8")):
+            written.append("sitemap.xml")
+
+        # shards of a larger split, dropped only once the index stops listing them
+        keep = {name for name, _ in sitemaps}
+        for entry in os.listdir(self.dir):
+            if re.fullmatch(r'products-\d+\.xml', entry) and entry not in keep:
+                os.remove(os.path.join(self.dir, entry))
+
+        urls = sum(self.counts)
+        print(f"Sitemap: {urls} product urls in {len(sitemaps) - 1} shards, "
+              f"{len(written)} files rewritten")
+        return {"urls": urls, "shards": len(sitemaps) - 1, "written": written}
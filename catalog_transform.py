@@ -0,0 +1,305 @@
+"""
+Columnar SKU master -> product transform for generate_products.py.
+
+Everything up to the final records is done as whole-frame operations: the
+dimensions join is a merge on MTP SKU, categories are a longest-prefix match
+against the category map, slugs/names/descriptions/prices are vectorized
+string and mask operations. Only the output dicts are built row by row.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CATEGORY = {"id": "living-room", "name": "Furniture", "type": "furniture"}
+PLACEHOLDER_IMAGE = "/images/placeholder-furniture.jpg"
+BRAND = "Bluewud"
+PSEUDO_SEED = "bluewud-1"  # change to reshuffle the placeholder rating/reviews/stock
+
+
+def column(df, name, default):
+    """df[name], or a column of `default` if the sheet does not have it."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def assign_categories(skus, category_map, default=DEFAULT_CATEGORY):
+    """Longest-prefix match of each SKU against category_map -> id/name/type frame."""
+    skus = skus.astype(str)
+    matched = pd.Series(None, index=skus.index, dtype=object)
+
+    for length in sorted({len(p) for p in category_map}, reverse=True):
+        table = {p: p for p in category_map if len(p) == length}
+        todo = matched.isna()
+        if not todo.any():
+            break
+        matched[todo] = skus[todo].str[:length].map(table)
+
+    cats = pd.DataFrame(index=skus.index)
+    for key in ("id", "name", "type"):
+        values = {p: info[key] for p, info in category_map.items()}
+        cats[key] = matched.map(values).fillna(default[key])
+    return cats
+
+
+def slugify(names):
+    """Vectorized slugify: lower, drop punctuation, collapse space/_/- runs to '-'."""
+    slugs = names.astype(str).str.lower().str.strip()
+    slugs = slugs.str.replace(r'[^\w\s-]', '', regex=True)
+    slugs = slugs.str.replace(r'[\s_-]+', '-', regex=True)
+    return slugs.where(names.notna(), "")
+
+
+def positive_int(values):
+    """int(v) for v > 0, else <NA> (nullable Int64)."""
+    values = pd.to_numeric(values, errors='coerce')
+    return np.trunc(values.where(values > 0)).astype("Int64")
+
+
+def build_dimensions(dim_df):
+    """Dimensions master -> one row per MTP SKU Code (last row wins)."""
+    dims = pd.DataFrame({
+        "MTP SKU Code": column(dim_df, 'MTP SKU Code', np.nan),
+        "length": positive_int(column(dim_df, 'Lcm', 0)),
+        "width": positive_int(column(dim_df, 'Bcm', 0)),
+        "height": positive_int(column(dim_df, 'Hcm', 0)),
+    })
+    wt = pd.to_numeric(column(dim_df, 'PW(gm)', 0), errors='coerce')
+    # Python's round(), not Series.round(): numpy rounds 12.345 down to 12.34
+    dims["weight"] = (wt.where(wt > 0) / 1000).map(lambda v: round(v, 2), na_action='ignore')
+
+    dims = dims[dims["MTP SKU Code"].notna()]
+    return dims.drop_duplicates(subset=["MTP SKU Code"], keep="last")
+
+
+def present(values):
+    """notna and truthy (drops NaN/<NA> and empty strings), for any dtype."""
+    values = values.astype(object)
+    return values.where(values.notna(), False).astype(bool)
+
+
+def to_list(values):
+    """Series -> list of plain Python values with None for missing."""
+    values = values.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def prepare_skus(sku_df, dims, category_map, brand=BRAND):
+    """
+    Join, filter and derive every column of the product records.
+
+    dims is build_dimensions(dim_df). Returns one row per kept SKU in sheet order.
+    """
+    df = pd.DataFrame({
+        "sku": column(sku_df, 'SKU Code', ''),
+        "mtp_sku": column(sku_df, 'MTP SKU', ''),
+        "mtp_name": column(sku_df, 'MTP Name', ''),
+        "color_raw": column(sku_df, ' Child Color', ''),
+        "name_raw": column(sku_df, 'SKU Product Name', ''),
+        "mrp": column(sku_df, 'MRP', 0),
+    })
+
+    # Skip rows without a SKU code or product name
+    keep = present(df["sku"]) & present(df["name_raw"])
+    df = df[keep].reset_index(drop=True)
+
+    df = df.merge(dims, how="left",
+                  left_on="mtp_sku", right_on="MTP SKU Code", sort=False)
+    df = df.join(assign_categories(df["sku"], category_map).add_prefix("cat_"))
+
+    name = df["name_raw"].astype(str)
+    df["brand"] = brand
+    df["name"] = name.where(name.str.contains(brand, regex=False), brand + " " + name)
+    df["slug"] = slugify(df["name_raw"])
+    df["color"] = df["color_raw"].where(df["color_raw"].notna(), "Natural Wood")
+
+    mrp = pd.to_numeric(df["mrp"], errors='coerce')
+    df["price"] = np.trunc(mrp.where(mrp > 0, 4999)).astype("int64")
+    df["originalPrice"] = np.trunc(df["price"] * 1.25).astype("int64")
+
+    has_dims = df[["length", "width", "height"]].notna().all(axis=1)
+    dim_text = ("\n\n**Dimensions:** " + df["length"].astype(str) + "cm (L) × "
+                + df["width"].astype(str) + "cm (W) × "
+                + df["height"].astype(str) + "cm (H)")
+    desc_color = df["color_raw"].where(df["color_raw"].notna(), "Natural").astype(str)
+    df["description"] = ("Premium " + brand + " " + name + " in " + desc_color
+                         + ". Crafted with high-quality engineered wood."
+                         + dim_text.where(has_dims, ""))
+
+    df["product_id"] = np.arange(1, len(df) + 1)
+    return df
+
+
+RECORD_COLUMNS = (
+    "sku", "mtp_sku", "mtp_name", "color_raw", "brand", "name", "slug", "description",
+    "cat_id", "cat_name", "color", "price", "originalPrice",
+    "length", "width", "height", "weight", "product_id")
+
+
+def sku_rows(df):
+    """prepare_skus rows as plain dicts of RECORD_COLUMNS."""
+    cols = [to_list(df[c]) for c in RECORD_COLUMNS]
+    return [dict(zip(RECORD_COLUMNS, row)) for row in zip(*cols)]
+
+
+def pseudo_value(sku, field, modulo, seed=PSEUDO_SEED):
+    """
+    Deterministic stand-in for hash(sku) % modulo: the same for a SKU on
+    every run and machine (hash() of a str changes with PYTHONHASHSEED).
+    """
+    digest = hashlib.blake2b(f"{seed}:{field}:{sku}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % modulo
+
+
+def product_record(r, images, derivatives=None):
+    """
+    The catalog record for one sku_rows() row and its images. derivatives
+    ({image url: entry}, see image_derivatives) adds resized versions of the
+    images as imageSet and uses the first one's thumbnail size as thumbnail.
+    """
+    sku, color = r["sku"], r["color"]
+    image_set = [dict(src=img, **derivatives[img]) for img in images if img in (derivatives or {})]
+    thumbnail = images[0] if images else PLACEHOLDER_IMAGE
+    if image_set and image_set[0]["src"] == thumbnail:
+        thumbnail = image_set[0]["webp"]["thumbnail"]
+    dimensions = {'length': r["length"], 'width': r["width"], 'height': r["height"]}
+    has_dimensions = any(dimensions.values())
+    weight = r["weight"]
+    product_id = r["product_id"]
+
+    record = {
+        "_id": f"prod-{product_id}",
+        "name": r["name"],
+        "slug": r["slug"],
+        "description": r["description"],
+        "categoryId": r["cat_id"],
+        "category": r["cat_name"],
+        "brand": r["brand"],
+        "sku": sku,
+        "parentSku": r["mtp_sku"],
+        "price": r["price"],
+        "originalPrice": r["originalPrice"],
+        "discountPercentage": 20,
+        "color": color,
+        "colors": [color],
+        "sizes": ["Standard"],
+        "thumbnail": thumbnail,
+        "images": images if images else [PLACEHOLDER_IMAGE],
+        "dimensions": dimensions if has_dimensions else None,
+        "weight": weight,
+        "rating": round(4.0 + pseudo_value(sku, "rating", 10) / 10, 1),
+        "reviewCount": 10 + pseudo_value(sku, "reviewCount", 190),
+        "stock": 20 + pseudo_value(sku, "stock", 80),
+        "isActive": True,
+        "isFeatured": product_id <= 16,
+        "isNew": product_id % 5 == 0,
+        "tags": [r["cat_name"], r["brand"], "Engineered Wood"],
+        "material": "Engineered Wood",
+        "finish": "Laminate",
+        "specifications": {
+            "material": "Engineered Wood",
+            "finish": "Laminate",
+            "style": "Modern",
+            "color": color,
+            "dimensions": dimensions if has_dimensions else None,
+            "weight": f"{weight} kg" if weight else None,
+            "careInstructions": ["Wipe with dry cloth", "Avoid direct sunlight"],
+            "countryOfOrigin": "India",
+            "warranty": "1 Year Manufacturer Warranty",
+        },
+        "createdAt": "2024-01-15T00:00:00Z",
+        "updatedAt": "2024-12-01T00:00:00Z"
+    }
+    if image_set:
+        record["imageSet"] = image_set
+    return record
+
+
+_MISSING = object()
+
+
+def split_shared(values):
+    """
+    (shared, diffs) for a list of values, one per variant: shared holds what
+    all of them agree on (recursing into dicts), diffs[i] the rest of values[i].
+    Either side is _MISSING when empty.
+    """
+    first = values[0]
+    if all(v == first for v in values[1:]):
+        return first, [_MISSING] * len(values)
+    if not all(isinstance(v, dict) for v in values):
+        return _MISSING, list(values)
+
+    shared, diffs = {}, [{} for _ in values]
+    for key in dict.fromkeys(k for v in values for k in v):
+        sub_shared, sub_diffs = split_shared([v.get(key, _MISSING) for v in values])
+        if sub_shared is not _MISSING:
+            shared[key] = sub_shared
+        for diff, sub in zip(diffs, sub_diffs):
+            if sub is not _MISSING:
+                diff[key] = sub
+    return shared, diffs
+
+
+def common_words(names):
+    """The longest run of leading words all names share."""
+    words = [str(n).split() for n in names]
+    prefix = []
+    for column in zip(*words):
+        if any(w != column[0] for w in column):
+            break
+        prefix.append(column[0])
+    return " ".join(prefix)
+
+
+def family_record(parent_sku, variants):
+    """
+    One record for the product records of one MTP SKU. Fields every variant
+    agrees on are stored once; the gallery (images all variants have) moves to
+    the family; each variant keeps its _id, sku and whatever else differs,
+    from the other variants or from the family's own name, slug, etc. A
+    variant's full record is the family's merged with its own (images: the
+    family's followed by its own).
+    """
+    gallery = []
+    if len(variants) > 1:
+        gallery = [img for img in variants[0]["images"]
+                   if all(img in v["images"] for v in variants[1:])]
+    trimmed = [dict(v, images=[img for img in v["images"] if img not in gallery]) for v in variants]
+
+    shared, diffs = split_shared(trimmed)
+    shared = {} if shared is _MISSING else shared
+    name = shared.get("name") or common_words(v["name"] for v in variants) or variants[0]["name"]
+    prices = [v["price"] for v in variants]
+
+    family = {
+        "_id": f"fam-{parent_sku}",
+        "parentSku": parent_sku,
+        "name": name,
+        "slug": slugify(pd.Series([name])).iloc[0],
+        "variantCount": len(variants),
+        "priceRange": {"min": min(prices), "max": max(prices)},
+        "colors": list(dict.fromkeys(v["color"] for v in variants)),
+        "thumbnail": variants[0]["thumbnail"],
+    }
+    family.update({k: v for k, v in shared.items() if k not in family and k not in ("_id", "sku")})
+    family["images"] = gallery + shared.get("images", [])
+    # shared values the family replaced with its own (a lone variant's slug)
+    kept = {k: v for k, v in shared.items()
+            if k in family and k not in ("_id", "colors", "images") and family[k] != v}
+
+    family["variants"] = []
+    for diff, v in zip(diffs, variants):
+        diff = {} if diff is _MISSING else diff
+        diff.pop("colors", None)  # the family's colors list has them all
+        family["variants"].append({"_id": v["_id"], "sku": v["sku"], **kept, **diff})
+    return family
+
+
+def family_records(products):
+    """Product records grouped by parentSku (SKUs without one form their own family)."""
+    groups = {}
+    for p in products:
+        groups.setdefault(p["parentSku"] or p["sku"], []).append(p)
+    return [family_record(parent, variants) for parent, variants in groups.items()]
@@ -0,0 +1,176 @@
+"""
+Watch mode: rebuild the catalog when its inputs change.
+
+    python generate_products.py --watch
+
+Watches the product image tree and the master workbooks, waits until a burst
+of changes has settled (DEBOUNCE seconds without a new event, at most
+MAX_DELAY after the first) and runs the build again in the same process.
+The build itself keeps the rest cheap: the image manifest only re-lists
+changed folders, the workbook stages only rerun when a file hash changed and
+product records are only rebuilt for SKUs whose row or images changed (see
+incremental_build). Outputs are staged and published in one step (see
+catalog_writer), so readers never see a half-written build.
+
+With the watchdog package, changes arrive as filesystem events (inotify on
+Linux, ReadDirectoryChangesW on Windows). Without it the inputs are polled
+every POLL_INTERVAL seconds: the image tree through image_manifest.refresh
+(one stat per known folder, only folders whose mtime changed are re-listed)
+and size/mtime of the workbooks.
+"""
+import os
+import threading
+import time
+import traceback
+
+import image_manifest
+from image_manifest import IMAGE_EXTS
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+DEBOUNCE = 1.0
+MAX_DELAY = 10.0
+POLL_INTERVAL = 2.0
+
+# editor/Office temp files and our own partial writes
+IGNORED_PREFIXES = ("~$", ".~")
+IGNORED_SUFFIXES = (".tmp", ".part", ".crdownload", "~")
+
+
+def relevant(path, image_root, files, is_dir=None):
+    """True for a change that can affect the build: one of files, an image or folder in image_root.
+
+    is_dir comes from the event when known; a deleted path can no longer be
+    checked on disk.
+    """
+    name = os.path.basename(path)
+    if name.startswith(IGNORED_PREFIXES) or name.endswith(IGNORED_SUFFIXES):
+        return False
+    path = os.path.normcase(os.path.abspath(path))
+    if path in {os.path.normcase(os.path.abspath(f)) for f in files}:
+        return True
+    root = os.path.normcase(os.path.abspath(image_root))
+    if not (path == root or path.startswith(root + os.sep)):
+        return False
+    if is_dir is None:
+        is_dir = os.path.isdir(path)
+    return is_dir or name.lower().endswith(IMAGE_EXTS)
+
+
+class Debouncer:
+    """Collects change notices; wait() returns the batch once it has settled."""
+
+    def __init__(self, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+        self.debounce, self.max_delay = debounce, max_delay
+        self.changed = threading.Condition()
+        self.paths, self.first, self.last = set(), None, None
+
+    def notify(self, path):
+        with self.changed:
+            now = time.monotonic()
+            self.paths.add(path)
+            self.first = self.first or now
+            self.last = now
+            self.changed.notify()
+
+    def wait(self):
+        with self.changed:
+            while True:
+                if self.first is None:
+                    self.changed.wait()
+                    continue
+                now = time.monotonic()
+                due = min(self.last + self.debounce, self.first + self.max_delay)
+                if now >= due:
+                    paths, self.paths, self.first, self.last = self.paths, set(), None, None
+                    return paths
+                self.changed.wait(due - now)
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, debouncer, image_root, files):
+        self.debouncer, self.image_root, self.files = debouncer, image_root, files
+
+    def on_any_event(self, event):
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path and relevant(path, self.image_root, self.files, event.is_directory):
+                self.debouncer.notify(path)
+
+
+def _stamps(files):
+    """{path: (size, mtime)} of the watched files, None for a missing one."""
+    state = {}
+    for f in files:
+        try:
+            st = os.stat(f)
+            state[f] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            state[f] = None
+    return state
+
+
+def _poll(debouncer, image_root, files, interval):
+    dirs = image_manifest.refresh(image_root, image_manifest.cached(image_root))
+    stamps = _stamps(files)
+    while True:
+        time.sleep(interval)
+        try:
+            new_dirs = image_manifest.refresh(image_root, dirs)
+        except OSError:
+            continue  # a folder went away mid-scan; the next poll sees the result
+        for rel in set(dirs) | set(new_dirs):
+            old, new = dirs.get(rel, {}), new_dirs.get(rel, {})
+            if old.get("files") != new.get("files") or old.get("dirs") != new.get("dirs"):
+                debouncer.notify(os.path.join(image_root, *rel.split("/")) if rel else image_root)
+        new_stamps = _stamps(files)
+        for f in files:
+            if stamps.get(f) != new_stamps.get(f):
+                debouncer.notify(f)
+        dirs, stamps = new_dirs, new_stamps
+
+
+def watch(rebuild, image_root, files, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL):
+    """Run rebuild() now and after every settled batch of changes, until interrupted."""
+    debouncer = Debouncer(debounce)
+    if Observer is not None:
+        observer = Observer()
+        handler = _Handler(debouncer, image_root, files)
+        observer.schedule(handler, image_root, recursive=True)
+        for folder in {os.path.dirname(os.path.abspath(f)) for f in files}:
+            observer.schedule(handler, folder, recursive=False)
+        observer.start()
+        print(f"Watching {image_root} and {len(files)} workbooks for changes")
+    else:
+        observer = None
+        threading.Thread(target=_poll, args=(debouncer, image_root, files, poll_interval),
+                         daemon=True).start()
+        print(f"Polling {image_root} and {len(files)} workbooks every {poll_interval}s "
+              f"(install watchdog for change events)")
+
+    try:
+        paths = None
+        while True:
+            start = time.perf_counter()
+            try:
+                rebuild()
+            except Exception:
+                # a half-saved workbook or a bad image must not stop the watcher
+                traceback.print_exc()
+                print("Build failed; waiting for the next change")
+            else:
+                trigger = f" after {len(paths)} changes" if paths else ""
+                print(f"Rebuilt{trigger} in {time.perf_counter() - start:.1f}s")
+            paths = debouncer.wait()
+            for path in sorted(paths)[:5]:
+                print(f"  changed: {path}")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
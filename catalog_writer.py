@@ -0,0 +1,271 @@
+"""
+Streaming writer for the catalog JSON outputs.
+
+Records are written to disk as they are produced instead of being collected
+and passed to json.dump at the end. One pass writes:
+
+    <name>.json              minified JSON array (same data as before)
+    <name>.ndjson            one record per line, for line-by-line ingestion
+    <name>.bcat              indexed binary catalog (see catalog_binary)
+    <shards>/manifest.json   counts and file names of the build's files
+    <shards>/builds/<build>/category/<id>.json   the records of one category
+    <shards>/builds/<build>/page/<n>.json        page_size records per page, in output order
+    <shards>/builds/<build>/search.json          search index, if search_fields are given
+    <shards>/builds/<build>/facets.json          filter bitmaps, if facets are given
+    <shards>/patches/<from>-<to>.json   changes since the previous build
+
+Every file gets .gz and (if the brotli package is installed) .br siblings so
+a static server can send them pre-compressed, on up to `workers` threads
+(zlib and brotli release the GIL). The .bcat is left uncompressed for readers
+to memory-map; key_fields are the fields it is indexed by.
+
+Nothing a reader can see changes until the build is complete. The shards are
+written to a staging folder under <shards>/builds/ and the <name> files to
+one in out_dir; when everything is written and compressed, the shard folder
+is renamed to builds/<build>, the <name> files are renamed into out_dir and
+last the manifest is replaced, which switches readers to the new build in one
+step. The previous build's folder is kept, so a reader that fetched the old
+manifest still finds every file it names.
+
+Brotli's top quality compresses at about 1 MB/s, so it is kept for files up
+to BROTLI_SMALL (manifest, patches, small shards). Everything larger (the
+full .json/.ndjson, pages, big shards, search index) uses
+BROTLI_LARGE_QUALITY: about 20% bigger, but about 100x faster.
+
+The manifest names the build (a hash of its content) and lists the patches
+of the last PATCH_HISTORY builds, each against the build before it, keyed by
+the first key field (see catalog_diff).
+
+    writer = CatalogWriter(output_path, "bluewudProducts", shard_dir, "categoryId")
+    for record in records:
+        writer.write(record)
+    manifest = writer.close()
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_binary import CatalogFileWriter
+from catalog_diff import PatchBuilder
+from facet_index import FacetIndexBuilder
+from search_index import SearchIndexBuilder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGE_SIZE = 48
+PATCH_HISTORY = 10
+STAGING_MAX_AGE = 3600  # seconds before another run's staging folder counts as abandoned
+BROTLI_QUALITY = 11          # files up to BROTLI_SMALL bytes
+BROTLI_LARGE_QUALITY = 6     # anything larger
+BROTLI_SMALL = 64 * 1024
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _shard_name(value):
+    name = re.sub(r'[^\w-]+', '-', str(value or "uncategorized").lower()).strip('-')
+    return name or "uncategorized"
+
+
+class _ArrayFile:
+    """A JSON array written one element at a time to <path>.tmp."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.f = open(path + ".tmp", 'w', encoding='utf-8')
+        self.f.write("[")
+
+    def write(self, text):
+        self.f.write(("," if self.count else "") + text)
+        self.count += 1
+
+    def close(self):
+        self.f.write("]")
+        self.f.close()
+        os.replace(self.path + ".tmp", self.path)
+
+
+class CatalogWriter:
+    def __init__(self, out_dir, name, shard_dir, category_key, key_fields=("sku", "slug"),
+                 page_size=PAGE_SIZE, search_fields=None, facets=None, workers=None):
+        self.out_dir = out_dir
+        self.name = name
+        self.shard_dir = shard_dir
+        self.category_key = category_key
+        self.page_size = page_size
+        self.workers = workers
+
+        # everything is staged here until close(); see the module docstring
+        self.builds_dir = os.path.join(shard_dir, "builds")
+        self.stage_dir = os.path.join(self.builds_dir, f".staging-{os.getpid()}")
+        self.out_stage = os.path.join(out_dir, f".{name}.staging-{os.getpid()}")
+        _remove_abandoned(self.builds_dir, ".staging-")
+        _remove_abandoned(out_dir, f".{name}.staging-")
+        for folder in (self.stage_dir, self.out_stage):
+            shutil.rmtree(folder, ignore_errors=True)
+            os.makedirs(folder)
+
+        self.main = _ArrayFile(os.path.join(self.out_stage, f"{name}.json"))
+        self.ndjson_path = os.path.join(self.out_stage, f"{name}.ndjson")
+        self.ndjson = open(self.ndjson_path, 'w', encoding='utf-8')
+        # diffed against the previous build's .bcat, still in out_dir until close()
+        self.patches = PatchBuilder(os.path.join(out_dir, f"{name}.bcat"), key_fields[0])
+        self.binary = CatalogFileWriter(os.path.join(self.out_stage, f"{name}.bcat"), key_fields)
+        # the first searched key field (sku, code) is also searchable as one term
+        code_field = next((f for f in key_fields if f in (search_fields or ())), None)
+        self.search = SearchIndexBuilder(search_fields, code_field) if search_fields else None
+        self.facets = FacetIndexBuilder(facets) if facets else None
+        self.categories = {}  # shard name -> _ArrayFile
+        self.pages = []       # closed and open page files, in order
+        self.written = []     # every finished file, for compression
+
+    def write(self, record):
+        text = _dumps(record)
+        self.main.write(text)
+        self.ndjson.write(text + "\n")
+        self.binary.write(record, text)
+        self.patches.add(record)
+        if self.search:
+            self.search.add(record)
+        if self.facets:
+            self.facets.add(record)
+
+        shard = _shard_name(record.get(self.category_key))
+        if shard not in self.categories:
+            self.categories[shard] = _ArrayFile(os.path.join(self.stage_dir, "category", f"{shard}.json"))
+        self.categories[shard].write(text)
+
+        if not self.pages or self.pages[-1].count == self.page_size:
+            if self.pages:
+                self._finish(self.pages[-1])
+            self.pages.append(_ArrayFile(os.path.join(self.stage_dir, "page", f"{len(self.pages) + 1}.json")))
+        self.pages[-1].write(text)
+
+    def close(self):
+        """Finish and compress every file, then publish the build; returns the manifest."""
+        self._finish(self.main)
+        self.ndjson.close()
+        self.written.append(self.ndjson_path)
+        build, patch = self.patches.finish()
+        self.binary.close(self.patches.sections())
+        for shard in self.categories.values():
+            self._finish(shard)
+        if self.pages:
+            self._finish(self.pages[-1])
+
+        manifest_path = os.path.join(self.shard_dir, "manifest.json")
+        previous = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        patches = self._patch_history(previous.get("patches", []), build, patch)
+        base = f"builds/{build}"
+        manifest = {
+            "name": self.name,
+            "build": build,
+            "total": self.main.count,
+            "pageSize": self.page_size,
+            "pages": [{"file": f"{base}/page/{i}.json", "count": p.count} for i, p in enumerate(self.pages, 1)],
+            "categories": {name: {"file": f"{base}/category/{name}.json", "count": shard.count}
+                           for name, shard in sorted(self.categories.items())},
+            "patches": patches,
+        }
+        if self.search:
+            manifest["search"] = f"{base}/search.json"
+            self._write_json(os.path.join(self.stage_dir, "search.json"), self.search.build())
+        if self.facets:
+            manifest["facets"] = f"{base}/facets.json"
+            self._write_json(os.path.join(self.stage_dir, "facets.json"), self.facets.build())
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(compress, self.written))
+
+        # publish: the build's folder, the <name> files, then the manifest that switches readers over
+        build_dir = os.path.join(self.builds_dir, build)
+        if os.path.isdir(build_dir):
+            shutil.rmtree(self.stage_dir)  # the same content is already published
+        else:
+            os.rename(self.stage_dir, build_dir)
+        for entry in os.listdir(self.out_stage):
+            os.replace(os.path.join(self.out_stage, entry), os.path.join(self.out_dir, entry))
+        os.rmdir(self.out_stage)
+        self._write_json(manifest_path, manifest)
+        compress(manifest_path)
+
+        self._remove_stale({build, previous.get("build")}, patches)
+        return manifest
+
+    def _write_json(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(_dumps(value))
+        os.replace(path + ".tmp", path)
+        self.written.append(path)
+
+    def _finish(self, array_file):
+        array_file.close()
+        self.written.append(array_file.path)
+
+    def _patch_history(self, patches, build, patch):
+        """The previous manifest's patches plus this build's, last PATCH_HISTORY kept."""
+        if patch is not None:
+            entry = {"from": patch["from"], "to": build, "file": f"patches/{patch['from']}-{build}.json",
+                     "added": len(patch["added"]), "removed": len(patch["removed"]),
+                     "changed": len(patch["changed"])}
+            self._write_json(os.path.join(self.shard_dir, "patches", f"{patch['from']}-{build}.json"), patch)
+            patches = [p for p in patches if p["to"] != build] + [entry]
+        return patches[-PATCH_HISTORY:]
+
+    def _remove_stale(self, builds, patches):
+        """Drop build folders other than `builds`, unlisted patches and shards of the old layout."""
+        for entry in os.listdir(self.builds_dir):
+            if entry not in builds and not entry.startswith(".staging-"):
+                shutil.rmtree(os.path.join(self.builds_dir, entry), ignore_errors=True)
+        keep = {p["file"].split("/")[-1] for p in patches}
+        folder = os.path.join(self.shard_dir, "patches")
+        for entry in os.listdir(folder) if os.path.isdir(folder) else ():
+            if re.sub(r'\.(gz|br)$', '', entry) not in keep:
+                os.remove(os.path.join(folder, entry))
+        # shards written next to the manifest, before builds/ existed
+        for sub in ("category", "page"):
+            shutil.rmtree(os.path.join(self.shard_dir, sub), ignore_errors=True)
+        for entry in os.listdir(self.shard_dir):
+            if re.fullmatch(r'(search|facets)\.json(\.gz|\.br)?', entry):
+                os.remove(os.path.join(self.shard_dir, entry))
+
+
+def _remove_abandoned(folder, prefix):
+    """Staging folders (name starting with prefix) a crashed run left behind."""
+    now = time.time()
+    for entry in os.listdir(folder) if os.path.isdir(folder) else ():
+        path = os.path.join(folder, entry)
+        if entry.startswith(prefix) and now - os.path.getmtime(path) > STAGING_MAX_AGE:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def compress(path):
+    """Write <path>.gz (and <path>.br with brotli), streaming, renamed into place."""
+    with open(path, 'rb') as src, open(path + ".gz.tmp", 'wb') as raw:
+        # mtime=0 keeps the .gz bytes identical for identical input
+        with gzip.GzipFile(filename="", mode='wb', fileobj=raw, compresslevel=9, mtime=0) as gz:
+            shutil.copyfileobj(src, gz, 1 << 20)
+    os.replace(path + ".gz.tmp", path + ".gz")
+
+    if brotli is not None:
+        small = os.path.getsize(path) <= BROTLI_SMALL
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY if small else BROTLI_LARGE_QUALITY)
+        with open(path, 'rb') as src, open(path + ".br.tmp", 'wb') as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b''):
+                dst.write(compressor.process(chunk))
+            dst.write(compressor.finish())
+        os.replace(path + ".br.tmp", path + ".br")
@@ -1,9 +1,68 @@
 import pandas as pd
 import json
+import os
+import sys
 
-# Load the CSV
-df = pd.read_csv('Productslist.csv')
-df = df[df['Product Active'] == True]
+from crm_dedup import EXAMPLE_COLUMNS, KEEP_POLICIES, dedup_export
+from crm_delta import KEY_COLUMNS, STATE_DIR, DeltaStore
+from crm_reader import copy_rows, iter_chunks
+from incremental_build import code_version
+
+DEDUP_COLUMNS = ['Product Code', 'Product Name', 'Unit Price']
+
+# --delta: only new/changed rows (by Record Id + Modified Time) are read into the
+# dedup state; products_clean.csv is only rewritten if the kept rows changed
+delta = '--delta' in sys.argv
+
+# --keep=first|last|modified: which row of a duplicated product code is kept
+keep = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--keep=')), 'first')
+if keep not in KEEP_POLICIES:
+    sys.exit(f"--keep must be one of {', '.join(KEEP_POLICIES)}")
+if delta and keep != 'first':
+    sys.exit("--delta only supports --keep=first")
+
+if not delta:
+    # One streaming pass (see crm_dedup); duplicates go to duplicates_report.csv
+    stats = dedup_export('products_clean.csv', 'duplicates_report.csv', keep=keep)
+    print(f"Total active rows: {stats['rows']}")
+    print(f"\nUnique product codes: {stats['unique_codes']}")
+    print(f"Duplicate product codes: {stats['code_duplicates']}")
+    print(f"\nUnique product names (normalized): {stats['unique_names']}")
+    print(f"Duplicate product names: {stats['name_duplicates']}")
+
+    # First duplicates of each kind, with the record they repeat
+    print("\n=== DUPLICATE PRODUCT CODES ===")
+    if stats['code_examples']:
+        print(pd.DataFrame(stats['code_examples'], columns=EXAMPLE_COLUMNS))
+    else:
+        print("No duplicates by product code")
+
+    print("\n=== DUPLICATE PRODUCT NAMES ===")
+    if stats['name_examples']:
+        print(pd.DataFrame(stats['name_examples'], columns=EXAMPLE_COLUMNS))
+    else:
+        print("No duplicates by product name")
+
+    print(f"\nAll duplicates written to duplicates_report.csv (keep={keep})")
+    print(f"\n=== AFTER DEDUPLICATION ===")
+    print(f"Unique products: {stats['kept']}")
+    print(f"\nSaved {stats['kept']} unique products to products_clean.csv")
+    sys.exit(0)
+
+def dedup_values(changed):
+    active = (changed['Product Active'] == True).tolist()
+    rows = changed[DEDUP_COLUMNS].to_dict('records')
+    return [row if act else None for row, act in zip(rows, active)]
+
+# One chunk of the export at a time (see crm_reader.iter_chunks)
+chunks = iter_chunks(columns=KEY_COLUMNS + ['Product Active'] + DEDUP_COLUMNS, active_only=False)
+store = DeltaStore("check_duplicates", code_version(__name__))
+touched, deleted = store.update(chunks, dedup_values)
+store.save()
+store.print_stats()
+
+df = pd.DataFrame([dict(row, **{'Record Id': rid}) for rid, row in store.items() if row],
+                  columns=['Record Id'] + DEDUP_COLUMNS)
 
 print(f"Total active rows: {len(df)}")
 
@@ -35,6 +94,22 @@ df_clean = df.drop_duplicates(subset=['Product Code'], keep='first')
 print(f"\n=== AFTER DEDUPLICATION ===")
 print(f"Unique products: {len(df_clean)}")
 
-# Save cleaned list
-df_clean.to_csv('products_clean.csv', index=False)
-print(f"\nSaved {len(df_clean)} unique products to products_clean.csv")
+kept = df_clean['Record Id'].tolist()
+
+kept_file = os.path.join(STATE_DIR, "check_duplicates.kept.json")
+previous = []
+if os.path.exists(kept_file):
+    with open(kept_file, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+
+touched = set(touched) | set(deleted)
+if kept == previous and not touched & set(kept) and os.path.exists('products_clean.csv'):
+    print("\nproducts_clean.csv is up to date")
+    sys.exit(0)
+
+with open(kept_file, 'w', encoding='utf-8') as f:
+    json.dump(kept, f)
+
+# Save cleaned list (full export rows, streamed; see crm_reader.copy_rows)
+written = copy_rows(set(kept), 'products_clean.csv')
+print(f"\nSaved {written} unique products to products_clean.csv")
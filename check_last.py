@@ -1,9 +1,9 @@
-import json
+from catalog_binary import CatalogReader
 
-with open('products.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-print(f"Total products in JSON: {len(data)}")
-print(f"\nLast 3 products:")
-for p in data[-3:]:
-    print(f"  - {p['name']} ({p['code']}) - Rs.{p['price']}")
+# products.bcat is written next to products.json by extract_simple.py; only the
+# last 3 records are read from it (see catalog_binary)
+with CatalogReader('products.bcat') as catalog:
+    print(f"Total products in JSON: {len(catalog)}")
+    print(f"\nLast 3 products:")
+    for p in catalog.tail(3):
+        print(f"  - {p['name']} ({p['code']}) - Rs.{p['price']}")
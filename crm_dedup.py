@@ -0,0 +1,112 @@
+"""
+Streaming dedup of the Zoho CRM export (Productslist.csv).
+
+One pass over the chunks of crm_reader.iter_chunks(raw=True). Product codes
+and normalized product names are kept only as 64-bit hashes, so memory grows
+with the number of unique keys, not rows. Rows are deduplicated by product
+code; rows that only share a normalized name with an earlier row are kept but
+reported. The duplicates report is written chunk by chunk as it is found;
+the first EXAMPLES duplicates of each kind are also returned for a console
+summary.
+
+Keep policies:
+    first     first row of each code (kept rows are written during the pass)
+    last      last row of each code
+    modified  row with the highest Modified Time (earliest row on ties)
+
+With 'last' and 'modified' a row can still be displaced later, so only the
+winners' Record Ids are held and their rows are copied after the pass.
+"""
+import csv
+
+import pandas as pd
+
+from crm_reader import CRM_EXPORT, MAX_MEMORY_MB, copy_rows, iter_chunks
+
+KEEP_POLICIES = ('first', 'last', 'modified')
+REPORT_COLUMNS = ['Record Id', 'Modified Time', 'Product Code', 'Product Name', 'Reason', 'Duplicate Of']
+EXAMPLE_COLUMNS = ['Product Code', 'Product Name', 'Unit Price', 'Duplicate Of']
+EXAMPLES = 10
+
+
+def normalize_names(names):
+    """Casefold, turn punctuation into spaces and collapse whitespace."""
+    return (names.str.casefold()
+            .str.replace(r'[\W_]+', ' ', regex=True)
+            .str.strip())
+
+
+def key_hashes(values):
+    """uint64 hash per value (pandas' vectorized siphash, stable across runs)."""
+    return pd.util.hash_array(values.to_numpy(dtype=object)).tolist()
+
+
+def dedup_export(out_path, report_path, keep='first', path=CRM_EXPORT, max_memory_mb=MAX_MEMORY_MB):
+    """
+    Write the deduplicated active rows of the export to out_path (verbatim,
+    export order) and every duplicate to report_path. Returns the counts, plus
+    the first EXAMPLES code and name duplicates as lists of EXAMPLE_COLUMNS rows
+    under "code_examples" and "name_examples".
+    """
+    if keep not in KEEP_POLICIES:
+        raise ValueError(f"keep must be one of {KEEP_POLICIES}, got {keep!r}")
+
+    codes = {}  # code hash -> (record id, modified time) of the current winner
+    names = {}  # name hash -> record id of the first row with that name
+    stats = {"rows": 0, "unique_codes": 0, "unique_names": 0,
+             "code_duplicates": 0, "name_duplicates": 0, "kept": 0,
+             "code_examples": [], "name_examples": []}
+    header = True
+
+    with open(report_path, 'w', encoding='utf-8', newline='') as f:
+        report = csv.writer(f, lineterminator='\n')
+        report.writerow(REPORT_COLUMNS)
+
+        for chunk in iter_chunks(path, active_only=True, max_memory_mb=max_memory_mb, raw=True):
+            code_keys = key_hashes(chunk['Product Code'])
+            name_keys = key_hashes(normalize_names(chunk['Product Name']))
+            first_rows = []
+
+            for rid, modified, code, name, price, code_key, name_key in zip(
+                    chunk['Record Id'], chunk['Modified Time'], chunk['Product Code'],
+                    chunk['Product Name'], chunk['Unit Price'], code_keys, name_keys):
+                stats["rows"] += 1
+
+                first_name = names.setdefault(name_key, rid)
+                if first_name == rid:
+                    stats["unique_names"] += int(name != '')
+                else:
+                    stats["name_duplicates"] += 1
+                    report.writerow([rid, modified, code, name, 'name', first_name])
+                    if len(stats["name_examples"]) < EXAMPLES:
+                        stats["name_examples"].append([code, name, price, first_name])
+
+                winner = codes.get(code_key)
+                first_rows.append(winner is None)
+                if winner is None:
+                    codes[code_key] = (rid, modified)
+                    stats["unique_codes"] += int(code != '')
+                    continue
+
+                stats["code_duplicates"] += 1
+                if len(stats["code_examples"]) < EXAMPLES:
+                    stats["code_examples"].append([code, name, price, winner[0]])
+                if keep == 'last' or (keep == 'modified' and modified > winner[1]):
+                    codes[code_key] = (rid, modified)
+                    report.writerow([winner[0], winner[1], code, '', 'code', rid])
+                else:
+                    report.writerow([rid, modified, code, name, 'code', winner[0]])
+
+            if keep == 'first':
+                kept = chunk[first_rows]
+                kept.to_csv(out_path, mode='w' if header else 'a', header=header,
+                            index=False, encoding='utf-8', lineterminator='\n')
+                header = False
+                stats["kept"] += len(kept)
+
+    if keep == 'first':
+        if header:
+            copy_rows(set(), out_path, path)
+    else:
+        stats["kept"] = copy_rows({rid for rid, _ in codes.values()}, out_path, path)
+    return stats
@@ -0,0 +1,120 @@
+"""
+Row-level delta ingest of the Zoho CRM export (Productslist.csv).
+
+Every export row has a Record Id and a Modified Time. DeltaStore remembers
+the Modified Time last seen for each Record Id together with whatever the
+calling script derived from that row (a product, a dedup key, ...). A run only
+derives values for new and changed rows, drops deleted ones, and keeps the
+stored values of everything else, in export order.
+
+The state also records the code version that derived the values (see
+incremental_build.code_version); values stored by other code are dropped, so
+every row is derived again after the script changes.
+
+    store = DeltaStore("extract_simple", code_version(__name__))
+    changed, deleted = store.diff(df)
+    store.apply(changed, deleted, derive_values(changed))
+    store.save()
+    products = [v for v in store.values() if v]
+
+or, holding one chunk of the export at a time (see crm_reader.iter_chunks):
+
+    store.update(iter_chunks(columns=..., active_only=False), derive_values)
+"""
+import json
+import os
+
+from incremental_build import BUILD_VERSION
+
+KEY_COLUMNS = ['Record Id', 'Modified Time']
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "crm")
+
+
+class DeltaStore:
+    def __init__(self, name, version=None, state_dir=STATE_DIR):
+        self.path = os.path.join(state_dir, f"{name}.json")
+        self.version = version or str(BUILD_VERSION)
+        self.rows = {}  # record id -> {"modified": str, "value": ...}, in export order
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # values derived by other code are not reused
+            if saved.get("version") == self.version:
+                self.rows = saved["rows"]
+        self.stats = {"new": 0, "changed": 0, "deleted": 0, "unchanged": 0}
+
+    def _compare(self, df):
+        """Record Ids of df, and a mask of its new or changed rows."""
+        ids = df['Record Id'].astype(str)
+        modified = df['Modified Time'].astype(str)
+        previous = ids.map(lambda rid: self.rows.get(rid, {}).get("modified"))
+        return ids, previous.ne(modified) | previous.isna(), int(previous.isna().sum())
+
+    def _count(self, rows, changed, new):
+        self.stats["new"] += new
+        self.stats["changed"] += changed - new
+        self.stats["unchanged"] += rows - changed
+
+    def diff(self, df):
+        """(rows of df that are new or changed, ids missing from df) vs the stored state."""
+        ids, changed, new = self._compare(df)
+        deleted = list(set(self.rows) - set(ids))
+        self.stats = {"new": 0, "changed": 0, "deleted": len(deleted), "unchanged": 0}
+        self._count(len(df), int(changed.sum()), new)
+        return df[changed], deleted
+
+    def update(self, chunks, derive):
+        """
+        diff() and apply() over the export given as chunks, so only one chunk
+        is held at a time. derive(rows) returns the values for a chunk's new
+        and changed rows. Returns (ids of those rows, deleted ids).
+        """
+        self.stats = {"new": 0, "changed": 0, "deleted": 0, "unchanged": 0}
+        order, touched = [], []
+        for chunk in chunks:
+            ids, changed, new = self._compare(chunk)
+            self._count(len(chunk), int(changed.sum()), new)
+            self.apply(chunk[changed], [], derive(chunk[changed]))
+            order.extend(ids)
+            touched.extend(ids[changed])
+
+        seen = set(order)
+        deleted = [rid for rid in self.rows if rid not in seen]
+        self.stats["deleted"] = len(deleted)
+        if deleted or self.stats["new"]:
+            self.rows = {rid: self.rows[rid] for rid in order if rid in self.rows}
+        return touched, deleted
+
+    def apply(self, changed, deleted, values, order=None):
+        """
+        Store values[i] for the i-th changed row and forget deleted ids.
+
+        New ids are placed where they appear in `order` (the export's Record
+        Ids) if given, otherwise appended.
+        """
+        for rid in deleted:
+            self.rows.pop(rid, None)
+        for rid, modified, value in zip(changed['Record Id'].astype(str),
+                                        changed['Modified Time'].astype(str), values):
+            self.rows[rid] = {"modified": modified, "value": value}
+
+        if order is not None and self.stats["new"]:
+            self.rows = {rid: self.rows[rid] for rid in order if rid in self.rows}
+
+    def values(self):
+        return [row["value"] for row in self.rows.values()]
+
+    def items(self):
+        return [(rid, row["value"]) for rid, row in self.rows.items()]
+
+    def print_stats(self):
+        s = self.stats
+        print(f"Delta: {s['new']} new, {s['changed']} changed, {s['deleted']} deleted, "
+              f"{s['unchanged']} unchanged")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({"version": self.version, "rows": self.rows}, f, ensure_ascii=False,
+                      separators=(",", ":"))
+        os.replace(self.path + ".tmp", self.path)
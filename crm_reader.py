@@ -0,0 +1,100 @@
+"""
+Streaming reader for the Zoho CRM product export (Productslist.csv).
+
+The export has 46 columns including multi-KB descriptions, and the scripts
+only use a handful. iter_chunks() reads just the requested columns with
+declared dtypes, in chunks sized so each parsed chunk stays within a memory
+budget, and applies the Product Active filter per chunk.
+"""
+import csv
+
+import pandas as pd
+
+CRM_EXPORT = 'Productslist.csv'
+
+# Declared dtypes for the columns the scripts use; anything else is inferred
+CRM_DTYPES = {
+    'Record Id': str,
+    'Modified Time': str,
+    'Product Active': 'boolean',
+    'Product Code': str,
+    'Product Name': str,
+    'Unit Price': 'float64',
+}
+
+MAX_MEMORY_MB = 64
+PROBE_ROWS = 1000
+
+
+def iter_chunks(path=CRM_EXPORT, columns=None, active_only=True, max_memory_mb=MAX_MEMORY_MB,
+                raw=False):
+    """
+    Yield DataFrame chunks of the export with only `columns` (default: all).
+
+    The first chunk is PROBE_ROWS rows; later chunks are sized from its
+    measured bytes per row so a parsed chunk uses at most half the budget.
+    Chunks keep the export's row numbers as index. With raw=True every cell
+    is the exported text ('' when empty), so rows can be written back as-is.
+    """
+    usecols = None
+    if columns is not None:
+        usecols = list(columns)
+        if active_only and 'Product Active' not in usecols:
+            usecols.append('Product Active')
+    if raw:
+        options = {"dtype": str, "keep_default_na": False}
+    else:
+        options = {"dtype": {c: t for c, t in CRM_DTYPES.items() if usecols is None or c in usecols}}
+    budget = max_memory_mb * 2**20
+
+    with pd.read_csv(path, usecols=usecols, chunksize=PROBE_ROWS, **options) as reader:
+        size = PROBE_ROWS
+        while True:
+            try:
+                chunk = reader.get_chunk(size)
+            except StopIteration:
+                break
+            per_row = chunk.memory_usage(deep=True).sum() / max(len(chunk), 1)
+            size = max(1, int(budget / 2 / per_row))
+
+            if active_only and raw:
+                chunk = chunk[chunk['Product Active'].str.lower() == 'true']
+            elif 'Product Active' in chunk.columns:
+                chunk['Product Active'] = chunk['Product Active'].fillna(False).astype(bool)
+                if active_only:
+                    chunk = chunk[chunk['Product Active']]
+            if columns is not None:
+                chunk = chunk[list(columns)]
+            yield chunk
+
+
+def read_products(path=CRM_EXPORT, columns=None, active_only=True, max_memory_mb=MAX_MEMORY_MB):
+    """
+    All chunks of iter_chunks() as one frame. Pass the columns you need: the
+    whole result is held, so callers that can work per chunk should iterate
+    iter_chunks() instead.
+    """
+    chunks = list(iter_chunks(path, columns, active_only, max_memory_mb))
+    if not chunks:
+        return pd.read_csv(path, usecols=columns, nrows=0)
+    return pd.concat(chunks)
+
+
+def copy_rows(record_ids, out_path, path=CRM_EXPORT):
+    """
+    Stream the export rows whose Record Id is in record_ids to out_path,
+    verbatim (cell text as exported) and in export order. Returns the count.
+    """
+    written = 0
+    with open(path, 'r', encoding='utf-8', newline='') as src, \
+            open(out_path, 'w', encoding='utf-8', newline='') as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst, lineterminator='\n')
+        header = next(reader)
+        id_col = header.index('Record Id')
+        writer.writerow(header)
+        for row in reader:
+            if row[id_col] in record_ids:
+                writer.writerow(row)
+                written += 1
+    return written
@@ -1,13 +1,14 @@
-import pandas as pd
+from excel_cache import CachedWorkbook
 
 file_path = 'fullreport.xlsm'
+workbook = CachedWorkbook(file_path)
 
 # Read Images sheet
 print("=" * 80)
 print("IMAGES SHEET:")
 print("=" * 80)
 try:
-    images_df = pd.read_excel(file_path, sheet_name='Images', engine='openpyxl')
+    images_df = workbook.read('Images')
     print(f"Rows: {len(images_df)}")
     print(f"Columns: {list(images_df.columns)}")
     print("\nFirst 5 rows:")
@@ -20,7 +21,7 @@ print("\n" + "=" * 80)
 print("DATA DEFINITIONS SHEET:")
 print("=" * 80)
 try:
-    data_def_df = pd.read_excel(file_path, sheet_name='Data Definitions', engine='openpyxl')
+    data_def_df = workbook.read('Data Definitions')
     print(f"Rows: {len(data_def_df)}")
     print(f"Columns: {list(data_def_df.columns)}")
     print("\nFirst 5 rows:")
@@ -33,7 +34,7 @@ print("\n" + "=" * 80)
 print("TEMPLATE SHEET (Sample):")
 print("=" * 80)
 try:
-    template_df = pd.read_excel(file_path, sheet_name='Template', engine='openpyxl', nrows=10)
+    template_df = workbook.read('Template', nrows=10)
     print(f"Total Rows: 745")
     print(f"Total Columns: 931")
     print(f"\nFirst 20 column names:")
@@ -43,3 +44,5 @@ try:
     print(template_df.iloc[:3, :10])
 except Exception as e:
     print(f"Error: {e}")
+
+workbook.close()
@@ -0,0 +1,219 @@
+"""
+Parse-once loader and on-disk sheet cache for the Excel inputs.
+
+pd.read_excel re-opens and re-parses the whole workbook on every call, which
+for fullreport.xlsm (a 931-column Template sheet) means one full parse per
+sheet per script. CachedWorkbook opens the file once in openpyxl read-only
+mode and saves every sheet it parses under .cache/excel/<content hash>/, so
+later runs load the sheet straight from disk without touching openpyxl.
+Previews (read(name, nrows=...)) parse and cache only the first rows.
+When a new version of a file is cached, the folders of its older versions
+are removed.
+
+read_snapshot does the same for the SKU and Dimensions masters, keeping only
+the declared columns cast to explicit dtypes so they store as parquet.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "excel")
+
+# In-process results by file path, size and mtime, for commands chained in one
+# process (catalog.py) and repeated builds (--watch)
+_hashes = {}
+_snapshots = {}
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+def file_hash(path):
+    """sha1 of the file contents."""
+    stamp = _stamp(path)
+    if stamp not in _hashes:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        _hashes[stamp] = h.hexdigest()
+    return _hashes[stamp]
+
+
+def version_dir(path, cache_dir=CACHE_DIR):
+    """
+    The cache folder for this version of path, created on first use. Each
+    folder lists the source paths it was made for in source.json; a path's
+    older versions are dropped when its new one is created.
+    """
+    folder = os.path.join(cache_dir, file_hash(path))
+    source = os.path.abspath(path)
+    if os.path.isdir(folder):
+        sources = _sources(folder)
+        if source not in sources:
+            _write_sources(folder, sources + [source])
+        return folder
+    for entry in os.listdir(cache_dir) if os.path.isdir(cache_dir) else ():
+        other = os.path.join(cache_dir, entry)
+        sources = _sources(other)
+        if source not in sources:
+            continue
+        sources.remove(source)
+        if sources:
+            _write_sources(other, sources)  # still the current content of another file
+        else:
+            shutil.rmtree(other, ignore_errors=True)
+    os.makedirs(folder, exist_ok=True)
+    _write_sources(folder, [source])
+    return folder
+
+
+def _sources(folder):
+    try:
+        with open(os.path.join(folder, "source.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _write_sources(folder, sources):
+    with open(os.path.join(folder, "source.json.tmp"), 'w', encoding='utf-8') as f:
+        json.dump(sources, f, ensure_ascii=False)
+    os.replace(os.path.join(folder, "source.json.tmp"), os.path.join(folder, "source.json"))
+
+
+def save_frame(df, base):
+    """Write df as <base>.parquet, or <base>.pkl if pyarrow can't (mixed-type columns)."""
+    try:
+        df.to_parquet(base + ".parquet.tmp")
+        path = base + ".parquet"
+    except (ImportError, TypeError, ValueError):
+        df.to_pickle(base + ".pkl.tmp")
+        path = base + ".pkl"
+    # Rename into place so an interrupted write never looks like a cache hit
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_frame(base):
+    """Read a frame written by save_frame, or None if it is not cached."""
+    if os.path.exists(base + ".parquet"):
+        return pd.read_parquet(base + ".parquet")
+    if os.path.exists(base + ".pkl"):
+        return pd.read_pickle(base + ".pkl")
+    return None
+
+
+def apply_dtypes(df, dtypes):
+    """The columns of df named in dtypes ({column: dtype}), cast to those dtypes."""
+    typed = {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if pd.api.types.is_numeric_dtype(pd.Series(dtype=dtype)):
+            typed[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+        else:
+            typed[col] = df[col].astype(dtype)
+    return pd.DataFrame(typed, index=df.index)
+
+
+def read_snapshot(path, dtypes, header=0, sheet_name=0, cache_dir=CACHE_DIR):
+    """
+    pd.read_excel(path, sheet_name=..., header=...) reduced to the columns in
+    dtypes and cast to them. Cached by file content and by these settings, so
+    a changed workbook or a different header row re-parses automatically.
+    """
+    settings = json.dumps({"sheet_name": sheet_name, "header": header, "dtypes": dtypes},
+                          sort_keys=True)
+    memo = (_stamp(path), settings)
+    if memo in _snapshots:
+        return _snapshots[memo].copy()
+
+    key = hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+    base = os.path.join(version_dir(path, cache_dir), f"snapshot-{key}")
+
+    df = load_frame(base)
+    if df is None:
+        df = apply_dtypes(pd.read_excel(path, sheet_name=sheet_name, header=header), dtypes)
+        save_frame(df, base)
+    _snapshots[memo] = df
+    return df.copy()
+
+
+class CachedWorkbook:
+    """
+    Sheets of one workbook, parsed at most once per file version.
+
+    with CachedWorkbook('fullreport.xlsm') as wb:
+        for sheet in wb.sheets:          # {"name", "rows", "cols"}
+            df = wb.read(sheet["name"])
+        head = wb.read("Template", nrows=10)   # parses only the first rows
+    """
+
+    def __init__(self, path, cache_dir=CACHE_DIR):
+        self.path = path
+        self.dir = version_dir(path, cache_dir)
+        self._excel = None
+
+        manifest_file = os.path.join(self.dir, "sheets.json")
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                self.sheets = json.load(f)
+        else:
+            book = self.excel().book
+            self.sheets = []
+            for name in book.sheetnames:
+                rows, cols = _dimensions(book[name])
+                self.sheets.append({"name": name, "rows": rows, "cols": cols})
+            with open(manifest_file, 'w', encoding='utf-8') as f:
+                json.dump(self.sheets, f, ensure_ascii=False)
+
+        self.sheetnames = [s["name"] for s in self.sheets]
+
+    def excel(self):
+        """The underlying pd.ExcelFile, opened (read-only) on first use."""
+        if self._excel is None:
+            self._excel = pd.ExcelFile(self.path, engine='openpyxl')
+        return self._excel
+
+    def read(self, sheet_name, nrows=None):
+        """One sheet as a DataFrame, same as pd.read_excel(path, sheet_name=..., nrows=...)."""
+        base = os.path.join(self.dir, f"sheet{self.sheetnames.index(sheet_name)}")
+        df = load_frame(base)
+        if df is not None:
+            return df if nrows is None else df.head(nrows)
+        if nrows is not None:
+            base += f"-rows{nrows}"
+            df = load_frame(base)
+        if df is None:
+            df = self.excel().parse(sheet_name, nrows=nrows)
+            save_frame(df, base)
+        return df
+
+    def read_all(self, sheetnames=None):
+        """{name: DataFrame} for the given sheets (default: all)."""
+        return {name: self.read(name) for name in (sheetnames or self.sheetnames)}
+
+    def close(self):
+        if self._excel is not None:
+            self._excel.close()
+            self._excel = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _dimensions(sheet):
+    """(rows, cols) of an openpyxl sheet. Read-only sheets saved without a size
+    report None until their rows are counted."""
+    if sheet.max_row is None or sheet.max_column is None:
+        sheet.calculate_dimension(force=True)
+    return sheet.max_row, sheet.max_column
@@ -1,46 +1,46 @@
 ﻿import pandas as pd
 import json
-import re
 
-df = pd.read_csv('Productslist.csv')
-df = df[df['Product Active'] == True]
+from crm_reader import iter_chunks
 
+# Stream the export in memory-bounded chunks of just these columns (see crm_reader)
 products = []
-for idx, row in df.iterrows():
-    code = str(row.get('Product Code', ''))
-    if code in ['', '----', '---'] or pd.isna(row.get('Product Code')):
-        continue
-    
-    name = str(row.get('Product Name', ''))
-    if '$' in name or name == 'nan':
-        continue
-    
-    price = row.get('Unit Price', 0)
-    if not price or price == 0:
-        continue
-    
-    slug = re.sub(r'[^\w\s-]', '', name.lower())
-    slug = re.sub(r'[\s_]+', '-', slug)[:100]
-    
-    products.append({
-        '_id': f'prod-{len(products)+1}',
-        'name': name,
-        'code': code,
-        'slug': slug,
-        'price': int(price),
-        'brand': 'Bluewud',
-        'stock': 10,
-        'isActive': True,
-        'rating': 4.5,
-        'reviewCount': 50,
-        'category': 'living-room',
-        'images': [f'https://placehold.co/800x800/8B4513/FFF?text={code}'],
-        'thumbnail': f'https://placehold.co/800x800/8B4513/FFF?text={code}'
-    })
+for df in iter_chunks(columns=['Product Code', 'Product Name', 'Unit Price']):
+    # Filter and derive columns on the whole chunk; only the final records are built per row
+    code = df['Product Code'].astype(str)
+    name = df['Product Name'].astype(str)
+    price = pd.to_numeric(df['Unit Price'], errors='coerce')
 
-with open('products.json', 'w') as f:
+    keep = df['Product Code'].notna() & ~code.isin(['', '----', '---'])
+    keep &= df['Product Name'].notna() & ~name.str.contains('$', regex=False, na=False) & (name != 'nan')
+    keep &= price.notna() & (price != 0)
+    code, name, price = code[keep], name[keep], price[keep].astype('int64')
+
+    slug = name.str.lower().str.replace(r'[^\w\s-]', '', regex=True)
+    slug = slug.str.replace(r'[\s_]+', '-', regex=True).str[:100]
+
+    for code, name, slug, price in zip(code.tolist(), name.tolist(), slug.tolist(), price.tolist()):
+        products.append({
+            '_id': f'prod-{len(products)+1}',
+            'name': name,
+            'code': code,
+            'slug': slug,
+            'price': price,
+            'brand': 'Bluewud',
+            'stock': 10,
+            'isActive': True,
+            'rating': 4.5,
+            'reviewCount': 50,
+            'category': 'living-room',
+            'images': [f'https://placehold.co/800x800/8B4513/FFF?text={code}'],
+            'thumbnail': f'https://placehold.co/800x800/8B4513/FFF?text={code}'
+        })
+
+# Not products.json: that is extract_simple.py's, with its .ndjson/.bcat/shards
+# siblings, and overwriting it alone would leave them stale
+with open('extracted_products.json', 'w') as f:
     json.dump(products, f, indent=2)
 
-print(f'Extracted {len(products)} products')
+print(f'Extracted {len(products)} products to extracted_products.json')
 for p in products[:3]:
-    print(f'{p[\"name\"]} - ₹{p[\"price\"]}')
+    print(f'{p["name"]} - ₹{p["price"]}')
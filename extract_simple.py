@@ -1,66 +1,120 @@
 import pandas as pd
-import json
-import re
+import sys
 
-print("Loading CSV...")
-df = pd.read_csv('Productslist.csv')
-df = df[df['Product Active'] == True]
+from catalog_writer import CatalogWriter
+from crm_delta import KEY_COLUMNS, DeltaStore
+from crm_reader import iter_chunks
+from facet_index import PRICE_BUCKETS
+from incremental_build import code_version
+
+# Filter bitmaps over the fields these records have (see facet_index)
+FACETS = {
+    'category': ('category', None),
+    'color': ('colorFinish', None),
+    'material': ('specifications.material', None),
+    'price': ('price', PRICE_BUCKETS),
+}
+
+# Only the columns used below (skips the multi-KB Description text)
+COLUMNS = KEY_COLUMNS + ['Product Active', 'Product Code', 'Product Name', 'Unit Price']
 
-print(f"Found {len(df)} active products")
+def derive_products(df):
+    """One product (without _id) per row of df, or None if the row is skipped."""
+    # Filter and derive columns on the whole frame; only the final records are built per row
+    code = df['Product Code'].astype(str)
+    name = df['Product Name'].astype(str)
+    price = pd.to_numeric(df['Unit Price'], errors='coerce')
+
+    keep = df['Product Active'] == True
+    keep &= df['Product Code'].notna() & ~code.isin(['', '----', '---', 'nan'])
+    keep &= df['Product Name'].notna() & ~name.str.contains('$', regex=False, na=False) & (name != 'nan')
+    keep &= price.notna() & (price != 0)
 
-products = []
-for idx, row in df.iterrows():
-    code = str(row.get('Product Code', ''))
-    if code in ['', '----', '---', 'nan'] or pd.isna(row.get('Product Code')):
-        continue
-    
-    name = str(row.get('Product Name', ''))
-    if '$' in name or name == 'nan':
-        continue
-    
-    price = row.get('Unit Price', 0)
-    if not price or price == 0 or pd.isna(price):
-        continue
-    
     # Clean slug
-    slug = re.sub(r'[^\w\s-]', '', name.lower())
-    slug = re.sub(r'[\s_]+', '-', slug).strip('-')[:100]
-    
-    products.append({
-        '_id': f'prod-{len(products)+1}',
-        'name': name,
-        'code': code,
-        'slug': slug,
-        'description': f'{name} - Premium Bluewud furniture',
-        'price': int(price),
-        'brand': 'Bluewud',
-        'stock': 10,
-        'isActive': True,
-        'isFeatured': False,
-        'rating': 4.5,
-        'reviewCount': 50,
-        'category': 'living-room',
-        'subCategory': 'Furniture',
-        'images': [
-            f'https://placehold.co/1200x1200/8B4513/FFFFFF?text={code}',
-            f'https://placehold.co/1200x1200/A0826D/FFFFFF?text={code}-2',
-            f'https://placehold.co/1200x1200/8B7355/FFFFFF?text={code}-3'
-        ],
-        'thumbnail': f'https://placehold.co/800x800/8B4513/FFFFFF?text={code}',
-        'tags': ['Furniture', 'Bluewud'],
-        'colorFinish': 'Brown Maple',
-        'specifications': {
-            'material': 'Engineered Wood',
-            'warranty': '1 Year'
+    slug = name.str.lower().str.replace(r'[^\w\s-]', '', regex=True)
+    slug = slug.str.replace(r'[\s_]+', '-', regex=True).str.strip('-').str[:100]
+
+    values = [None] * len(df)
+    rows = zip(keep.tolist(), code.tolist(), name.tolist(), slug.tolist(), price.tolist())
+    for i, (kept, code, name, slug, price) in enumerate(rows):
+        if not kept:
+            continue
+        values[i] = {
+            'name': name,
+            'code': code,
+            'slug': slug,
+            'description': f'{name} - Premium Bluewud furniture',
+            'price': int(price),
+            'brand': 'Bluewud',
+            'stock': 10,
+            'isActive': True,
+            'isFeatured': False,
+            'rating': 4.5,
+            'reviewCount': 50,
+            'category': 'living-room',
+            'subCategory': 'Furniture',
+            'images': [
+                f'https://placehold.co/1200x1200/8B4513/FFFFFF?text={code}',
+                f'https://placehold.co/1200x1200/A0826D/FFFFFF?text={code}-2',
+                f'https://placehold.co/1200x1200/8B7355/FFFFFF?text={code}-3'
+            ],
+            'thumbnail': f'https://placehold.co/800x800/8B4513/FFFFFF?text={code}',
+            'tags': ['Furniture', 'Bluewud'],
+            'colorFinish': 'Brown Maple',
+            'specifications': {
+                'material': 'Engineered Wood',
+                'warranty': '1 Year'
+            }
         }
-    })
 
-print(f"\nExtracted {len(products)} products")
+    return values
+
+# --delta: only rows whose Record Id is new or whose Modified Time changed are
+# processed; the rest come from the previous run's state (see crm_delta)
+delta = '--delta' in sys.argv
+
+print("Loading CSV...")
+counts = {'active': 0}
+if delta:
+    # Every row's Record Id / Modified Time is needed to find changes and
+    # deletions; the export is still read one chunk at a time
+    def all_chunks(counts):
+        for df in iter_chunks(columns=COLUMNS, active_only=False):
+            counts['active'] += int(df['Product Active'].sum())
+            yield df
+
+    store = DeltaStore("extract_simple", code_version(__name__))
+    store.update(all_chunks(counts), derive_products)
+    print(f"Found {counts['active']} active products")
+    store.save()
+    store.print_stats()
+    values = store.values()
+else:
+    # Stream active rows in memory-bounded chunks (see crm_reader)
+    def stream_values(counts):
+        for df in iter_chunks(columns=COLUMNS):
+            counts['active'] += len(df)
+            yield from derive_products(df)
+    values = stream_values(counts)
 
-with open('products.json', 'w', encoding='utf-8') as f:
-    json.dump(products, f, indent=2, ensure_ascii=False)
+# Each product goes to disk as soon as it is derived: minified products.json,
+# products.ndjson, products.bcat and category/page shards, patches, a search
+# index and filter bitmaps under products/ (see catalog_writer)
+writer = CatalogWriter('.', 'products', 'products', 'category', key_fields=('code', 'slug'),
+                       search_fields=('name', 'tags', 'category', 'colorFinish', 'code'),
+                       facets=FACETS)
+sample = []
+for i, p in enumerate((p for p in values if p), 1):
+    product = {'_id': f'prod-{i}', **p}
+    writer.write(product)
+    if len(sample) < 5:
+        sample.append(product)
+manifest = writer.close()
 
-print(f"Saved to products.json")
+if not delta:
+    print(f"Found {counts['active']} active products")
+print(f"\nExtracted {manifest['total']} products")
+print(f"Saved to products.json ({len(manifest['pages'])} pages, {len(manifest['categories'])} category shards)")
 print("\nSample products:")
-for i, p in enumerate(products[:5], 1):
+for i, p in enumerate(sample, 1):
     print(f"{i}. {p['name'][:50]} - Rs.{p['price']}")
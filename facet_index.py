@@ -0,0 +1,163 @@
+"""
+Build-time facet bitmaps for the storefront filters.
+
+Filtering by scanning every product on every change is replaced by set
+operations on bitmaps: one per facet value, bit i set when record i (its
+position in the catalog) has that value. Numeric fields are bucketed by fixed
+edges. While CatalogWriter writes the records, FacetIndexBuilder collects the
+bitmaps; build() stores each one in whichever encoding is smaller, with its
+count:
+
+    {"bits": "<base64>"}           plain bitset, bit i = byte i // 8, bit i % 8
+    {"runs": [start, length, ...]} runs of set bits, for sparse or clustered sets
+
+A filter selection (OR within a facet, AND across facets) is then a few
+bitwise ANDs/ORs over len(catalog) / 8 bytes:
+
+    facets = FacetIndex.load("public/catalog/bluewudProducts/" + manifest["facets"])
+    facets.select({"category": ["bedroom"], "price": ["10000-20000"]})
+"""
+import base64
+import json
+
+PRICE_BUCKETS = [0, 5000, 10000, 20000, 40000]
+DIMENSION_BUCKETS = [0, 50, 100, 150, 200]  # cm
+
+# facet -> (record field, dotted for nested values; bucket edges or None)
+FACETS = {
+    "category": ("categoryId", None),
+    "color": ("color", None),
+    "material": ("material", None),
+    "price": ("price", PRICE_BUCKETS),
+    "length": ("dimensions.length", DIMENSION_BUCKETS),
+    "width": ("dimensions.width", DIMENSION_BUCKETS),
+    "height": ("dimensions.height", DIMENSION_BUCKETS),
+}
+
+
+def bucket_label(value, edges):
+    """"5000-10000" for a value in [5000, 10000); the last bucket is "40000+"."""
+    label = None
+    for lo, hi in zip(edges, edges[1:] + [None]):
+        if value >= lo:
+            label = f"{lo}+" if hi is None else f"{lo}-{hi}"
+    return label
+
+
+def field_values(record, path):
+    """Values of a dotted field; lists give one value per element, missing gives none."""
+    value = record
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    if value is None or value == "":
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def encode_bitmap(bits, size):
+    """The smaller of the bitset and run encodings of an int bitmap."""
+    runs, i = [], 0
+    while bits >> i:
+        start = i + ((bits >> i) & -(bits >> i)).bit_length() - 1
+        length = (~(bits >> start) & ((bits >> start) + 1)).bit_length() - 1
+        runs += [start, length]
+        i = start + length
+    raw = bits.to_bytes((size + 7) // 8, "little")
+    if len(json.dumps(runs)) < len(raw) * 4 // 3:
+        return {"runs": runs}
+    return {"bits": base64.b64encode(raw).decode("ascii")}
+
+
+def decode_bitmap(entry):
+    if "runs" in entry:
+        bits, runs = 0, entry["runs"]
+        for start, length in zip(runs[::2], runs[1::2]):
+            bits |= ((1 << length) - 1) << start
+        return bits
+    return int.from_bytes(base64.b64decode(entry["bits"]), "little")
+
+
+class FacetIndexBuilder:
+    def __init__(self, facets=FACETS):
+        self.facets = facets
+        self.bitmaps = {name: {} for name in facets}  # facet -> value -> int bitmap
+        self.count = 0
+
+    def add(self, record):
+        bit = 1 << self.count
+        for name, (path, edges) in self.facets.items():
+            for value in field_values(record, path):
+                if edges is not None:
+                    if not isinstance(value, (int, float)):
+                        continue
+                    value = bucket_label(value, edges)
+                    if value is None:
+                        continue
+                values = self.bitmaps[name]
+                values[str(value)] = values.get(str(value), 0) | bit
+        self.count += 1
+
+    def build(self):
+        facets = {}
+        for name, (path, edges) in self.facets.items():
+            values = self.bitmaps[name]
+            # buckets in edge order, other values by count
+            order = sorted(values, key=lambda v: float(v.split("-")[0].rstrip("+"))) if edges \
+                else sorted(values, key=lambda v: (-bin(values[v]).count("1"), v))
+            facets[name] = {"field": path,
+                            "values": {v: dict(count=bin(values[v]).count("1"),
+                                               **encode_bitmap(values[v], self.count))
+                                       for v in order}}
+        return {"version": 1, "total": self.count, "facets": facets}
+
+
+class FacetIndex:
+    """Query side of a built index (the storefront does the same in JS)."""
+
+    def __init__(self, data):
+        self.total = data["total"]
+        self.all = (1 << self.total) - 1
+        self.counts = {name: {v: e["count"] for v, e in f["values"].items()}
+                       for name, f in data["facets"].items()}
+        self.bitmaps = {name: {v: decode_bitmap(e) for v, e in f["values"].items()}
+                        for name, f in data["facets"].items()}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def bitmap(self, filters, skip=None):
+        """Records matching {facet: [values]}: any value within a facet, every facet."""
+        bits = self.all
+        for name, values in filters.items():
+            if name == skip or not values:
+                continue
+            union = 0
+            for value in values:
+                union |= self.bitmaps[name].get(str(value), 0)
+            bits &= union
+        return bits
+
+    def select(self, filters):
+        """Catalog positions matching the filters, in order."""
+        bits, found = self.bitmap(filters), []
+        while bits:
+            low = bits & -bits
+            found.append(low.bit_length() - 1)
+            bits ^= low
+        return found
+
+    def facet_counts(self, filters):
+        """
+        Per facet value, how many records would match if it were selected:
+        the filters of the other facets applied (the facet's own selection is
+        an OR, so it does not narrow its own counts).
+        """
+        if not any(filters.values()):
+            return self.counts
+        counts = {}
+        for name, values in self.bitmaps.items():
+            others = self.bitmap(filters, skip=name)
+            counts[name] = {v: bin(bits & others).count("1") for v, bits in values.items()}
+        return counts
@@ -1,49 +1,59 @@
 import pandas as pd
-import json
-import re
-
-df = pd.read_csv('Productslist.csv')
-df = df[df['Product Active'] == True]
-
-# Extract base product name (remove size/color info)
-def get_base_name(name):
-    if pd.isna(name):
-        return ''
-    # Remove common size variants
-    name = str(name)
-    name = re.sub(r'\b(King|Queen|Single|Double)\b', '', name, flags=re.IGNORECASE)
-    # Remove color/finish variants
-    name = re.sub(r'\b(Wenge|Brown Maple|Beige|White|Natural|Oak|Walnut)\b', '', name, flags=re.IGNORECASE)
-    # Remove & and extra spaces
-    name = re.sub(r'\s*&\s*', ' ', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name
-
-df['base_name'] = df['Product Name'].apply(get_base_name)
-
-# Group by base name
+
+from crm_reader import iter_chunks, read_products
+from product_families import cluster_families, family_ids
+
+COLUMNS = ['Record Id', 'Product Code', 'Product Name', 'Unit Price']
+
+# Active rows, only the columns used for grouping (see crm_reader)
+df = read_products(columns=COLUMNS)
+
+# Cluster variants (color/size/count) into product families, blocked by the
+# Product Code prefix (product type); see product_families
+types = df['Product Code'].fillna('').str.split('-').str[0]
+df['family_id'] = family_ids(cluster_families(df['Product Name'], blocks=types), df['Product Code'])
+
+# Group by family
 print("=== PRODUCT ANALYSIS ===")
 print(f"Total active products: {len(df)}")
 print(f"Unique product codes: {df['Product Code'].nunique()}")
 print(f"Unique full names: {df['Product Name'].nunique()}")
-print(f"Unique base products: {df['base_name'].nunique()}")
+print(f"Product families: {df['family_id'].nunique()}")
 
 # Show product families
 print("\n=== TOP 10 PRODUCT FAMILIES ===")
-family_counts = df.groupby('base_name').size().sort_values(ascending=False).head(10)
-for name, count in family_counts.items():
-    print(f"{name}: {count} variants")
+family_counts = df.groupby('family_id').size().sort_values(ascending=False).head(10)
+first_names = df.drop_duplicates('family_id').set_index('family_id')['Product Name']
+for family, count in family_counts.items():
+    print(f"{family} {first_names[family]}: {count} variants")
 
 # Show what "Maltein" products we have
 print("\n=== MALTEIN PRODUCTS (Example) ===")
 maltein = df[df['Product Name'].str.contains('Maltein', case=False, na=False)]
 print(maltein[['Product Code', 'Product Name', 'Unit Price']].to_string())
 
-# Create true unique list - one product per base name, picking the most common variant
-unique_products = df.sort_values('Unit Price').groupby('base_name', as_index=False).first()
+# One representative per family: the cheapest variant with a real price.
+# Zero, negative and missing prices are placeholders, so a family with no
+# priced variant falls back to its lowest Product Code
+price = df['Unit Price'].where(df['Unit Price'] > 0)
+df = df.assign(_price=price).sort_values(['_price', 'Product Code'], kind='stable', na_position='last') \
+    .drop(columns='_price')
+df['family_size'] = df.groupby('family_id')['family_id'].transform('size')
+df['representative'] = ~df.duplicated('family_id')
+unique_products = df[df['representative']].drop(columns='representative')
+
+# Full export rows of the representatives, streamed so the other rows' 46
+# columns are never all held
+reps = unique_products['Record Id']
+full = pd.concat([chunk[chunk['Record Id'].isin(reps)] for chunk in iter_chunks()])
+unique_products = full.set_index('Record Id', drop=False).loc[reps] \
+    .assign(family_id=unique_products['family_id'].values,
+            family_size=unique_products['family_size'].values)
 print(f"\n=== TRUE UNIQUE PRODUCTS ===")
 print(f"Count: {len(unique_products)}")
 
-# Save
+# Save: family representatives, and the family of every product
 unique_products.to_csv('unique_products_deduplicated.csv', index=False)
-print(f"Saved to unique_products_deduplicated.csv")
+df.sort_index()[['Product Code', 'Product Name', 'Unit Price', 'family_id', 'representative']] \
+    .to_csv('product_families.csv', index=False)
+print(f"Saved to unique_products_deduplicated.csv and product_families.csv")
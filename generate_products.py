@@ -1,57 +1,87 @@
 import pandas as pd
-import json
+import multiprocessing
 import os
-import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-base_path = "C:/Users/shubh/Downloads/ecommerce-app/allproductdata"
-images_base = "C:/Users/shubh/Downloads/ecommerce-app/public/products"
-output_path = "C:/Users/shubh/Downloads/ecommerce-app/src/data"
+import image_manifest
+import image_similarity
+from catalog_db import load_catalog, print_stats, product_slugs
+from catalog_paths import APP_ROOT, CRM_EXPORT_PATH
+from catalog_sitemap import write_sitemap
+from catalog_transform import (BRAND, PLACEHOLDER_IMAGE, PSEUDO_SEED, build_dimensions,
+                               family_records, prepare_skus, product_record, sku_rows)
+from catalog_watch import watch
+from catalog_writer import CatalogWriter
+from excel_cache import file_hash, read_snapshot
+from facet_index import FACETS
+from image_derivatives import build_derivatives
+from image_lookup import build_folder_lookup, match_folder_images
+from incremental_build import IncrementalBuild, code_version, fingerprint
+from pipeline_metrics import Metrics, options_from_argv
+from search_index import SEARCH_FIELDS
 
-print("Building image index...")
-image_index = {}  # key -> list of image paths
-folder_index = {} # folder_name -> list of image paths
+base_path = f"{APP_ROOT}/allproductdata"
+images_base = f"{APP_ROOT}/public/products"
+output_path = f"{APP_ROOT}/src/data"
+public_path = f"{APP_ROOT}/public"
+derived_path = f"{public_path}/derived"
+shards_path = f"{public_path}/catalog"
+database_path = f"{APP_ROOT}/backend/mulary.db"
+sku_master_file = f"{base_path}/SKU Aliases, Parent & Child Master Data (1).xlsx"
+dimensions_file = f"{base_path}/Dimensions Master.xlsx"
+build_cache = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "catalog")
+SOURCE_THREADS = 5  # image walk, derivatives, perceptual hashes, the two masters
+# Modules whose code shapes the cached stage results; editing one reruns the stages
+PIPELINE_MODULES = (__name__, "catalog_transform", "catalog_writer", "catalog_binary", "catalog_diff",
+                    "catalog_sitemap", "search_index", "facet_index", "image_lookup", "image_manifest",
+                    "image_derivatives", "image_similarity", "excel_cache")
 
-# Walk through all product images
-for root, dirs, files in os.walk(images_base):
-    folder_name = os.path.basename(root).lower()
+def build_image_index(manifest, images_root=images_base):
+    """Index the image manifest by filename/SKU key and by folder name."""
+    image_index = {}  # key -> list of image paths
+    folder_index = {} # folder_name -> list of image paths
+
+    # Walk through all product images (cached listing, see image_manifest)
+    for root, files in image_manifest.walk(images_root, manifest=manifest):
+        folder_name = os.path.basename(root).lower()
     
-    for f in files:
-        if not f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-            continue
-            
-        rel_path = os.path.relpath(os.path.join(root, f), "C:/Users/shubh/Downloads/ecommerce-app/public")
-        img_url = "/" + rel_path.replace("\\", "/")
+        for f in files:
+            rel_path = os.path.relpath(os.path.join(root, f), public_path)
+            img_url = "/" + rel_path.replace("\\", "/")
         
-        # Index by folder
-        if folder_name not in folder_index:
-            folder_index[folder_name] = []
-        folder_index[folder_name].append(img_url)
+            # Index by folder
+            if folder_name not in folder_index:
+                folder_index[folder_name] = []
+            folder_index[folder_name].append(img_url)
         
-        # Index by filename (without extension)
-        fname = os.path.splitext(f)[0].upper()
-        if fname not in image_index:
-            image_index[fname] = []
-        image_index[fname].append(img_url)
+            # Index by filename (without extension)
+            fname = os.path.splitext(f)[0].upper()
+            if fname not in image_index:
+                image_index[fname] = []
+            image_index[fname].append(img_url)
         
-        # Index by SKU parts (e.g. SR-CLE from SR-CLE-W.jpg)
-        parts = fname.split('-')
-        if len(parts) >= 2:
-            # Index SR-CLE
-            key = "-".join(parts[:2])
-            if key not in image_index:
-                image_index[key] = []
-            if img_url not in image_index[key]:
-                image_index[key].append(img_url)
-            
-            # Index SR-CLE-W
-            if len(parts) >= 3:
-                key = "-".join(parts[:3])
+            # Index by SKU parts (e.g. SR-CLE from SR-CLE-W.jpg)
+            parts = fname.split('-')
+            if len(parts) >= 2:
+                # Index SR-CLE
+                # (a url can only already be listed under its own full filename)
+                key = "-".join(parts[:2])
                 if key not in image_index:
                     image_index[key] = []
-                if img_url not in image_index[key]:
+                if key != fname:
                     image_index[key].append(img_url)
+            
+                # Index SR-CLE-W
+                if len(parts) >= 3:
+                    key = "-".join(parts[:3])
+                    if key not in image_index:
+                        image_index[key] = []
+                    if key != fname:
+                        image_index[key].append(img_url)
 
-print(f"Indexed {len(image_index)} keys and {len(folder_index)} folders")
+    return {"keys": image_index, "folders": folder_index,
+            "folder_lookup": build_folder_lookup(folder_index)}
 
 # Category mapping
 CATEGORY_MAP = {
@@ -75,224 +105,318 @@ CATEGORY_MAP = {
     "MT-": {"id": "decor", "name": "Home Temples", "type": "home-temple"},
 }
 
-def get_category(sku):
-    for prefix, info in CATEGORY_MAP.items():
-        if sku.startswith(prefix):
-            return info
-    return {"id": "living-room", "name": "Furniture", "type": "furniture"}
+# What a build reads and where its state goes. Other brands are dicts with the
+# same keys (see build_brands.py); their image trees must be under public/.
+BLUEWUD = {
+    "name": BRAND,
+    "key": "bluewud",                 # output names: bluewudProducts, bluewudFamilies
+    "sku_master": sku_master_file,
+    "dimensions": dimensions_file,
+    "images": images_base,
+    "category_map": CATEGORY_MAP,
+    "reports": base_path,             # missing_images_report.csv
+    "cache": build_cache,             # incremental build state
+    "image_cache": os.path.dirname(build_cache),  # image hash caches
+    "metrics": "generate_products",
+}
 
-def slugify(text):
-    if pd.isna(text): return ""
-    text = str(text).lower().strip()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text)
-    return text
+# Columns read from the master workbooks (cached as typed snapshots, see excel_cache)
+SKU_MASTER_DTYPES = {
+    "SKU Code": "string",
+    "MTP SKU": "string",
+    "MTP Name": "string",
+    " Child Color": "string",
+    "SKU Product Name": "string",
+    "MRP": "float64",
+}
+DIMENSIONS_DTYPES = {
+    "MTP SKU Code": "string",
+    "Lcm": "float64",
+    "Bcm": "float64",
+    "Hcm": "float64",
+    "PW(gm)": "float64",
+}
 
-def find_images(sku, mtp_sku, product_name, color):
+# Fields of a family record the --families search index and filters are built from
+FAMILY_SEARCH_FIELDS = ("name", "tags", "category", "colors", "parentSku")
+FAMILY_FACETS = dict(FACETS, color=("colors", None), price=("priceRange.min", FACETS["price"][1]))
+
+def find_images(index, sku, mtp_sku, product_name, color, matcher=None, metrics=None):
     """
     Find images based on user logic:
     1. Child SKU (with color suffix) -> Display Image
     2. Parent SKU (without color suffix) -> Gallery Images
-    3. Folder/Color matching
+    3. Images that look like the parent's known images (see image_similarity)
+    4. Folder/Color matching
+    metrics counts which strategies matched under "find_images".
     """
-    images = []
+    images = filename_images(index, sku, mtp_sku, metrics)
+
+    # Try Perceptual-Hash Match against the parent SKU's known images
+    if not images and matcher is not None and mtp_sku and pd.notna(mtp_sku):
+        color_lower = str(color).lower() if pd.notna(color) else ""
+        images = dict.fromkeys(matcher.match(mtp_sku.upper(), color_lower))
+        if images and metrics:
+            metrics.count("find_images", "similarity")
+
+    # Try Folder Match by Product Name + Color (trigram index, see image_lookup)
+    if not images and product_name and pd.notna(product_name):
+        name_lower = str(product_name).lower()
+        color_lower = str(color).lower() if pd.notna(color) else ""
+        images = match_folder_images(index["folder_lookup"], name_lower, color_lower)
+        if metrics:
+            metrics.count("find_images", "folder" if images else "none")
+        return images
+
+    if not images and metrics:
+        metrics.count("find_images", "none")
+    return list(images)[:8]
+
+def filename_images(index, sku, mtp_sku, metrics=None):
+    """Images named after the SKU, its MTP SKU or its parent guess (ordered set)."""
+    image_index = index["keys"]
+    images = {}  # insertion-ordered set of urls
     sku = sku.upper()
     mtp_sku = mtp_sku.upper() if mtp_sku and pd.notna(mtp_sku) else ""
     
     # 1. Try Exact Child SKU Match (e.g. SR-CLE-MF)
     if sku in image_index:
-        images.extend(image_index[sku])
+        images.update(dict.fromkeys(image_index[sku]))
+        if metrics:
+            metrics.count("find_images", "exact_sku")
     
     # 2. Try Parent SKU Match (e.g. SR-CLE)
     if mtp_sku and mtp_sku in image_index:
-        for img in image_index[mtp_sku]:
-            if img not in images:
-                images.append(img)
+        images.update(dict.fromkeys(image_index[mtp_sku]))
+        if metrics:
+            metrics.count("find_images", "mtp_sku")
                 
     # 3. Try SKU without last part (e.g. SR-CLE from SR-CLE-MF)
     parts = sku.split('-')
     if len(parts) >= 2:
         parent_guess = "-".join(parts[:-1])
         if parent_guess in image_index:
-            for img in image_index[parent_guess]:
-                if img not in images:
-                    images.append(img)
-                    
-    # 4. Try Folder Match by Product Name + Color
-    if not images and product_name and pd.notna(product_name):
-        name_lower = str(product_name).lower()
-        color_lower = str(color).lower() if pd.notna(color) else ""
-        
-        # Find folders that contain parts of the product name
-        name_parts = name_lower.split()
-        potential_folders = []
-        
-        for folder in folder_index:
-            # Check if folder matches product name (e.g. "Carlem" in "Carlem Shoe Rack")
-            matches = 0
-            for part in name_parts:
-                if len(part) > 3 and part in folder:
-                    matches += 1
-            if matches > 0:
-                potential_folders.append((folder, matches))
-        
-        # Sort by best match
-        potential_folders.sort(key=lambda x: x[1], reverse=True)
-        
-        for folder, _ in potential_folders:
-            folder_imgs = folder_index[folder]
-            
-            # If color is specified, look for color in filename
-            if color_lower:
-                color_matches = []
-                for img in folder_imgs:
-                    if color_lower in img.lower() or color_lower.replace(" ", "") in img.lower():
-                        color_matches.append(img)
-                
-                if color_matches:
-                    for img in color_matches:
-                        if img not in images:
-                            images.append(img)
-                    continue # Found color matches in this folder, move to next
-            
-            # Add other images from folder
-            for img in folder_imgs[:5]:
-                if img not in images:
-                    images.append(img)
-    
-    return images[:8]
+            images.update(dict.fromkeys(image_index[parent_guess]))
+            if metrics:
+                metrics.count("find_images", "parent_guess")
 
-def get_description(name, ptype, color, dims):
-    dim_text = ""
-    if dims and dims.get('length') and dims.get('width') and dims.get('height'):
-        dim_text = f"\n\n**Dimensions:** {dims['length']}cm (L) × {dims['width']}cm (W) × {dims['height']}cm (H)"
-    
-    return f"Premium Bluewud {name} in {color}. Crafted with high-quality engineered wood.{dim_text}"
-
-# Read data
-print("Reading data...")
-sku_df = pd.read_excel(f"{base_path}/SKU Aliases, Parent & Child Master Data (1).xlsx", header=0)
-dim_df = pd.read_excel(f"{base_path}/Dimensions Master.xlsx", header=2)
-
-dimensions_lookup = {}
-for _, row in dim_df.iterrows():
-    mtp = row.get('MTP SKU Code', '')
-    if pd.notna(mtp):
-        l, w, h = row.get('Lcm', 0), row.get('Bcm', 0), row.get('Hcm', 0)
-        wt = row.get('PW(gm)', 0)
-        dimensions_lookup[mtp] = {
-            'length': int(l) if pd.notna(l) and l > 0 else None,
-            'width': int(w) if pd.notna(w) and w > 0 else None,
-            'height': int(h) if pd.notna(h) and h > 0 else None,
-            'weight': round(wt / 1000, 2) if pd.notna(wt) and wt > 0 else None,
-        }
-
-products = []
-product_id = 1
-with_images = 0
-
-for _, row in sku_df.iterrows():
-    sku = row.get('SKU Code', '')
-    if pd.isna(sku) or not sku:
-        continue
-    
-    mtp_sku = row.get('MTP SKU', '')
-    mtp_name = row.get('MTP Name', '')
-    color = row.get(' Child Color', '')
-    name = row.get('SKU Product Name', '')
-    mrp = row.get('MRP', 0)
-    
-    if pd.isna(name) or not name:
-        continue
-    
-    cat = get_category(sku)
-    dims = dimensions_lookup.get(mtp_sku, {}) if pd.notna(mtp_sku) else {}
-    dimensions = {'length': dims.get('length'), 'width': dims.get('width'), 'height': dims.get('height')}
-    weight = dims.get('weight')
-    
-    images = find_images(sku, mtp_sku, mtp_name, color)
-    if images:
-        with_images += 1
-    
-    price = int(mrp) if pd.notna(mrp) and mrp > 0 else 4999
-    original_price = int(price * 1.25)
-    
-    product = {
-        "_id": f"prod-{product_id}",
-        "name": f"Bluewud {name}" if "Bluewud" not in str(name) else str(name),
-        "slug": slugify(name),
-        "description": get_description(name, cat['type'], color if pd.notna(color) else 'Natural', dimensions),
-        "categoryId": cat['id'],
-        "category": cat['name'],
-        "brand": "Bluewud",
-        "sku": sku,
-        "parentSku": mtp_sku if pd.notna(mtp_sku) else None,
-        "price": price,
-        "originalPrice": original_price,
-        "discountPercentage": 20,
-        "color": color if pd.notna(color) else "Natural Wood",
-        "colors": [color] if pd.notna(color) else ["Natural Wood"],
-        "sizes": ["Standard"],
-        "thumbnail": images[0] if images else "/images/placeholder-furniture.jpg",
-        "images": images if images else ["/images/placeholder-furniture.jpg"],
-        "dimensions": dimensions if any(dimensions.values()) else None,
-        "weight": weight,
-        "rating": round(4.0 + (hash(sku) % 10) / 10, 1),
-        "reviewCount": 10 + (hash(sku) % 190),
-        "stock": 20 + (hash(sku) % 80),
-        "isActive": True,
-        "isFeatured": product_id <= 16,
-        "isNew": product_id % 5 == 0,
-        "tags": [cat['name'], "Bluewud", "Engineered Wood"],
-        "material": "Engineered Wood",
-        "finish": "Laminate",
-        "specifications": {
-            "material": "Engineered Wood",
-            "finish": "Laminate",
-            "style": "Modern",
-            "color": color if pd.notna(color) else "Natural Wood",
-            "dimensions": dimensions if any(v for v in dimensions.values() if v) else None,
-            "weight": f"{weight} kg" if weight else None,
-            "careInstructions": ["Wipe with dry cloth", "Avoid direct sunlight"],
-            "countryOfOrigin": "India",
-            "warranty": "1 Year Manufacturer Warranty",
-        },
-        "createdAt": "2024-01-15T00:00:00Z",
-        "updatedAt": "2024-12-01T00:00:00Z"
-    }
-    
-    products.append(product)
-    product_id += 1
+    return images
+
+def build_matcher(index, rows, hashes):
+    """
+    SimilarityMatcher seeded with each parent SKU's filename matches, or None
+    without Pillow. hashes: image_similarity.image_hashes() of the indexed urls.
+    """
+    if hashes is None:
+        return None
+    known, claimed = {}, set()
+    for r in rows:
+        found = filename_images(index, r["sku"], r["mtp_sku"])
+        if found and r["mtp_sku"] and pd.notna(r["mtp_sku"]):
+            known.setdefault(r["mtp_sku"].upper(), {}).update(found)
+        claimed.update(found)
+    return image_similarity.SimilarityMatcher(hashes, {k: list(v) for k, v in known.items()}, claimed)
 
 # Sort products: Products with images first, then those with placeholders
 def product_sort_key(p):
-    has_image = p['images'] and p['images'][0] != "/images/placeholder-furniture.jpg"
+    has_image = p['images'] and p['images'][0] != PLACEHOLDER_IMAGE
     return (not has_image, p['_id']) # False < True, so images come first
 
-products.sort(key=product_sort_key)
-
-print(f"\n=== RESULTS ===")
-print(f"Total products: {len(products)}")
-print(f"Products with images: {with_images} ({with_images*100//len(products)}%)")
-
-# Export missing images report
-missing_products = []
-for p in products:
-    if not p['images'] or p['images'][0] == "/images/placeholder-furniture.jpg":
-        missing_products.append({
-            "Product Name": p['name'],
-            "SKU": p['sku'],
-            "Parent SKU": p['parentSku'],
-            "Color": p['color'],
-            "Category": p['category']
-        })
-
-if missing_products:
-    missing_df = pd.DataFrame(missing_products)
-    missing_df.to_csv(f"{base_path}/missing_images_report.csv", index=False)
-    print(f"Exported {len(missing_products)} missing products to missing_images_report.csv")
-
-with open(f"{output_path}/bluewudProducts.json", 'w', encoding='utf-8') as f:
-    json.dump(products, f, indent=2, ensure_ascii=False)
-
-print(f"Saved to bluewudProducts.json")
+def output_file(families, brand=BLUEWUD):
+    # --families: one record per MTP SKU with its child SKUs as variants
+    return f"{output_path}/{brand['key']}{'Families' if families else 'Products'}.json"
+
+def write_outputs(products, families=False, brand=BLUEWUD, workers=None):
+    # Export missing images report
+    missing_products = []
+    for p in products:
+        if not p['images'] or p['images'][0] == PLACEHOLDER_IMAGE:
+            missing_products.append({
+                "Product Name": p['name'],
+                "SKU": p['sku'],
+                "Parent SKU": p['parentSku'],
+                "Color": p['color'],
+                "Category": p['category']
+            })
+
+    if missing_products:
+        missing_df = pd.DataFrame(missing_products)
+        report_path = f"{brand['reports']}/missing_images_report.csv"
+        missing_df.to_csv(report_path + ".tmp", index=False)
+        os.replace(report_path + ".tmp", report_path)
+        print(f"Exported {len(missing_products)} missing products to missing_images_report.csv")
+
+    records = products
+    if families:
+        records = family_records(products)
+        print(f"Grouped {len(products)} products into {len(records)} families")
+
+    name = os.path.splitext(os.path.basename(output_file(families, brand)))[0]
+    # Minified JSON, NDJSON, indexed .bcat, category/page shards, patches against
+    # the previous build, search index and facet bitmaps, pre-compressed (see catalog_writer)
+    keys = ("parentSku", "slug") if families else ("sku", "slug")
+    writer = CatalogWriter(output_path, name, f"{shards_path}/{name}", "categoryId", keys,
+                           search_fields=FAMILY_SEARCH_FIELDS if families else SEARCH_FIELDS,
+                           facets=FAMILY_FACETS if families else FACETS, workers=workers)
+    for record in records:
+        writer.write(record)
+    manifest = writer.close()
+
+    print(f"Saved to {name}.json ({len(manifest['pages'])} pages, "
+          f"{len(manifest['categories'])} category shards)")
+
+def main(brand=BLUEWUD, families=None, workers=None, database=True, sitemap=True):
+    """
+    Build one brand's catalog outputs; returns a summary of the build.
+    families defaults to --families on the command line; workers caps the
+    image process pools and compression threads (all cores by default).
+    sitemap writes public/sitemap.xml and its shards after the database load
+    (see catalog_sitemap); build_brands writes it from the merged catalog instead.
+    """
+    if families is None:
+        families = "--families" in sys.argv
+
+    # Wall/CPU time and memory per stage and find_images counters, written to
+    # .cache/metrics (--trace-memory, --profile, --sample: see pipeline_metrics)
+    metrics = Metrics(brand["metrics"], **options_from_argv(sys.argv))
+
+    # Each stage is skipped when its inputs match the last run (see incremental_build)
+    build = IncrementalBuild(brand["cache"], code_version(*PIPELINE_MODULES))
+    category_map = brand["category_map"]
+
+    # The sources load side by side and each stage starts as soon as its own
+    # inputs are in: the image tree is walked on a thread, then derivatives and
+    # perceptual hashes run in their process pools; the masters are read on
+    # their own threads, and only parsed if a stage needs them.
+    print("Loading images and masters...")
+    with ThreadPoolExecutor(max_workers=SOURCE_THREADS) as threads, \
+            ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as excel:
+
+        def walk_images():
+            with metrics.stage("image_walk"):
+                manifest = image_manifest.load_manifest(brand["images"])
+                index = build.stage("image_index", [image_manifest.listing(manifest)],
+                                    lambda: build_image_index(manifest, brand["images"]))
+            print(f"Indexed {len(index['keys'])} keys and {len(index['folders'])} folders")
+            return index, [url for folder in index["folders"].values() for url in folder]
+
+        # Thumbnail/card/zoom WebP and JPEG versions of every image, encoded across
+        # processes and only for image content not seen before (see image_derivatives)
+        def encode_derivatives():
+            _, urls = index_f.result()
+            with metrics.stage("image_derivatives"):
+                return build_derivatives(urls, public_path, derived_path, workers=workers,
+                                         hash_cache=os.path.join(brand["image_cache"], "image_hashes.json"))
+
+        # SKUs without a filename match look for images like their parent's
+        def hash_images():
+            _, urls = index_f.result()
+            if image_similarity.Image is None:
+                return None
+            with metrics.stage("image_hashes"):
+                return image_similarity.image_hashes(urls, public_path, workers,
+                                                     os.path.join(brand["image_cache"], "image_phash.json"))
+
+        index_f = threads.submit(walk_images)
+        derivatives_f, hashes_f = threads.submit(encode_derivatives), threads.submit(hash_images)
+
+        sku_hash, dim_hash = file_hash(brand["sku_master"]), file_hash(brand["dimensions"])
+        dim_inputs = [dim_hash, DIMENSIONS_DTYPES]
+        sku_inputs = [sku_hash, dim_hash, SKU_MASTER_DTYPES, category_map, brand["name"]]
+        # openpyxl holds the GIL, so two parses only overlap in worker processes;
+        # starting one (spawned: threads are running) only pays off for both
+        both = build.pending("dimensions", dim_inputs) and build.pending("sku_rows", sku_inputs)
+
+        def parse(path, dtypes, header):
+            if both:
+                return excel.submit(read_snapshot, path, dtypes, header=header).result()
+            return read_snapshot(path, dtypes, header=header)
+
+        def read_dimensions():
+            with metrics.stage("dimensions"):
+                return build.stage("dimensions", dim_inputs, lambda: build_dimensions(
+                    parse(brand["dimensions"], DIMENSIONS_DTYPES, 2)))
+
+        def read_sku_master():
+            with metrics.stage("sku_master"):
+                if build.pending("sku_rows", sku_inputs):
+                    return parse(brand["sku_master"], SKU_MASTER_DTYPES, 0)
+
+        sku_f, dims_f = threads.submit(read_sku_master), threads.submit(read_dimensions)
+
+        # Dimensions join, categories, slugs and prices as whole-frame ops (see catalog_transform)
+        frame, dims = sku_f.result(), dims_f.result()
+        with metrics.stage("sku_rows"):
+            rows = build.stage("sku_rows", sku_inputs, lambda: sku_rows(
+                prepare_skus(frame, dims, category_map, brand["name"])))
+
+        index, _ = index_f.result()
+        hashes = hashes_f.result()
+        with metrics.stage("image_matcher"):
+            matcher = build_matcher(index, rows, hashes)
+
+        # Each SKU's images while the derivatives may still be encoding
+        with metrics.stage("find_images"):
+            found = [find_images(index, r["sku"], r["mtp_sku"], r["mtp_name"], r["color_raw"], matcher,
+                                 metrics) for r in rows]
+        derivatives = derivatives_f.result()
+
+    # Per-SKU assembly: a product is rebuilt only if its row or its images changed
+    with metrics.stage("assembly"):
+        items = []
+        for r, images in zip(rows, found):
+            derived = {img: derivatives[img] for img in images if img in derivatives}
+            items.append((fingerprint(r, images, derived, PSEUDO_SEED), (r, images, derived)))
+        products = build.records("products", items, lambda item: product_record(*item))
+    with_images = sum(1 for p in products if p['images'][0] != PLACEHOLDER_IMAGE)
+
+    with metrics.stage("sort"):
+        products = build.stage("sort", [[fp for fp, _ in items]],
+                               lambda: sorted(products, key=product_sort_key))
+
+    print(f"\n=== RESULTS ===")
+    print(f"Total products: {len(products)}")
+    print(f"Products with images: {with_images} ({with_images*100//max(len(products), 1)}%)")
+
+    out = output_file(families, brand)
+    with metrics.stage("write"):
+        build.stage("output", [build.current["sort"], families],
+                    lambda: write_outputs(products, families, brand, workers),
+                    persist=False, outputs=[out])
+    if "output" in build.report["reused"]:
+        print(f"{os.path.basename(out)} is up to date")
+
+    # Diff-based bulk upsert into the backend database (see catalog_db)
+    if database and not families and os.path.exists(database_path):
+        with metrics.stage("database"):
+            stats = load_catalog(database_path, products)
+        print_stats(stats)
+        metrics.set("database", stats)
+
+    # Sitemap index and shards with the slugs the backend serves (see catalog_sitemap);
+    # lastmod comes from the CRM export, so it is an input too
+    if sitemap and not families:
+        slugs = product_slugs(database_path) if database and os.path.exists(database_path) else None
+        crm = file_hash(CRM_EXPORT_PATH) if os.path.exists(CRM_EXPORT_PATH) else None
+        with metrics.stage("sitemap"):
+            build.stage("sitemap", [build.current["sort"], slugs, crm],
+                        lambda: write_sitemap(products, public_path, slugs),
+                        persist=False, outputs=[f"{public_path}/sitemap.xml"])
+
+    build.save()
+    print(f"\n=== BUILD ===")
+    build.print_report()
+
+    metrics.set("products", len(products))
+    metrics.set("with_images", with_images)
+    metrics.set("build", build.report)
+    print(f"\n=== METRICS ===")
+    metrics.finish()
+    return {"brand": brand["name"], "output": out, "products": len(products), "with_images": with_images}
+
+if __name__ == "__main__":
+    if "--watch" in sys.argv:
+        # Rebuild whenever images or workbooks change (see catalog_watch)
+        watch(main, images_base, [sku_master_file, dimensions_file])
+    else:
+        main()
@@ -0,0 +1,168 @@
+"""
+Resized WebP/JPEG derivatives of the product images.
+
+Every image in the manifest gets a thumbnail, card and zoom width in both
+formats, written under public/derived/ and named by the sha1 of the source
+file, so an image is encoded once no matter how often it is renamed, copied
+between folders or re-scanned:
+
+    derived/ab/ab12...ef-480.webp
+    derived/ab/ab12...ef.json      source size and the widths written
+
+Source hashes are cached by path, size and mtime, so an unchanged tree is
+neither re-read nor re-encoded; new or edited images are hashed and encoded
+across a process pool (files that fail to decode are skipped until they
+change). Without Pillow the stage is skipped and products keep their
+full-size images.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+WIDTHS = {"thumbnail": 240, "card": 480, "zoom": 1200}
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+HASH_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "image_hashes.json")
+
+
+def source_digest(path):
+    """sha1 of the image file."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def derivative_path(digest, width, fmt):
+    return f"{digest[:2]}/{digest}-{width}.{EXTENSIONS[fmt]}"
+
+
+def _render(src, digest, out_dir):
+    """Hash src if needed and write its missing derivatives. Runs in a worker."""
+    digest = digest or source_digest(src)
+    meta_path = os.path.join(out_dir, digest[:2], f"{digest}.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return src, digest, json.load(f)
+
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    with Image.open(src) as im:
+        im.load()
+        width, height = im.size
+        # never upscale: a small source is capped at its own width
+        widths = sorted({min(w, width) for w in WIDTHS.values()})
+        for fmt, options in FORMATS.items():
+            base = im
+            if fmt == "jpeg" and im.mode != "RGB":
+                base = Image.new("RGB", im.size, (255, 255, 255))
+                base.paste(im, mask=im.convert("RGBA").getchannel("A"))
+            elif fmt == "webp" and im.mode not in ("RGB", "RGBA"):
+                base = im.convert("RGBA")
+            for w in widths:
+                out = os.path.join(out_dir, derivative_path(digest, w, fmt))
+                resized = base.resize((w, max(1, round(height * w / width))), Image.LANCZOS) \
+                    if w != width else base
+                # per-process temp name: two builds may encode the same content at once
+                tmp = f"{out}.{os.getpid()}.tmp"
+                resized.save(tmp, **options)
+                os.replace(tmp, out)
+
+    meta = {"width": width, "height": height, "widths": widths}
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+    return src, digest, meta
+
+
+def _load_hashes(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_hashes(hashes, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def derivative_set(meta, digest, url_prefix):
+    """The record entry for one image: URL per size and srcset per format."""
+    entry = {"width": meta["width"], "height": meta["height"], "srcset": {}}
+    for fmt in FORMATS:
+        urls = {w: f"{url_prefix}/{derivative_path(digest, w, fmt)}" for w in meta["widths"]}
+        entry[fmt] = {name: urls[min(w, meta["width"])] for name, w in WIDTHS.items()}
+        entry["srcset"][fmt] = ", ".join(f"{url} {w}w" for w, url in urls.items())
+    return entry
+
+
+def build_derivatives(urls, public_path, out_dir, url_prefix="/derived", workers=None,
+                      hash_cache=HASH_CACHE):
+    """
+    {image url: derivative_set(...)} for every url (a path under public_path),
+    encoding only images whose content has no derivatives in out_dir yet.
+    hash_cache only keeps the urls of this call, so each image tree needs its own.
+    """
+    if Image is None:
+        print("Pillow is not installed; skipping image derivatives")
+        return {}
+
+    hashes = _load_hashes(hash_cache)
+    sources, jobs, results = {}, [], {}
+    for url in dict.fromkeys(urls):
+        src = os.path.join(public_path, url.lstrip("/"))
+        try:
+            st = os.stat(src)
+        except OSError:
+            continue
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = hashes.get(src)
+        sources[src] = (url, stamp)
+        if cached == stamp + [None]:
+            continue  # failed to decode last time and not changed since
+        digest = cached[2] if cached and cached[:2] == stamp else None
+        meta_path = digest and os.path.join(out_dir, digest[:2], f"{digest}.json")
+        if meta_path and os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                results[url] = derivative_set(json.load(f), digest, url_prefix)
+        else:
+            jobs.append((src, digest))
+
+    failed = 0
+    if jobs:
+        # spawned, not forked: the caller may have other threads running, and a
+        # forked child can deadlock on a lock one of them held
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_render, src, digest, out_dir) for src, digest in jobs]
+            for (src, _), future in zip(jobs, futures):
+                url, stamp = sources[src]
+                try:
+                    src, digest, meta = future.result()
+                except (OSError, ValueError, SyntaxError):
+                    # unreadable or truncated image: the product keeps the original
+                    hashes[src] = stamp + [None]
+                    failed += 1
+                    continue
+                hashes[src] = stamp + [digest]
+                results[url] = derivative_set(meta, digest, url_prefix)
+
+    live = {src: hashes[src] for src in sources if src in hashes}
+    if jobs or len(live) != len(hashes):
+        _save_hashes(live, hash_cache)
+    print(f"Image derivatives: {len(jobs) - failed} encoded or rehashed, "
+          f"{len(results) - len(jobs) + failed} cached, {failed} failed")
+    return results
@@ -0,0 +1,96 @@
+"""
+Folder-name lookup for the image fallback in generate_products.find_images.
+
+The old fallback tested every product-name part against every folder name.
+Here folder names are indexed by character trigrams, so a part only has to be
+checked against the folders that share all of its trigrams.
+"""
+
+
+def build_folder_lookup(folder_index):
+    """Index the folder names of folder_index ({folder_name: [img_url, ...]})."""
+    folders = list(folder_index)
+    grams = {}
+    for fid, folder in enumerate(folders):
+        for gram in {folder[i:i + 3] for i in range(len(folder) - 2)}:
+            grams.setdefault(gram, set()).add(fid)
+
+    return {
+        "folders": folders,
+        "grams": grams,
+        # Lower-cased urls per folder for the color test, computed once
+        "images": [[(img, img.lower()) for img in folder_index[f]] for f in folders],
+        "parts": {},  # part -> frozenset of folder ids, memoized across SKUs
+        "ranks": {},  # product name -> ranked folder ids (variants share names)
+    }
+
+
+def folders_containing(lookup, part):
+    """Ids of the folders whose name contains `part` (len(part) >= 3)."""
+    cache = lookup["parts"]
+    if part in cache:
+        return cache[part]
+
+    grams = lookup["grams"]
+    postings = []
+    for i in range(len(part) - 2):
+        posting = grams.get(part[i:i + 3])
+        if not posting:
+            cache[part] = frozenset()
+            return cache[part]
+        postings.append(posting)
+
+    # Intersect smallest first, then confirm with a real substring test
+    postings.sort(key=len)
+    candidates = set(postings[0]).intersection(*postings[1:])
+    folders = lookup["folders"]
+    cache[part] = frozenset(fid for fid in candidates if part in folders[fid])
+    return cache[part]
+
+
+def rank_folders(lookup, name_lower):
+    """
+    Folder ids matching a product name, best first.
+
+    A folder scores one point for every name part longer than 3 characters
+    it contains. Ties keep folder_index order, like the old stable sort.
+    """
+    ranks = lookup["ranks"]
+    if name_lower in ranks:
+        return ranks[name_lower]
+
+    counts = {}
+    for part in name_lower.split():
+        if len(part) > 3:
+            for fid in folders_containing(lookup, part):
+                counts[fid] = counts.get(fid, 0) + 1
+
+    ranks[name_lower] = sorted(counts, key=lambda fid: (-counts[fid], fid))
+    return ranks[name_lower]
+
+
+def match_folder_images(lookup, name_lower, color_lower, limit=8):
+    """
+    Images for a product name/color from the best-matching folders.
+
+    Per folder: images whose url contains the color if any do, otherwise the
+    first 5 images. Results are accumulated in order without duplicates.
+    """
+    images = {}  # insertion-ordered set
+    color_compact = color_lower.replace(" ", "")
+
+    for fid in rank_folders(lookup, name_lower):
+        if len(images) >= limit:
+            break
+        folder_imgs = lookup["images"][fid]
+
+        if color_lower:
+            color_matches = [img for img, low in folder_imgs
+                             if color_lower in low or color_compact in low]
+            if color_matches:
+                images.update(dict.fromkeys(color_matches))
+                continue
+
+        images.update(dict.fromkeys(img for img, _ in folder_imgs[:5]))
+
+    return list(images)[:limit]
@@ -0,0 +1,120 @@
+"""
+Cached listing of the product image trees.
+
+generate_products.py, analyze_images.py and scripts/map_images.py all need
+every image file under a root folder. Walking a NAS share with os.walk on
+every run takes minutes, so the listing is saved under .cache/ with each
+directory's mtime. On the next run a directory is only re-listed if its mtime
+changed (a file or subfolder was added, removed or renamed in it); unchanged
+directories cost a single stat.
+"""
+import hashlib
+import json
+import os
+import time
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Directories modified this recently are rescanned next time, since a second
+# change within the filesystem's mtime resolution would go unnoticed.
+MTIME_SLACK_NS = 2 * 10**9
+
+
+def manifest_path(root):
+    key = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"image_manifest-{key}.json")
+
+
+def load_manifest(root, cache_path=None):
+    """Return {rel_dir: {"mtime", "files", "dirs"}} in os.walk order, refreshed."""
+    cache_path = cache_path or manifest_path(root)
+    old = cached(root, cache_path)
+    stats = {"scanned": 0, "reused": 0}
+    dirs = refresh(root, old, stats)
+
+    if stats["scanned"] or len(dirs) != len(old):
+        _save(cache_path, {"root": os.path.abspath(root), "dirs": dirs})
+    print(f"Image manifest: {stats['scanned']} dirs scanned, {stats['reused']} reused")
+    return dirs
+
+
+def cached(root, cache_path=None):
+    """The manifest saved by the last load_manifest(root), as it was then ({} if none)."""
+    cache_path = cache_path or manifest_path(root)
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get("root") == os.path.abspath(root):
+            return saved["dirs"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def refresh(root, dirs, stats=None):
+    """dirs brought up to date with root, without printing or saving anything.
+
+    Known directories whose mtime is unchanged cost one stat; only the others
+    are re-listed.
+    """
+    new = {}
+    if os.path.isdir(root):
+        _refresh(root, "", dirs, new, stats if stats is not None else {"scanned": 0, "reused": 0},
+                 time.time_ns() - MTIME_SLACK_NS)
+    return new
+
+
+def walk(root, cache_path=None, manifest=None):
+    """Like os.walk(root) but yields (dirpath, image_filenames) from the manifest."""
+    if manifest is None:
+        manifest = load_manifest(root, cache_path)
+    for rel, entry in manifest.items():
+        dirpath = os.path.join(root, *rel.split("/")) if rel else root
+        yield dirpath, entry["files"]
+
+
+def listing(manifest):
+    """The (rel_dir, files) pairs of a manifest, without mtimes (for fingerprints)."""
+    return [(rel, entry["files"]) for rel, entry in manifest.items()]
+
+
+def _refresh(path, rel, old, dirs, stats, trust_before_ns):
+    mtime = os.stat(path).st_mtime_ns
+    entry = old.get(rel)
+
+    if entry and entry["mtime"] == mtime:
+        stats["reused"] += 1
+    else:
+        files, subdirs = [], []
+        with os.scandir(path) as it:
+            for e in it:
+                if e.is_dir():
+                    # os.walk lists symlinked dirs but does not descend into them
+                    if not e.is_symlink():
+                        subdirs.append(e.name)
+                elif e.name.lower().endswith(IMAGE_EXTS):
+                    files.append(e.name)
+        stats["scanned"] += 1
+        entry = {
+            "mtime": mtime if mtime < trust_before_ns else None,
+            "files": files,
+            "dirs": subdirs,
+        }
+
+    dirs[rel] = entry
+    for name in entry["dirs"]:
+        child = f"{rel}/{name}" if rel else name
+        child_path = os.path.join(path, name)
+        if os.path.isdir(child_path):
+            _refresh(child_path, child, old, dirs, stats, trust_before_ns)
+
+
+def _save(cache_path, data):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = cache_path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, cache_path)
@@ -0,0 +1,152 @@
+"""
+Perceptual-hash matching of product images.
+
+Filename lookups only find images named after a SKU. For the rest, the
+images of the parent SKU that were found by filename show what the product
+looks like: other, unclaimed photos of the same piece (another color, another
+angle) are near them in perceptual-hash space. Every image gets a 64-bit
+difference hash (dHash), the hashes go into a BK-tree, and a variant with no
+filename match gets the unclaimed images within RADIUS bits of its parent's
+known images, those mentioning its color first.
+
+Hashes are computed across a process pool and cached by path, size and mtime
+under .cache/, so only new or edited images are decoded. Without Pillow no
+matcher is built and find_images falls back to folder-name matching.
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+RADIUS = 10  # of 64 bits
+HASH_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "image_phash.json")
+
+
+def dhash(path, size=8):
+    """64-bit difference hash: is each pixel brighter than its right neighbour."""
+    with Image.open(path) as im:
+        small = im.convert("L").resize((size + 1, size), Image.LANCZOS)
+    px = small.tobytes()  # one byte per pixel in mode "L"
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            i = row * (size + 1) + col
+            bits = (bits << 1) | (px[i] > px[i + 1])
+    return bits
+
+
+def _hash_one(path):
+    try:
+        return dhash(path)
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+def image_hashes(urls, public_path, workers=None, hash_cache=HASH_CACHE):
+    """
+    {url: dhash} for the urls (paths under public_path) that decode.
+    hash_cache only keeps the urls of this call, so each image tree needs its own.
+    """
+    cache = {}
+    if os.path.exists(hash_cache):
+        with open(hash_cache, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    entries, todo = {}, []
+    for url in dict.fromkeys(urls):
+        src = os.path.join(public_path, url.lstrip("/"))
+        try:
+            st = os.stat(src)
+        except OSError:
+            continue
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = cache.get(src)
+        if cached and cached[:2] == stamp:
+            entries[src] = (url, cached)
+        else:
+            todo.append((src, url, stamp))
+
+    if todo:
+        # spawned: called from a thread while others run (see image_derivatives)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for (src, url, stamp), h in zip(todo, pool.map(_hash_one, [t[0] for t in todo],
+                                                           chunksize=16)):
+                entries[src] = (url, stamp + [h])  # None: not decodable, retried when changed
+
+    new_cache = {src: entry for src, (_, entry) in entries.items()}
+    if todo or len(new_cache) != len(cache):
+        os.makedirs(os.path.dirname(hash_cache), exist_ok=True)
+        with open(hash_cache + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(new_cache, f, separators=(",", ":"))
+        os.replace(hash_cache + ".tmp", hash_cache)
+    print(f"Perceptual hashes: {len(todo)} computed, {len(entries) - len(todo)} cached")
+    return {url: entry[2] for url, entry in entries.values() if entry[2] is not None}
+
+
+class BKTree:
+    """BK-tree over 64-bit hashes with Hamming distance; each node keeps its items."""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+
+    def add(self, h, item):
+        if self.root is None:
+            self.root = [h, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = bin(node[0] ^ h).count("1")
+            if d == 0:
+                node[1].append(item)
+                return
+            if d not in node[2]:
+                node[2][d] = [h, [item], {}]
+                return
+            node = node[2][d]
+
+    def query(self, h, radius):
+        """[(distance, item)] for every item within radius bits of h."""
+        found, stack = [], [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = bin(node[0] ^ h).count("1")
+            if d <= radius:
+                found.extend((d, item) for item in node[1])
+            # children at distance k can only hold matches if |k - d| <= radius
+            stack.extend(child for k, child in node[2].items() if d - radius <= k <= d + radius)
+        return found
+
+
+class SimilarityMatcher:
+    """
+    known: {parent sku: [image urls found by filename]}; claimed: every url
+    some SKU already got by filename (those belong to their own variant).
+    """
+
+    def __init__(self, hashes, known, claimed, radius=RADIUS):
+        self.hashes = hashes
+        self.known = known
+        self.claimed = set(claimed)
+        self.radius = radius
+        self.tree = BKTree()
+        for url, h in hashes.items():
+            if url not in self.claimed:
+                self.tree.add(h, url)
+
+    def match(self, parent_sku, color, limit=8):
+        """Unclaimed images that look like the parent's, color matches first."""
+        best = {}
+        for url in self.known.get(parent_sku, ()):
+            if url not in self.hashes:
+                continue
+            for d, found in self.tree.query(self.hashes[url], self.radius):
+                best[found] = min(d, best.get(found, d))
+        color = (color or "").lower().replace(" ", "")
+        ranked = sorted(best, key=lambda u: (not (color and color in u.lower().replace(" ", "")),
+                                             best[u], u))
+        return ranked[:limit]
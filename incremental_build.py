@@ -0,0 +1,148 @@
+"""
+Fingerprinted build stages for generate_products.py.
+
+Each stage is a node with a fingerprint of its inputs. When the fingerprint
+matches the previous run and the stage's saved result is still on disk, the
+result is loaded instead of recomputed. Per-SKU product records are cached by
+their own fingerprint, so only changed SKUs are reassembled.
+
+Every fingerprint also covers the build's code version (code_version: a hash
+of BUILD_VERSION and the source of the modules that produce the results), so
+a change to the transform or an output format reruns the stages instead of
+reusing results the old code made.
+
+    build = IncrementalBuild(".cache/catalog", code_version(__name__, "catalog_transform"))
+    dims = build.stage("dimensions", [dims_hash], lambda: build_dimensions(dim_df))
+    ...
+    build.save()
+    build.print_report()
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+# Bump to invalidate every cache for a change the module hashes do not see
+# (e.g. a dependency whose output changed)
+BUILD_VERSION = 1
+
+
+def fingerprint(*parts):
+    """Stable sha1 of JSON-able values, DataFrames and Series."""
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(repr(list(getattr(part, "columns", [part.name]))).encode("utf-8"))
+            h.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def code_version(*module_names):
+    """Hash of BUILD_VERSION and the source files of the named (imported) modules."""
+    h = hashlib.sha1(str(BUILD_VERSION).encode("utf-8"))
+    for name in module_names:
+        with open(sys.modules[name].__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class IncrementalBuild:
+    def __init__(self, cache_dir, version=None):
+        self.cache_dir = cache_dir
+        self.version = version or str(BUILD_VERSION)
+        self.state_file = os.path.join(cache_dir, "state.json")
+        self.previous = {}
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.previous = json.load(f)
+        self.current = {}
+        self.report = {"reused": [], "recomputed": [], "records": {}}
+
+    def unchanged(self, name, fp):
+        """True if stage `name` had fingerprint `fp` on the previous run."""
+        return self.previous.get(name) == fp
+
+    def pending(self, name, inputs, persist=True, outputs=()):
+        """True if stage() with these arguments would have to compute, e.g. to start reading early."""
+        return not self._reusable(name, fingerprint(self.version, *inputs), persist, outputs)
+
+    def _reusable(self, name, fp, persist, outputs):
+        path = os.path.join(self.cache_dir, f"{name}.pkl")
+        required = list(outputs) + ([path] if persist else [])
+        return self.unchanged(name, fp) and all(os.path.exists(p) for p in required)
+
+    def stage(self, name, inputs, compute, persist=True, outputs=()):
+        """
+        Result of compute(), or last run's result if `inputs` fingerprint the
+        same. Stages with persist=False are run for their side effects (and
+        return None when reused); `outputs` are files that must still exist.
+        """
+        fp = fingerprint(self.version, *inputs)
+        path = os.path.join(self.cache_dir, f"{name}.pkl")
+
+        if self._reusable(name, fp, persist, outputs):
+            value = None
+            if persist:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            self.report["reused"].append(name)
+        else:
+            value = compute()
+            if persist:
+                self._dump(path, value)
+            self.report["recomputed"].append(name)
+
+        self.current[name] = fp
+        return value
+
+    def records(self, name, items, build_record):
+        """
+        [build_record(item) for _, item in items], reusing the records of
+        fingerprints seen on the previous run. items: [(fingerprint, item)].
+        """
+        path = os.path.join(self.cache_dir, f"{name}.pkl")
+        cached = {}
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+            # records made by other code are not reused
+            if isinstance(saved, dict) and saved.get("version") == self.version:
+                cached = saved["records"]
+
+        records, store, reused = [], {}, 0
+        for fp, item in items:
+            if fp in cached:
+                record = cached[fp]
+                reused += 1
+            else:
+                record = build_record(item)
+            store[fp] = record
+            records.append(record)
+
+        self._dump(path, {"version": self.version, "records": store})
+        self.report["records"][name] = {"reused": reused, "rebuilt": len(records) - reused}
+        self.current[name] = fingerprint(self.version, sorted(store))
+        return records
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.current, f, indent=2)
+
+    def print_report(self):
+        print(f"Reused stages: {', '.join(self.report['reused']) or '-'}")
+        print(f"Recomputed stages: {', '.join(self.report['recomputed']) or '-'}")
+        for name, counts in self.report["records"].items():
+            print(f"{name}: {counts['reused']} reused, {counts['rebuilt']} rebuilt")
+
+    def _dump(self, path, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(path + ".tmp", 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
@@ -1,11 +1,10 @@
-import openpyxl
+from excel_cache import CachedWorkbook
 
-# Load the Excel file
+# Load the Excel file (sheet sizes are cached after the first run)
 file_path = 'fullreport.xlsm'
-workbook = openpyxl.load_workbook(file_path, data_only=True)
+workbook = CachedWorkbook(file_path)
 
 # List all sheet names
 print("Sheet Names:")
-for idx, sheet_name in enumerate(workbook.sheetnames, 1):
-    sheet = workbook[sheet_name]
-    print(f"{idx}. {sheet_name} - Rows: {sheet.max_row}, Cols: {sheet.max_column}")
+for idx, sheet in enumerate(workbook.sheets, 1):
+    print(f"{idx}. {sheet['name']} - Rows: {sheet['rows']}, Cols: {sheet['cols']}")
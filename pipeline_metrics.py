@@ -0,0 +1,217 @@
+"""
+Per-stage timings, memory and counters for the catalog scripts.
+
+    metrics = Metrics("generate_products", **options_from_argv(sys.argv))
+    with metrics.stage("excel_read"):
+        ...
+    metrics.count("find_images", "folder")
+    metrics.finish()   # prints the table, writes .cache/metrics/<name>.json
+
+For each stage: wall and CPU seconds, its start and end (seconds into the
+run) and the process's peak RSS when the stage ended. With --trace-memory,
+tracemalloc also gives the peak of Python allocations within each stage
+(slower, but per stage rather than a high-water mark).
+
+Stages may run on several threads at once; start/end show how they
+overlapped. Process CPU time and the tracemalloc peak are process-wide, so
+they only describe a stage that ran alone. A stage that overlapped another
+is marked "overlapped": its CPU seconds are those of its own thread (work it
+handed to pool threads is not included) and its traced peak is None. Each
+run is written to <name>.json and appended to <name>.history.ndjson, one
+JSON line per build, for regression tracking.
+
+Profiling hooks, both off by default:
+
+    --profile   cProfile over the whole run: <name>.prof, top functions in the JSON
+    --sample    a thread samples the main thread's stack every SAMPLE_INTERVAL
+                seconds; the hottest functions (self and total) go in the JSON
+"""
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics")
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+
+
+def options_from_argv(argv):
+    return {"trace_memory": "--trace-memory" in argv,
+            "profile": "--profile" in argv,
+            "sample": "--sample" in argv}
+
+
+def peak_rss_mb():
+    """Process peak resident set size so far, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _where(code):
+    return f"{os.path.basename(code[0])}:{code[1]}:{code[2]}"
+
+
+class StackSampler(threading.Thread):
+    """Counts the functions on the target thread's stack at a fixed interval."""
+
+    def __init__(self, target_ident, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target = target_ident
+        self.interval = interval
+        self.self_counts, self.total_counts = {}, {}
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            self.samples += 1
+            innermost = True
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = _where((code.co_filename, code.co_firstlineno, code.co_name))
+                if innermost:
+                    self.self_counts[key] = self.self_counts.get(key, 0) + 1
+                    innermost = False
+                if key not in seen:  # recursion counts once per sample
+                    seen.add(key)
+                    self.total_counts[key] = self.total_counts.get(key, 0) + 1
+                frame = frame.f_back
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+        def top(counts):
+            return [{"function": k, "samples": v, "share": round(v / max(self.samples, 1), 3)}
+                    for k, v in sorted(counts.items(), key=lambda kv: -kv[1])[:TOP_FUNCTIONS]]
+
+        return {"interval": self.interval, "samples": self.samples,
+                "self": top(self.self_counts), "total": top(self.total_counts)}
+
+
+class Metrics:
+    def __init__(self, name, trace_memory=False, profile=False, sample=False, out_dir=METRICS_DIR):
+        self.name = name
+        self.out_dir = out_dir
+        self.trace_memory = trace_memory
+        self.stages, self.counters, self.values = [], {}, {}
+        self.running = []  # entries of the stages in progress
+        self.lock = threading.Lock()
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+
+        if trace_memory:
+            tracemalloc.start()
+        self.profiler = cProfile.Profile() if profile else None
+        if self.profiler:
+            self.profiler.enable()
+        self.sampler = StackSampler(threading.get_ident()) if sample else None
+        if self.sampler:
+            self.sampler.start()
+
+    @contextmanager
+    def stage(self, name):
+        entry = {"name": name, "overlapped": False}
+        with self.lock:
+            self.running.append(entry)
+            if len(self.running) > 1:
+                for other in self.running:
+                    other["overlapped"] = True
+            elif self.trace_memory:
+                tracemalloc.reset_peak()
+        wall, cpu, thread_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.running.remove(entry)
+                alone = not entry["overlapped"]
+                entry.update({
+                    "wall": round(end - wall, 4),
+                    "cpu": round(time.process_time() - cpu if alone else time.thread_time() - thread_cpu, 4),
+                    "start": round(wall - self.wall, 4),
+                    "end": round(end - self.wall, 4),
+                    "thread": threading.current_thread().name,
+                    "peak_rss_mb": peak_rss_mb()})
+                if self.trace_memory:
+                    entry["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 2) \
+                        if alone else None
+                self.stages.append(entry)
+
+    def count(self, group, key, n=1):
+        counts = self.counters.setdefault(group, {})
+        counts[key] = counts.get(key, 0) + n
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def finish(self):
+        """Stop the profilers, print the stage table and write the JSON; returns its path."""
+        report = {
+            "name": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall": round(time.perf_counter() - self.wall, 4),
+            "cpu": round(time.process_time() - self.cpu, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "counters": self.counters,
+            "values": self.values,
+        }
+        os.makedirs(self.out_dir, exist_ok=True)
+        if self.sampler:
+            report["sampling"] = self.sampler.stop()
+        if self.profiler:
+            self.profiler.disable()
+            prof_path = os.path.join(self.out_dir, f"{self.name}.prof")
+            self.profiler.dump_stats(prof_path)
+            stats = pstats.Stats(self.profiler).stats  # (file, line, fn) -> (cc, nc, tt, ct, callers)
+            ranked = sorted(stats.items(), key=lambda kv: -kv[1][3])[:TOP_FUNCTIONS]
+            report["profile"] = {"file": prof_path, "top": [
+                {"function": _where(key), "calls": nc, "self": round(tt, 4), "cumulative": round(ct, 4)}
+                for key, (_, nc, tt, ct, _) in ranked]}
+        if self.trace_memory:
+            tracemalloc.stop()
+
+        path = os.path.join(self.out_dir, f"{self.name}.json")
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        os.replace(path + ".tmp", path)
+        with open(os.path.join(self.out_dir, f"{self.name}.history.ndjson"), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, separators=(",", ":")) + "\n")
+
+        self.print_report(report)
+        print(f"Metrics written to {path}")
+        return path
+
+    def print_report(self, report):
+        print(f"{'stage':<22}{'wall s':>9}{'cpu s':>9}{'start':>9}{'end':>9}{'rss MB':>9}")
+        for s in sorted(report["stages"], key=lambda s: s["start"]):
+            rss = "-" if s["peak_rss_mb"] is None else s["peak_rss_mb"]
+            name = s["name"] + (" *" if s["overlapped"] else "")
+            print(f"{name:<22}{s['wall']:>9.3f}{s['cpu']:>9.3f}"
+                  f"{s['start']:>9.3f}{s['end']:>9.3f}{rss:>9}")
+        print(f"{'total':<22}{report['wall']:>9.3f}{report['cpu']:>9.3f}")
+        if any(s["overlapped"] for s in report["stages"]):
+            print("* ran beside other stages: cpu is its own thread's, no traced memory peak")
+        for group, counts in report["counters"].items():
+            print(f"{group}: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
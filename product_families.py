@@ -0,0 +1,149 @@
+"""
+Near-duplicate product family clustering (shingling + MinHash/LSH).
+
+Variants of one product differ in color, finish, size or count ("Oliver TV
+Unit", "Oliver TV Unit Brown Maple", "Carlem 3 Door Shoe Rack Wenge").
+Instead of stripping a fixed list of such words, names are compared within
+their block (product type, e.g. the Product Code prefix) after dropping:
+
+    - tokens used across many blocks (colors, finishes, "with", "large")
+    - numeric tokens (sizes, door and seat counts)
+
+The rest of the name is shingled into character 3-grams. MinHash signatures
+of the shingle sets are split into LSH bands, so only names of the same block
+that share a band bucket become candidate pairs; pairs whose exact Jaccard
+similarity reaches the threshold are joined into families with union-find.
+
+    labels = cluster_families(df['Product Name'], blocks=code_prefixes)
+"""
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+NUM_PERM = 64
+BANDS = 16          # 16 bands x 4 rows: pairs from ~0.5 Jaccard become candidates
+THRESHOLD = 0.7
+MIN_BLOCKS = 5      # tokens in this many blocks are variant words, not name words
+MAX_DF = 0.05       # without blocks: tokens in more than 5% of names
+MAX_BUCKET = 50     # names of a larger LSH bucket are only paired with their 49 neighbours
+SHINGLE = 3
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def name_tokens(names):
+    """Lowercase alphanumeric tokens of each name (empty for missing names)."""
+    return [_TOKEN.findall(name.lower()) if isinstance(name, str) else [] for name in names]
+
+
+def variant_words(token_lists, blocks=None):
+    """Tokens that describe a variant rather than a product (see module doc)."""
+    if blocks is None:
+        df = pd.Series([t for tokens in token_lists for t in set(tokens)], dtype=object).value_counts()
+        return set(df.index[df > max(MAX_DF * len(token_lists), 1)])
+    spread = {}
+    for tokens, block in zip(token_lists, blocks):
+        for t in tokens:
+            spread.setdefault(t, set()).add(block)
+    return {t for t, bs in spread.items() if len(bs) >= MIN_BLOCKS}
+
+
+def shingles(tokens, k=SHINGLE):
+    """Character k-grams of the joined tokens, as stable 64-bit hashes."""
+    text = ' '.join(tokens)
+    if not text:
+        return set()
+    grams = sorted({text[i:i + k] for i in range(max(len(text) - k + 1, 1))})
+    return set(pd.util.hash_array(np.array(grams, dtype=object)).tolist())
+
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=1, block=10000):
+    """(len(shingle_sets), num_perm) uint64 matrix; empty sets get all-max rows."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+    sigs = np.full((len(shingle_sets), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+
+    # (a*x + b) mod p for all shingles of a block of names at once, then the
+    # per-name minimum; a, x < 2**32 so a*x + b fits in uint64
+    for start in range(0, len(shingle_sets), block):
+        docs = [i for i in range(start, min(start + block, len(shingle_sets))) if shingle_sets[i]]
+        if not docs:
+            continue
+        x = np.fromiter((h for i in docs for h in shingle_sets[i]), dtype=np.uint64) % _PRIME
+        h = (x[:, None] * a[None, :] + b[None, :]) % _PRIME
+        offsets = np.cumsum([0] + [len(shingle_sets[i]) for i in docs[:-1]])
+        sigs[docs] = np.minimum.reduceat(h, offsets, axis=0)
+    return sigs
+
+
+def lsh_candidates(sigs, blocks, bands=BANDS, max_bucket=MAX_BUCKET):
+    """
+    Pairs (i, j), i < j, of the same block that share a band bucket.
+
+    Names without shingles (all-max rows) are left out. A bucket of more than
+    max_bucket names (many copies of one name) is sorted by full signature and
+    each name paired with the next max_bucket - 1, so a bucket costs
+    O(len * max_bucket) pairs instead of O(len**2); copies sort next to each
+    other and are still chained into one family.
+    """
+    rows = sigs.shape[1] // bands
+    empty = (sigs == np.iinfo(np.uint64).max).all(axis=1)
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(map(bytes, sigs[:, band * rows:(band + 1) * rows])):
+            if not empty[i]:
+                buckets.setdefault((blocks[i], key), []).append(i)
+        for members in buckets.values():
+            if len(members) > max_bucket:
+                members = sorted(members, key=lambda i: (bytes(sigs[i]), i))
+            for x in range(len(members)):
+                for y in range(x + 1, min(x + max_bucket, len(members))):
+                    i, j = members[x], members[y]
+                    pairs.add((i, j) if i < j else (j, i))
+    return pairs
+
+
+def cluster_families(names, blocks=None, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """Family label per name: the position of the family's first member."""
+    token_lists = name_tokens(names)
+    blocks = list(blocks) if blocks is not None else None
+    variants = variant_words(token_lists, blocks)
+    # a name made only of variant words is compared on all of them
+    cores = [[t for t in tokens if t not in variants and not t.isdigit()] or tokens
+             for tokens in token_lists]
+    sets = [shingles(tokens) for tokens in cores]
+    sigs = minhash_signatures(sets, num_perm)
+
+    parent = list(range(len(sets)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in sorted(lsh_candidates(sigs, blocks or [None] * len(sets), bands)):
+        if not sets[i] or not sets[j]:
+            continue
+        if len(sets[i] & sets[j]) / len(sets[i] | sets[j]) >= threshold:
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    return [find(i) for i in range(len(sets))]
+
+
+def family_ids(labels, codes):
+    """
+    Stable id per family: hash of the smallest product code among its members
+    (of the family label if none of them has a code).
+    """
+    labels = list(labels)
+    smallest = pd.Series(list(codes), dtype=str).groupby(labels).transform('min')
+    keys = [code if isinstance(code, str) else f"#{label}" for code, label in zip(smallest, labels)]
+    return ['fam-' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:10] for key in keys]
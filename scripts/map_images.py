@@ -1,23 +1,25 @@
 import os
+import sys
 import json
-import re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import image_manifest
+from catalog_paths import APP_ROOT
 
 # Paths
-PUBLIC_IMAGES_DIR = r"C:\Users\shubh\Downloads\ecommerce-app\public\images\products"
-PRODUCTS_FILE = r"C:\Users\shubh\Downloads\ecommerce-app\src\data\bluewudProducts.json"
+PUBLIC_IMAGES_DIR = os.path.join(APP_ROOT, "public", "images", "products")
+PRODUCTS_FILE = os.path.join(APP_ROOT, "src", "data", "bluewudProducts.json")
 
 def get_image_map():
     image_map = {}
     
-    # Walk through the public images directory
-    for root, dirs, files in os.walk(PUBLIC_IMAGES_DIR):
+    # Walk through the public images directory (cached listing, see image_manifest)
+    for root, valid_images in image_manifest.walk(PUBLIC_IMAGES_DIR):
         category = os.path.basename(root)
         
         # Skip the root dir itself
         if root == PUBLIC_IMAGES_DIR:
             continue
-            
-        valid_images = [f for f in files if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))]
         
         if valid_images:
             image_map[category] = [os.path.join("/images/products", category, img).replace("\\", "/") for img in valid_images]
@@ -37,7 +39,6 @@ def update_products():
         for product in products:
             # Try to match product category/name to image folders
             category = product.get('category', '')
-            name = product.get('name', '')
             
             # Simple matching logic - can be improved
             matched_images = []
@@ -0,0 +1,162 @@
+"""
+Build-time search index for a catalog output.
+
+Search and autocomplete should not scan every product per keystroke. While
+CatalogWriter writes the records, SearchIndexBuilder tokenizes the searchable
+fields of each one (name, tags, category, color, sku by default) and collects
+posting lists; build() turns them into a JSON index:
+
+    terms        sorted term table (autocomplete: binary search for a prefix)
+    df           documents per term
+    postings     per term, flat [doc, score, doc, score, ...]; doc is the
+                 record's position in the catalog (<name>.json / .bcat)
+    completions  most frequent terms for every prefix of up to PREFIX_LEN
+                 characters, so short prefixes need no range scan
+    bm25         k1, b, avgdl and the document count the scores were made with
+
+A posting's score is its precomputed BM25 term weight, so a query is a sum
+over the postings of its terms and costs time in the number of matches, not
+in the size of the catalog:
+
+    index = SearchIndex.load("public/catalog/bluewudProducts/" + manifest["search"])
+    index.search("oliver tv uni")   # last word is completed as a prefix
+"""
+import bisect
+import json
+import math
+import re
+
+SEARCH_FIELDS = ("name", "tags", "category", "color", "sku")
+K1 = 1.2
+B = 0.75
+PREFIX_LEN = 3
+COMPLETIONS = 10
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def record_terms(record, fields, code_field=None):
+    """Tokens of the record's fields (lists are joined); the code is also kept whole."""
+    terms = []
+    for field in fields:
+        value = record.get(field)
+        if value is None:
+            continue
+        for part in value if isinstance(value, list) else [value]:
+            terms.extend(tokenize(part))
+    code = record.get(code_field) if code_field else None
+    if code and len(tokenize(code)) > 1:
+        terms.append(str(code).lower())
+    return terms
+
+
+class SearchIndexBuilder:
+    """
+    Collects postings one record at a time. code_field (a SKU-like field
+    among `fields`) is also indexed as a single term, "w-m0-wh".
+    """
+
+    def __init__(self, fields=SEARCH_FIELDS, code_field=None):
+        self.fields = list(fields)
+        self.code_field = code_field
+        self.postings = {}  # term -> {doc: tf}
+        self.lengths = []
+
+    def add(self, record):
+        doc = len(self.lengths)
+        terms = record_terms(record, self.fields, self.code_field)
+        self.lengths.append(len(terms))
+        for term in terms:
+            tfs = self.postings.setdefault(term, {})
+            tfs[doc] = tfs.get(doc, 0) + 1
+
+    def build(self):
+        n = len(self.lengths)
+        avgdl = sum(self.lengths) / n if n else 0.0
+        terms = sorted(self.postings)
+        df = [len(self.postings[t]) for t in terms]
+
+        postings = []
+        for term, count in zip(terms, df):
+            idf = math.log(1 + (n - count + 0.5) / (count + 0.5))
+            flat = []
+            for doc, tf in sorted(self.postings[term].items()):
+                norm = tf + K1 * (1 - B + B * self.lengths[doc] / avgdl)
+                flat += [doc, round(idf * tf * (K1 + 1) / norm, 4)]
+            postings.append(flat)
+
+        completions = {}
+        for term, count in zip(terms, df):
+            for k in range(1, min(len(term), PREFIX_LEN) + 1):
+                completions.setdefault(term[:k], []).append((-count, term))
+        completions = {p: [t for _, t in sorted(c)[:COMPLETIONS]] for p, c in completions.items()}
+
+        return {
+            "version": 1,
+            "fields": self.fields,
+            "bm25": {"k1": K1, "b": B, "avgdl": round(avgdl, 4), "docs": n},
+            "terms": terms,
+            "df": df,
+            "postings": postings,
+            "completions": completions,
+        }
+
+
+class SearchIndex:
+    """Query side of a built index (the storefront does the same in JS)."""
+
+    def __init__(self, data):
+        self.data = data
+        self.terms = data["terms"]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def complete(self, prefix, limit=COMPLETIONS):
+        """Indexed terms starting with prefix, most frequent first."""
+        prefix = prefix.lower()
+        if len(prefix) <= PREFIX_LEN:
+            return self.data["completions"].get(prefix, [])[:limit]
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + "\uffff", lo)
+        ranked = sorted(range(lo, hi), key=lambda i: (-self.data["df"][i], i))
+        return [self.terms[i] for i in ranked[:limit]]
+
+    def _postings(self, term):
+        i = bisect.bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return self.data["postings"][i]
+        return []
+
+    def search(self, query, limit=20, prefix=True):
+        """[(doc, score)] best first; with prefix, the last word may be incomplete."""
+        words = tokenize(query)
+        if not words:
+            return []
+        scores = {}
+
+        def add(flat):
+            for i in range(0, len(flat), 2):
+                scores[flat[i]] = scores.get(flat[i], 0) + flat[i + 1]
+
+        for word in words[:-1] if prefix else words:
+            add(self._postings(word))
+        if prefix:
+            # a document counts the best of the completions of the last word
+            best = {}
+            for term in self.complete(words[-1]) or [words[-1]]:
+                flat = self._postings(term)
+                for i in range(0, len(flat), 2):
+                    best[flat[i]] = max(best.get(flat[i], 0), flat[i + 1])
+            add([x for item in best.items() for x in item])
+        # a whole code ("w-m0-wh") is indexed as one term as well as its parts
+        if len(words) > 1:
+            add(self._postings(str(query).strip().lower()))
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(doc, round(score, 4)) for doc, score in ranked]
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+import build_brands
+import generate_products
+from catalog_binary import CatalogReader
+from catalog_transform import PLACEHOLDER_IMAGE
+
+BRANDS = [{"key": "bluewud", "name": "Bluewud"}, {"key": "woodsworth", "name": "Woodsworth"}]
+
+
+def product(n, sku, slug, image=True):
+    return {"_id": f"prod-{n}", "sku": sku, "slug": slug, "name": slug.replace("-", " ").title(),
+            "categoryId": "bedroom", "brand": "x", "color": "Wenge", "price": 100 * n,
+            "images": [f"/products/{sku}.jpg" if image else PLACEHOLDER_IMAGE]}
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_products, "output_path", str(tmp_path / "data"))
+    monkeypatch.setattr(generate_products, "shards_path", str(tmp_path / "public" / "data"))
+    os.makedirs(tmp_path / "data")
+
+    def write(key, name, records):
+        with open(tmp_path / "data" / f"{key}{name}.ndjson", 'w', encoding='utf-8') as f:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
+    return write
+
+
+def merged(tmp_path, name):
+    with open(tmp_path / "data" / f"{name}.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_merge_prefixes_ids_and_deduplicates_slugs(tmp_path, outputs, capsys):
+    outputs("bluewud", "Products", [
+        product(1, "B-PL-WG", "pollo-bed"),
+        product(2, "B-PL-WH", "pollo-bed"),
+        product(3, "TU-OL", "oliver", image=False),
+    ])
+    outputs("woodsworth", "Products", [
+        product(1, "B-PL-WG", "pollo-bed"),
+        product(2, "W-1", "oliver"),
+        product(3, "B-PL-WH", "pollo-bed"),
+        product(4, "B-PL-WH", "pollo-bed"),
+        product(5, "B-PL-WH", "pollo-bed"),
+    ])
+    manifest = build_brands.merge(BRANDS, families=False)
+    records = merged(tmp_path, "catalogProducts")
+
+    # images first across brands, brand order within
+    assert [(r["_id"], r["slug"]) for r in records] == [
+        ("bluewud-prod-1", "pollo-bed"),
+        ("bluewud-prod-2", "pollo-bed-b-pl-wh"),
+        ("woodsworth-prod-1", "pollo-bed-b-pl-wg"),
+        ("woodsworth-prod-2", "oliver"),
+        ("woodsworth-prod-3", "pollo-bed-b-pl-wh-woodsworth"),
+        ("woodsworth-prod-4", "pollo-bed-woodsworth-2"),
+        ("woodsworth-prod-5", "pollo-bed-woodsworth-3"),
+        ("bluewud-prod-3", "oliver-tu-ol"),
+    ]
+    assert manifest["total"] == 8
+    with CatalogReader(str(tmp_path / "data" / "catalogProducts.bcat")) as cat:
+        assert cat.key_fields == ["_id", "slug", "sku"]
+        assert cat.find("_id", "woodsworth-prod-4")["sku"] == "B-PL-WH"
+        assert cat.find("slug", "oliver-tu-ol")["_id"] == "bluewud-prod-3"
+    assert "Saved to catalogProducts.json (8 records" in capsys.readouterr().out
+
+
+def test_merge_families_prefixes_variant_ids(tmp_path, outputs):
+    family = {"_id": "fam-B-PL", "parentSku": "B-PL", "slug": "pollo-bed", "name": "Pollo Bed",
+              "categoryId": "bedroom", "images": [], "variants": [{"_id": "prod-1", "sku": "B-PL-WG"}]}
+    outputs("bluewud", "Families", [family])
+    outputs("woodsworth", "Families", [family])
+    build_brands.merge(BRANDS, families=True)
+    records = merged(tmp_path, "catalogFamilies")
+    assert [(r["_id"], r["slug"], r["variants"][0]["_id"]) for r in records] == [
+        ("bluewud-fam-B-PL", "pollo-bed", "bluewud-prod-1"),
+        ("woodsworth-fam-B-PL", "pollo-bed-b-pl", "woodsworth-prod-1"),
+    ]
@@ -0,0 +1,68 @@
+import pytest
+
+from catalog_binary import CatalogFileWriter, CatalogReader, write_catalog
+
+
+def records(n):
+    return [{"sku": f"SKU-{i}", "slug": f"product-{i}", "name": f"Product {i}", "price": 1000 + i}
+            for i in range(n)]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "products.bcat")
+    written = records(50)
+    write_catalog(path, written)
+
+    with CatalogReader(path) as cat:
+        assert len(cat) == 50
+        assert cat[:] == written
+        assert cat[10] == written[10]
+        assert cat[-1] == written[-1]
+        assert cat[20:40] == written[20:40]
+        assert cat[::10] == written[::10]
+        assert cat.tail(3) == written[-3:]
+        with pytest.raises(IndexError):
+            cat[50]
+
+
+def test_find_by_key_fields(tmp_path):
+    path = str(tmp_path / "products.bcat")
+    written = records(200)
+    write_catalog(path, written)
+
+    with CatalogReader(path) as cat:
+        for record in written:
+            assert cat.by_sku(record["sku"]) == record
+            assert cat.by_slug(record["slug"]) == record
+        assert cat.by_sku("missing") is None
+        with pytest.raises(KeyError):
+            cat.find("name", "Product 1")
+
+
+def test_sections(tmp_path):
+    path = str(tmp_path / "products.bcat")
+    writer = CatalogFileWriter(path, ["sku"])
+    for record in records(3):
+        writer.write(record)
+    writer.close({"hashes": {"key": "sku", "records": [["SKU-0", "abc"]]}})
+
+    with CatalogReader(path) as cat:
+        assert cat.section("hashes") == {"key": "sku", "records": [["SKU-0", "abc"]]}
+        assert cat.section("missing") is None
+        assert cat.by_sku("SKU-2")["name"] == "Product 2"
+
+
+def test_empty_catalog(tmp_path):
+    path = str(tmp_path / "empty.bcat")
+    write_catalog(path, [])
+    with CatalogReader(path) as cat:
+        assert len(cat) == 0
+        assert cat[:] == []
+        assert cat.by_sku("SKU-0") is None
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "products.json"
+    path.write_bytes(b"[]" + b"\0" * 64)
+    with pytest.raises(ValueError):
+        CatalogReader(str(path))
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+
+import pytest
+
+from catalog_db import load_catalog, product_slugs
+
+SCHEMA = os.path.join(os.path.dirname(__file__), os.pardir, "backend", "src", "db", "schema.sql")
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "mulary.db")
+    conn = sqlite3.connect(path)
+    with open(SCHEMA, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())  # seeds cat-men, cat-women, ...
+    conn.close()
+    return path
+
+
+def product(sku, slug, price=1000, category="cat-men", brand="Bluewud", images=()):
+    return {"_id": f"prod-{sku}", "sku": sku, "slug": slug, "name": sku.title(), "price": price,
+            "categoryId": category, "brand": brand, "images": list(images)}
+
+
+def rows(path, query):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def test_insert_update_and_skip_unchanged(db):
+    first = [product("A-1", "a", images=["/a/1.jpg", "/a/2.jpg"]), product("B-1", "b")]
+    stats = load_catalog(db, first)
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (2, 0, 0)
+    assert stats["images_written"] == 2
+
+    stats = load_catalog(db, first)
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (0, 0, 2)
+    assert stats["images_written"] == stats["images_deleted"] == 0
+
+    second = [product("A-1", "a", price=1200, images=["/a/1.jpg"]), product("B-1", "b")]
+    stats = load_catalog(db, second)
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (0, 1, 1)
+    assert stats["images_deleted"] == 1
+    assert rows(db, "SELECT id, price FROM products WHERE sku = 'A-1'") == [("prod-A-1", 1200.0)]
+
+
+def test_deactivates_products_that_left_the_brand(db):
+    load_catalog(db, [product("A-1", "a"), product("B-1", "b"), product("O-1", "o", brand="Other")])
+    stats = load_catalog(db, [product("A-1", "a")])
+    assert stats["deactivated"] == 1
+    assert rows(db, "SELECT sku, is_active FROM products ORDER BY sku") == \
+        [("A-1", 1), ("B-1", 0), ("O-1", 1)]
+    assert product_slugs(db) == {"A-1": "a", "O-1": "o"}
+
+
+def test_swapped_and_taken_slugs(db):
+    load_catalog(db, [product("A-1", "a"), product("B-1", "b"), product("O-1", "c", brand="Other")])
+    # A and B swap slugs; C's slug belongs to a product outside the load
+    stats = load_catalog(db, [product("A-1", "b"), product("B-1", "a"), product("C-1", "c")])
+    assert stats["inserted"] == 1
+    assert product_slugs(db) == {"A-1": "b", "B-1": "a", "C-1": "c-c-1", "O-1": "c"}
+
+
+def test_skips_unknown_categories(db):
+    load_catalog(db, [product("A-1", "a")])
+    stats = load_catalog(db, [product("A-1", "a", category="cat-missing", price=5), product("B-1", "b")])
+    assert stats["skipped"] == 1
+    assert stats["unknown_categories"] == ["cat-missing"]
+    assert stats["inserted"] == 1
+    # the skipped product's row is left as it was
+    assert rows(db, "SELECT price, is_active FROM products WHERE sku = 'A-1'") == [(1000.0, 1)]
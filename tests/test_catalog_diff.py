@@ -0,0 +1,106 @@
+import os
+import random
+
+from catalog_binary import CatalogFileWriter, CatalogReader
+from catalog_diff import PatchBuilder, apply_patch, build_id, content_hash
+
+
+def write_build(path, records, key_field="sku"):
+    """Write records as the .bcat of one build; returns (build id, patch)."""
+    patches = PatchBuilder(path, key_field)
+    binary = CatalogFileWriter(path + ".new", [key_field])
+    for record in records:
+        patches.add(record)
+        binary.write(record)
+    result = patches.finish()
+    binary.close(patches.sections())
+    # the new file replaces the previous build, as in CatalogWriter.close
+    os.replace(path + ".new", path)
+    return result
+
+
+def catalog(n, rng):
+    return [{"sku": f"SKU-{i}", "name": f"Product {i}", "price": rng.randint(1000, 9000),
+             "color": rng.choice(["wenge", "white"])} for i in range(n)]
+
+
+def edit(records, rng):
+    new = [dict(r) for r in records]
+    for r in rng.sample(new, 5):
+        r["price"] += 100
+    for r in rng.sample(new, 2):
+        del r["color"]
+    del new[3]
+    new.insert(7, {"sku": "SKU-NEW-1", "name": "New", "price": 4999})
+    new.append({"sku": "SKU-NEW-2", "name": "Newer", "price": 5999})
+    return new
+
+
+def test_apply_patch_rebuilds_new_build(tmp_path):
+    rng = random.Random(3)
+    path = str(tmp_path / "products.bcat")
+    old = catalog(40, rng)
+    write_build(path, old)
+    new = edit(old, rng)
+
+    build, patch = write_build(path, new)
+    assert patch["to"] == build
+    assert len(patch["added"]) == 2
+    assert patch["removed"] == ["SKU-3"]
+    assert "order" not in patch
+    assert apply_patch(old, patch) == new
+
+
+def test_reordered_build(tmp_path):
+    rng = random.Random(5)
+    path = str(tmp_path / "products.bcat")
+    old = catalog(20, rng)
+    write_build(path, old)
+    new = list(reversed(old))
+
+    _, patch = write_build(path, new)
+    assert patch["order"] == [r["sku"] for r in new]
+    assert apply_patch(old, patch) == new
+
+
+def test_repeated_keys(tmp_path):
+    path = str(tmp_path / "products.bcat")
+    old = [{"sku": "A", "n": 1}, {"sku": "A", "n": 2}, {"sku": "B", "n": 3}]
+    write_build(path, old)
+    new = [{"sku": "A", "n": 1}, {"sku": "A", "n": 5}, {"sku": "B", "n": 3}]
+
+    _, patch = write_build(path, new)
+    assert patch["changed"] == {"A#2": {"set": {"n": 5}}}
+    assert apply_patch(old, patch) == new
+
+
+def test_unchanged_build_has_no_patch(tmp_path):
+    rng = random.Random(9)
+    path = str(tmp_path / "products.bcat")
+    old = catalog(10, rng)
+    first, _ = write_build(path, old)
+    second, patch = write_build(path, [dict(r) for r in old])
+    assert patch is None
+    assert first == second
+
+
+def test_first_build_has_no_patch(tmp_path):
+    build, patch = write_build(str(tmp_path / "products.bcat"), [{"sku": "A"}])
+    assert patch is None
+    assert build == build_id([("A", content_hash({"sku": "A"}))])
+
+
+def test_only_changed_records_are_decoded(tmp_path, monkeypatch):
+    rng = random.Random(11)
+    path = str(tmp_path / "products.bcat")
+    old = catalog(30, rng)
+    write_build(path, old)
+    new = [dict(r) for r in old]
+    new[4]["price"] += 1
+
+    decoded = []
+    get = CatalogReader.get
+    monkeypatch.setattr(CatalogReader, "get", lambda self, i: decoded.append(i) or get(self, i))
+    _, patch = write_build(path, new)
+    assert decoded == [4]
+    assert patch["changed"] == {"SKU-4": {"set": {"price": new[4]["price"]}}}
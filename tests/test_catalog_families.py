@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from catalog_transform import build_dimensions, family_records, prepare_skus, product_record, sku_rows
+
+CATEGORY_MAP = {"B-": {"id": "bedroom", "name": "Beds", "type": "bed"}}
+
+SKU_DF = pd.DataFrame({
+    "SKU Code": ["B-PL-WG", "B-PL-WH", "B-PL-BR", "B-MLT-QN", "TU-OL"],
+    "MTP SKU": ["B-PL", "B-PL", "B-PL", "B-MLT", np.nan],
+    "MTP Name": ["Pollo", "Pollo", "Pollo", "Maltein", "Oliver"],
+    " Child Color": ["Wenge", "White", "Brown Maple", "Wenge", np.nan],
+    "SKU Product Name": ["Pollo King Bed Wenge", "Pollo King Bed White", "Pollo King Bed Brown Maple",
+                         "Maltein Queen Bed", "Oliver TV Unit"],
+    "MRP": [24999, 24999, 26999, 18999, 7999],
+})
+DIM_DF = pd.DataFrame({"MTP SKU Code": ["B-PL"], "Lcm": [200], "Bcm": [150], "Hcm": [90], "PW(gm)": [45000]})
+
+IMAGES = {
+    "B-PL-WG": ["/p/pollo/wenge.jpg", "/p/pollo/side.jpg", "/p/pollo/room.jpg"],
+    "B-PL-WH": ["/p/pollo/white.jpg", "/p/pollo/side.jpg", "/p/pollo/room.jpg"],
+    "B-PL-BR": ["/p/pollo/side.jpg", "/p/pollo/brown.jpg", "/p/pollo/room.jpg"],
+    "B-MLT-QN": ["/p/maltein/front.jpg"],
+}
+
+
+def products():
+    rows = sku_rows(prepare_skus(SKU_DF, build_dimensions(DIM_DF), CATEGORY_MAP))
+    return [product_record(r, IMAGES.get(r["sku"], [])) for r in rows]
+
+
+def merge(family, variant):
+    """A variant's full record, as the docstring of family_record describes it."""
+    def deep(base, own):
+        out = dict(base)
+        for key, value in own.items():
+            out[key] = deep(base[key], value) if isinstance(value, dict) and isinstance(base.get(key), dict) \
+                else value
+        return out
+
+    base = {k: v for k, v in family.items() if k not in ("variants", "variantCount", "priceRange", "colors")}
+    record = deep(base, {k: v for k, v in variant.items() if k != "images"})
+    record["images"] = family["images"] + variant.get("images", [])
+    record["colors"] = [record["color"]]
+    return record
+
+
+def test_variants_round_trip():
+    originals = products()
+    families = family_records(originals)
+    assert [f["_id"] for f in families] == ["fam-B-PL", "fam-B-MLT", "fam-TU-OL"]
+    merged = [merge(f, v) for f in families for v in f["variants"]]
+    for original, record in zip(originals, merged):
+        # the gallery comes first
+        assert sorted(record.pop("images")) == sorted(original.pop("images"))
+        assert record == original
+
+
+def test_shared_fields_are_stored_once():
+    pollo = family_records(products())[0]
+    assert pollo["name"] == "Bluewud Pollo King Bed"
+    assert pollo["slug"] == "bluewud-pollo-king-bed"
+    assert pollo["variantCount"] == 3
+    assert pollo["priceRange"] == {"min": 24999, "max": 26999}
+    assert pollo["colors"] == ["Wenge", "White", "Brown Maple"]
+    assert pollo["images"] == ["/p/pollo/side.jpg", "/p/pollo/room.jpg"]
+    assert pollo["dimensions"] == {"length": 200, "width": 150, "height": 90}
+    # only what differs stays with a variant
+    assert pollo["variants"][0] == {
+        "_id": "prod-1", "sku": "B-PL-WG", "name": "Bluewud Pollo King Bed Wenge", "slug": "pollo-king-bed-wenge",
+        "description": pollo["variants"][0]["description"], "color": "Wenge", "images": ["/p/pollo/wenge.jpg"],
+        "thumbnail": "/p/pollo/wenge.jpg", "price": 24999, "originalPrice": 31248,
+        "rating": pollo["variants"][0]["rating"],
+        "reviewCount": pollo["variants"][0]["reviewCount"], "stock": pollo["variants"][0]["stock"],
+        "specifications": {"color": "Wenge"},
+    }
+    assert "brand" not in pollo["variants"][0] and pollo["brand"] == "Bluewud"
+    # a lone variant keeps the slug its product page has
+    maltein, oliver = family_records(products())[1:]
+    assert maltein["slug"] == "bluewud-maltein-queen-bed"
+    assert maltein["variants"][0]["slug"] == "maltein-queen-bed"
+    assert oliver["parentSku"] == "TU-OL" and oliver["variants"][0]["parentSku"] is None
+    assert len(json.dumps(pollo)) < len(json.dumps([p for p in products() if p["parentSku"] == "B-PL"]))
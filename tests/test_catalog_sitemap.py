@@ -0,0 +1,87 @@
+import os
+import re
+
+import catalog_paths
+import catalog_sitemap
+from catalog_sitemap import crm_modified_times, shard_bits, write_sitemap
+
+
+def products(n, **changes):
+    records = [{"sku": f"SKU-{i}", "slug": f"product-{i}", "categoryId": "living" if i % 2 else "bedroom",
+                "updatedAt": "2024-01-01T10:00:00"} for i in range(n)]
+    for i, fields in changes.items():
+        records[int(i[1:])].update(fields)
+    return records
+
+
+def shard_urls(public):
+    urls = {}
+    for name in os.listdir(public / "sitemaps"):
+        if name.startswith("products-"):
+            text = (public / "sitemaps" / name).read_text(encoding="utf-8")
+            urls[name] = re.findall(r"/products/([^<]+)</loc>", text)
+    return urls
+
+
+def test_shard_bits():
+    counts = [1] * (1 << catalog_sitemap.BUCKET_BITS)
+    sizes = [100] * len(counts)
+    assert shard_bits(counts, sizes) == 0
+    assert shard_bits(counts, sizes, max_urls=1000) == 3  # 4096 urls: 8 shards of 512
+    overhead = len(catalog_sitemap.URLSET_HEAD) + len(catalog_sitemap.URLSET_TAIL)
+    assert shard_bits(counts, sizes, max_bytes=2048 * 100 + overhead) == 1
+
+
+def test_shards_are_stable_and_within_limits(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_sitemap, "shard_bits",
+                        lambda counts, sizes: shard_bits(counts, sizes, max_urls=10))
+    public = tmp_path / "public"
+    stats = write_sitemap(products(50), str(public), lastmod={})
+    urls = shard_urls(public)
+    assert stats["urls"] == 50 and stats["shards"] == len(urls) >= 8
+    assert all(len(u) <= 10 for u in urls.values())
+    assert sorted(s for u in urls.values() for s in u) == sorted(f"product-{i}" for i in range(50))
+    index = (public / "sitemap.xml").read_text(encoding="utf-8")
+    assert index.count("<sitemap>") == len(urls) + 1
+
+    # record order does not matter, and an unchanged catalog rewrites nothing
+    assert write_sitemap(products(50)[::-1], str(public), lastmod={})["written"] == []
+    # one product's new lastmod rewrites its shard, the index, and pages.xml
+    # (its category's lastmod moved too)
+    edited = products(50, p7={"updatedAt": "2024-06-01"})
+    written = write_sitemap(edited, str(public), lastmod={})["written"]
+    shard = next(name for name, u in urls.items() if "product-7" in u)
+    assert written == [shard, "pages.xml", "sitemap.xml"]
+    assert shard_urls(public) == urls
+
+    # under the real limits one shard holds them all; the other files are removed
+    monkeypatch.setattr(catalog_sitemap, "shard_bits", shard_bits)
+    write_sitemap(products(50), str(public), lastmod={})
+    assert list(shard_urls(public)) == ["products-1.xml"]
+
+
+def test_served_slugs_and_repeats(tmp_path):
+    public = tmp_path / "public"
+    records = products(3, p1={"slug": "product-0"}, p2={"isActive": False})
+    write_sitemap(records, str(public), lastmod={"SKU-0": "2024-05-05"})
+    (urls,) = shard_urls(public).values()
+    assert sorted(urls) == ["product-0", "product-0-sku-1"]
+    text = (public / "sitemaps" / "products-1.xml").read_text(encoding="utf-8")
+    assert "<lastmod>2024-05-05</lastmod>" in text and "<lastmod>2024-01-01</lastmod>" in text
+
+    # with the database's slugs, products it does not serve are left out
+    write_sitemap(products(3), str(public), slugs={"SKU-2": "served-2"}, lastmod={})
+    assert list(shard_urls(public).values()) == [["served-2"]]
+
+
+def test_crm_modified_times(tmp_path):
+    path = tmp_path / "Productslist.csv"
+    path.write_text("Record Id,Product Code,Modified Time,Product Active\n"
+                    "1,sku-0 ,2024-03-01 10:00:00,true\n"
+                    "2,SKU-0,2024-04-01 09:00:00,false\n"
+                    "3,SKU-1,,true\n", encoding="utf-8")
+    assert crm_modified_times(str(path)) == {"SKU-0": "2024-04-01"}
+    assert crm_modified_times(str(tmp_path / "missing.csv")) == {}
+    # the build reads the export at a fixed path, not the current folder's
+    assert os.path.isabs(catalog_paths.CRM_EXPORT_PATH)
+    assert crm_modified_times.__defaults__ == (catalog_paths.CRM_EXPORT_PATH,)
@@ -0,0 +1,167 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from catalog_transform import build_dimensions, prepare_skus, product_record, sku_rows
+
+CATEGORY_MAP = {
+    "B-": {"id": "bedroom", "name": "Beds", "type": "bed"},
+    "BT-": {"id": "bedroom", "name": "Bedside Tables", "type": "bedside-table"},
+    "SR-": {"id": "decor", "name": "Shoe Racks", "type": "shoe-rack"},
+}
+
+# hash(sku) in the old loop; now a stable pseudo_value, so not compared
+PSEUDO_FIELDS = ("rating", "reviewCount", "stock")
+
+SKU_DF = pd.DataFrame({
+    "SKU Code": ["B-PL-WG", "BT-KL-WH", None, "SR-CLE-MF", "SR-CLE-W", "TU-OL", "B-MLT-QN", ""],
+    "MTP SKU": ["B-PL", "BT-KL", "B-PL", "SR-CLE", "SR-CLE", np.nan, "B-MLT", "B-PL"],
+    "MTP Name": ["Pollo", "Klaus", "Pollo", "Carlem", "Carlem", "Oliver", "Maltein", "Pollo"],
+    " Child Color": ["Wenge", np.nan, "Wenge", "Maple", "White", "Walnut", "Brown", "Wenge"],
+    "SKU Product Name": ["Pollo King Bed", "Bluewud Klaus Bedside Table", "Pollo Bed", "Carlem Shoe Rack!",
+                         "Carlem  Shoe_Rack", "Oliver TV Unit", np.nan, "Pollo Bed"],
+    "MRP": [24999, 0, 100, 1299.9, np.nan, -5, 999, 100],
+})
+
+DIM_DF = pd.DataFrame({
+    "MTP SKU Code": ["B-PL", "BT-KL", "SR-CLE", np.nan, "B-PL"],
+    "Lcm": [200, 45, 60, 10, 210.7],
+    "Bcm": [150, 40, 0, 10, 160],
+    "Hcm": [90, 55, 100, 10, 95],
+    "PW(gm)": [45000, 12345, np.nan, 10, 46005],
+})
+
+
+def find_images(sku, mtp_sku, product_name, color):
+    return [f"/products/{sku}.jpg"] if sku.startswith("SR-") else []
+
+
+def baseline_products(sku_df, dim_df):
+    """The iterrows loop generate_products.py had before the columnar transform."""
+    def get_category(sku):
+        for prefix, info in CATEGORY_MAP.items():
+            if sku.startswith(prefix):
+                return info
+        return {"id": "living-room", "name": "Furniture", "type": "furniture"}
+
+    def slugify(text):
+        if pd.isna(text):
+            return ""
+        text = str(text).lower().strip()
+        text = re.sub(r'[^\w\s-]', '', text)
+        return re.sub(r'[\s_-]+', '-', text)
+
+    dimensions_lookup = {}
+    for _, row in dim_df.iterrows():
+        mtp = row.get('MTP SKU Code', '')
+        if pd.notna(mtp):
+            ln, w, h = row.get('Lcm', 0), row.get('Bcm', 0), row.get('Hcm', 0)
+            wt = row.get('PW(gm)', 0)
+            dimensions_lookup[mtp] = {
+                'length': int(ln) if pd.notna(ln) and ln > 0 else None,
+                'width': int(w) if pd.notna(w) and w > 0 else None,
+                'height': int(h) if pd.notna(h) and h > 0 else None,
+                'weight': round(wt / 1000, 2) if pd.notna(wt) and wt > 0 else None,
+            }
+
+    products = []
+    product_id = 1
+    for _, row in sku_df.iterrows():
+        sku = row.get('SKU Code', '')
+        if pd.isna(sku) or not sku:
+            continue
+        mtp_sku, mtp_name = row.get('MTP SKU', ''), row.get('MTP Name', '')
+        color, name, mrp = row.get(' Child Color', ''), row.get('SKU Product Name', ''), row.get('MRP', 0)
+        if pd.isna(name) or not name:
+            continue
+
+        cat = get_category(sku)
+        dims = dimensions_lookup.get(mtp_sku, {}) if pd.notna(mtp_sku) else {}
+        dimensions = {'length': dims.get('length'), 'width': dims.get('width'), 'height': dims.get('height')}
+        weight = dims.get('weight')
+        images = find_images(sku, mtp_sku, mtp_name, color)
+        price = int(mrp) if pd.notna(mrp) and mrp > 0 else 4999
+        dim_text = ""
+        if all(dimensions.values()):
+            dim_text = (f"\n\n**Dimensions:** {dimensions['length']}cm (L) × {dimensions['width']}cm (W)"
+                        f" × {dimensions['height']}cm (H)")
+        shown_color = color if pd.notna(color) else "Natural Wood"
+
+        products.append({
+            "_id": f"prod-{product_id}",
+            "name": f"Bluewud {name}" if "Bluewud" not in str(name) else str(name),
+            "slug": slugify(name),
+            "description": (f"Premium Bluewud {name} in {color if pd.notna(color) else 'Natural'}. "
+                            f"Crafted with high-quality engineered wood.{dim_text}"),
+            "categoryId": cat['id'],
+            "category": cat['name'],
+            "brand": "Bluewud",
+            "sku": sku,
+            "parentSku": mtp_sku if pd.notna(mtp_sku) else None,
+            "price": price,
+            "originalPrice": int(price * 1.25),
+            "discountPercentage": 20,
+            "color": shown_color,
+            "colors": [shown_color],
+            "sizes": ["Standard"],
+            "thumbnail": images[0] if images else "/images/placeholder-furniture.jpg",
+            "images": images if images else ["/images/placeholder-furniture.jpg"],
+            "dimensions": dimensions if any(dimensions.values()) else None,
+            "weight": weight,
+            "isActive": True,
+            "isFeatured": product_id <= 16,
+            "isNew": product_id % 5 == 0,
+            "tags": [cat['name'], "Bluewud", "Engineered Wood"],
+            "material": "Engineered Wood",
+            "finish": "Laminate",
+            "specifications": {
+                "material": "Engineered Wood",
+                "finish": "Laminate",
+                "style": "Modern",
+                "color": shown_color,
+                "dimensions": dimensions if any(v for v in dimensions.values() if v) else None,
+                "weight": f"{weight} kg" if weight else None,
+                "careInstructions": ["Wipe with dry cloth", "Avoid direct sunlight"],
+                "countryOfOrigin": "India",
+                "warranty": "1 Year Manufacturer Warranty",
+            },
+            "createdAt": "2024-01-15T00:00:00Z",
+            "updatedAt": "2024-12-01T00:00:00Z"
+        })
+        product_id += 1
+    return products
+
+
+def columnar_products(sku_df, dim_df):
+    """As generate_products.py builds them: prepare_skus, then one record per row."""
+    df = prepare_skus(sku_df, build_dimensions(dim_df), CATEGORY_MAP)
+    products = []
+    for r in sku_rows(df):
+        products.append(product_record(r, find_images(r["sku"], r["mtp_sku"], r["mtp_name"], r["color_raw"])))
+    return products
+
+
+def test_columnar_transform_matches_iterrows_loop():
+    expected = baseline_products(SKU_DF, DIM_DF)
+    actual = columnar_products(SKU_DF, DIM_DF)
+    assert [p["sku"] for p in actual] == ["B-PL-WG", "BT-KL-WH", "SR-CLE-MF", "SR-CLE-W", "TU-OL"]
+    for p in actual:
+        for field in PSEUDO_FIELDS:
+            p.pop(field)
+    assert actual == expected
+    # the same JSON types, not just equal values (numpy ints would not serialize)
+    assert [type(p["price"]) for p in actual] == [int] * len(actual)
+    assert type(actual[0]["dimensions"]["length"]) is int
+
+
+def test_missing_columns_fall_back_like_row_get():
+    sku_df = SKU_DF.drop(columns=[" Child Color", "MRP"])
+    dim_df = DIM_DF.drop(columns=["PW(gm)"])
+    actual = columnar_products(sku_df, dim_df)
+    expected = baseline_products(sku_df.assign(**{" Child Color": "", "MRP": 0}), dim_df.assign(**{"PW(gm)": 0}))
+    for p in actual:
+        for field in PSEUDO_FIELDS:
+            p.pop(field)
+    assert [p["price"] for p in actual] == [4999] * 5
+    assert actual == expected
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import catalog_watch
+import catalog_writer
+from catalog_watch import Debouncer, relevant
+from catalog_writer import CatalogWriter
+
+
+def test_relevant(tmp_path):
+    images, workbook = tmp_path / "products", tmp_path / "masters" / "SKU Master.xlsx"
+    (images / "pollo").mkdir(parents=True)
+    assert relevant(str(workbook), str(images), [str(workbook)])
+    assert relevant(str(images / "pollo" / "B-PL.JPG"), str(images), [])
+    assert relevant(str(images / "pollo"), str(images), [])
+    assert relevant(str(images / "gone"), str(images), [], is_dir=True)  # deleted folder
+    assert not relevant(str(images / "pollo" / "notes.txt"), str(images), [])
+    assert not relevant(str(images / "pollo" / "B-PL.jpg.tmp"), str(images), [])
+    assert not relevant(str(workbook.parent / "~$SKU Master.xlsx"), str(images), [str(workbook)])
+    assert not relevant(str(tmp_path / "products2" / "B-PL.jpg"), str(images), [])
+
+
+def test_debouncer_waits_for_a_quiet_period():
+    debouncer = Debouncer(debounce=0.2, max_delay=5)
+    start = time.monotonic()
+
+    def burst():
+        for i in range(5):
+            debouncer.notify(f"img{i}.jpg")
+            time.sleep(0.05)
+    threading.Thread(target=burst).start()
+    paths = debouncer.wait()
+    assert paths == {f"img{i}.jpg" for i in range(5)}
+    assert time.monotonic() - start >= 0.2 + 4 * 0.05
+
+
+def test_debouncer_gives_up_waiting_after_max_delay():
+    debouncer = Debouncer(debounce=0.2, max_delay=0.5)
+    stop = threading.Event()
+
+    def stream():
+        while not stop.is_set():
+            debouncer.notify("img.jpg")
+            time.sleep(0.05)
+    threading.Thread(target=stream, daemon=True).start()
+    start = time.monotonic()
+    try:
+        assert debouncer.wait() == {"img.jpg"}
+        assert time.monotonic() - start < 2
+    finally:
+        stop.set()
+
+
+class Stop(Exception):
+    pass
+
+
+def test_poll_notices_changes(tmp_path, monkeypatch):
+    images, workbook = tmp_path / "products", tmp_path / "master.xlsx"
+    (images / "pollo").mkdir(parents=True)
+    workbook.write_bytes(b"v1")
+    notices = []
+
+    steps = [
+        lambda: None,
+        lambda: (images / "pollo" / "B-PL.jpg").write_bytes(b"x"),
+        lambda: (images / "pollo" / "notes.txt").write_bytes(b"x"),
+        lambda: workbook.write_bytes(b"version 2"),
+        lambda: (images / "maltein").mkdir(),
+    ]
+    seen = []
+
+    def sleep(_):
+        seen.append(sorted(notices))
+        notices.clear()
+        if not steps:
+            raise Stop
+        steps.pop(0)()
+
+    class Recorder:
+        def notify(self, path):
+            notices.append(os.path.relpath(path, tmp_path))
+
+    monkeypatch.setattr(catalog_watch, "time", SimpleNamespace(sleep=sleep))
+    monkeypatch.setattr(catalog_watch.image_manifest, "cached", lambda root: {})
+    with pytest.raises(Stop):
+        catalog_watch._poll(Recorder(), str(images), [str(workbook)], 0)
+    assert seen[1:] == [[], [os.path.join("products", "pollo")], [], ["master.xlsx"],
+                        ["products", os.path.join("products", "maltein")]]
+
+
+def published(out_dir):
+    return sorted(e for e in os.listdir(out_dir) if not e.startswith("."))
+
+
+def test_writer_publishes_in_one_step(tmp_path):
+    out, shards = str(tmp_path / "data"), str(tmp_path / "data" / "products")
+    os.makedirs(shards)
+
+    def build(records, check=None):
+        writer = CatalogWriter(out, "products", shards, "categoryId", search_fields=["name"], workers=1)
+        for r in records:
+            writer.write(r)
+        if check:
+            check()
+        return writer.close()
+
+    records = [{"sku": f"SKU-{i}", "slug": f"p-{i}", "name": f"Product {i}", "categoryId": "bedroom"}
+               for i in range(5)]
+    first = build(records)
+    with open(os.path.join(shards, "manifest.json"), 'r', encoding='utf-8') as f:
+        assert json.load(f) == first
+    assert os.path.isfile(os.path.join(shards, first["pages"][0]["file"]))
+
+    def nothing_published_yet():
+        # the new build is only staged: readers still see the first one
+        with open(os.path.join(out, "products.json"), 'r', encoding='utf-8') as f:
+            assert len(json.load(f)) == 5
+        with open(os.path.join(shards, "manifest.json"), 'r', encoding='utf-8') as f:
+            assert json.load(f)["build"] == first["build"]
+        assert sorted(os.listdir(os.path.join(shards, "builds"))) == \
+            sorted([first["build"], f".staging-{os.getpid()}"])
+
+    second = build(records + [dict(records[0], sku="SKU-5", slug="p-5")], nothing_published_yet)
+    assert second["build"] != first["build"] and second["total"] == 6
+    # the previous build stays for readers holding the old manifest
+    assert sorted(os.listdir(os.path.join(shards, "builds"))) == sorted([first["build"], second["build"]])
+    assert [e for e in os.listdir(out) if e.startswith(".")] == []
+    assert "products.json" in published(out) and "products.bcat" in published(out)
+
+    # the same content again reuses the published folder
+    assert build(records + [dict(records[0], sku="SKU-5", slug="p-5")])["build"] == second["build"]
+
+
+def test_abandoned_staging_folders_are_removed(tmp_path):
+    out, shards = str(tmp_path / "data"), str(tmp_path / "data" / "products")
+    old, recent = os.path.join(shards, "builds", ".staging-1"), os.path.join(shards, "builds", ".staging-2")
+    for folder in (old, recent):
+        os.makedirs(folder)
+    past = time.time() - catalog_writer.STAGING_MAX_AGE - 60
+    os.utime(old, (past, past))
+    CatalogWriter(out, "products", shards, "categoryId", workers=1).close()
+    assert not os.path.exists(old)
+    assert os.path.isdir(recent)  # may be another run's, still writing
@@ -0,0 +1,67 @@
+import csv
+
+import pytest
+
+from crm_dedup import dedup_export
+
+HEADER = ['Record Id', 'Modified Time', 'Product Code', 'Product Name', 'Unit Price', 'Product Active']
+ROWS = [
+    ['r1', '2024-01-01 10:00:00', 'BED-1', 'Pollo Bed', '24999', 'true'],
+    ['r2', '2024-03-01 10:00:00', 'BED-1', 'Pollo Bed (new)', '25999', 'true'],
+    ['r3', '2024-02-01 10:00:00', 'BED-1', 'Pollo Bed old', '23999', 'true'],
+    ['r4', '2024-01-05 10:00:00', 'TV-1', 'Oliver TV Unit', '9999', 'true'],
+    ['r5', '2024-01-06 10:00:00', 'TV-2', 'oliver tv-unit', '10999', 'true'],
+    ['r6', '2024-04-01 10:00:00', 'TV-1', 'Oliver TV Unit', '8999', 'false'],
+]
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / "Productslist.csv"
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(ROWS)
+    return str(path)
+
+
+def run(tmp_path, export, keep):
+    out, report = tmp_path / f"clean-{keep}.csv", tmp_path / f"report-{keep}.csv"
+    stats = dedup_export(str(out), str(report), keep=keep, path=export)
+    with open(out, 'r', encoding='utf-8', newline='') as f:
+        kept = [row['Record Id'] for row in csv.DictReader(f)]
+    with open(report, 'r', encoding='utf-8', newline='') as f:
+        reported = list(csv.DictReader(f))
+    return stats, kept, reported
+
+
+@pytest.mark.parametrize("keep, expected", [
+    ("first", ["r1", "r4", "r5"]),
+    ("last", ["r3", "r4", "r5"]),
+    ("modified", ["r2", "r4", "r5"]),
+])
+def test_keep_policies(tmp_path, export, keep, expected):
+    stats, kept, _ = run(tmp_path, export, keep)
+    assert kept == expected
+    assert stats["kept"] == 3
+    assert stats["rows"] == 5
+    assert stats["unique_codes"] == 3
+    assert stats["code_duplicates"] == 2
+
+
+def test_report_and_examples(tmp_path, export):
+    stats, _, reported = run(tmp_path, export, "first")
+    code_rows = [(r['Record Id'], r['Duplicate Of']) for r in reported if r['Reason'] == 'code']
+    name_rows = [(r['Record Id'], r['Duplicate Of']) for r in reported if r['Reason'] == 'name']
+    assert code_rows == [("r2", "r1"), ("r3", "r1")]
+    # names are compared casefolded with punctuation as spaces
+    assert name_rows == [("r5", "r4")]
+    assert stats["name_duplicates"] == 1
+    assert stats["code_examples"] == [["BED-1", "Pollo Bed (new)", "25999", "r1"],
+                                      ["BED-1", "Pollo Bed old", "23999", "r1"]]
+    assert stats["name_examples"] == [["TV-2", "oliver tv-unit", "10999", "r4"]]
+
+
+def test_unknown_policy(tmp_path, export):
+    with pytest.raises(ValueError):
+        dedup_export(str(tmp_path / "out.csv"), str(tmp_path / "report.csv"), keep="newest", path=export)
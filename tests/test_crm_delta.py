@@ -0,0 +1,89 @@
+import pandas as pd
+
+import crm_reader
+from crm_delta import DeltaStore
+
+
+def write_export(path, rows):
+    pd.DataFrame(rows, columns=['Record Id', 'Modified Time', 'Product Active', 'Product Name']) \
+        .to_csv(path, index=False)
+
+
+def names(rows):
+    return [str(row['Product Name']) for _, row in rows.iterrows()]
+
+
+def export(path, **changes):
+    rows = [[str(i), "2024-01-01", True, f"product {i}"] for i in range(20)]
+    for rid, name in changes.items():
+        rows[int(rid[1:])] = [rid[1:], "2024-02-01", True, name]
+    write_export(path, rows)
+
+
+def test_reader_holds_nothing_between_calls(tmp_path):
+    path = tmp_path / "Productslist.csv"
+    export(path)
+    first = crm_reader.read_products(str(path), columns=['Record Id', 'Product Name'])
+    first.loc[first.index[0], 'Product Name'] = "edited"
+    export(path, r0="renamed")
+    again = crm_reader.read_products(str(path), columns=['Record Id', 'Product Name'])
+    assert again['Product Name'].iloc[0] == "renamed"
+    assert not hasattr(crm_reader, "_frames")
+
+
+def test_chunked_update_matches_diff_and_apply(tmp_path, monkeypatch):
+    monkeypatch.setattr(crm_reader, "PROBE_ROWS", 3)
+    path = str(tmp_path / "Productslist.csv")
+    whole = DeltaStore("whole", state_dir=str(tmp_path))
+    chunked = DeltaStore("chunked", state_dir=str(tmp_path))
+
+    def run(**changes):
+        export(path, **changes)
+        df = crm_reader.read_products(path, active_only=False)
+        changed, deleted = whole.diff(df)
+        whole.apply(changed, deleted, names(changed), order=df['Record Id'].astype(str))
+        # a tiny budget so the export arrives in several chunks
+        chunks = crm_reader.iter_chunks(path, active_only=False, max_memory_mb=0.0001)
+        touched, gone = chunked.update(chunks, names)
+        assert sorted(touched) == sorted(changed['Record Id'].astype(str))
+        assert sorted(gone) == sorted(deleted)
+        assert chunked.rows == whole.rows and list(chunked.rows) == list(whole.rows)
+        assert chunked.stats == whole.stats
+
+    run()
+    run(r4="renamed", r17="renamed too")
+    assert whole.stats == {"new": 0, "changed": 2, "deleted": 0, "unchanged": 18}
+
+    # a deleted row and a new one in the middle of the export
+    rows = [[str(i), "2024-01-01", True, f"product {i}"] for i in range(20) if i != 9]
+    rows.insert(5, ["99", "2024-03-01", True, "new product"])
+    write_export(path, rows)
+    df = crm_reader.read_products(path, active_only=False)
+    changed, deleted = whole.diff(df)
+    whole.apply(changed, deleted, names(changed), order=df['Record Id'].astype(str))
+    touched, gone = chunked.update(crm_reader.iter_chunks(path, active_only=False,
+                                                          max_memory_mb=0.0001), names)
+    assert touched == ["4", "99", "17"] and gone == ["9"]
+    assert list(chunked.rows) == list(whole.rows) == [r[0] for r in rows]
+    assert chunked.rows == whole.rows
+
+
+def test_values_of_other_code_are_dropped(tmp_path):
+    path = str(tmp_path / "Productslist.csv")
+    export(path)
+    df = crm_reader.read_products(path, active_only=False)
+
+    def derive(version):
+        store = DeltaStore("names", version, state_dir=str(tmp_path))
+        changed, deleted = store.diff(df)
+        store.apply(changed, deleted, names(changed))
+        store.save()
+        return store.stats
+
+    assert derive("1")["new"] == 20
+    assert derive("1") == {"new": 0, "changed": 0, "deleted": 0, "unchanged": 20}
+    assert derive("2")["new"] == 20
+    # a state file from before versions were stored
+    with open(tmp_path / "names.json", 'w', encoding='utf-8') as f:
+        f.write('{"0": {"modified": "2024-01-01", "value": "product 0"}}')
+    assert derive("2")["new"] == 20
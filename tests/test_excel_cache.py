@@ -0,0 +1,117 @@
+import os
+import shutil
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import excel_cache
+from excel_cache import CachedWorkbook, read_snapshot
+
+DTYPES = {"SKU Code": "string", "MRP": "float64", "Not In Sheet": "string"}
+
+
+def workbook(path, rows=30):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"SKU Code": [f"SKU-{i}" for i in range(rows)], "MRP": range(rows)}) \
+            .to_excel(writer, sheet_name="Master", index=False)
+        pd.DataFrame({"a": [1, 2], "b": ["x", None]}).to_excel(writer, sheet_name="Notes", index=False)
+    return str(path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """The pd.read_excel calls made during the test."""
+    calls, read_excel = [], pd.read_excel
+
+    def counting(*args, **kwargs):
+        calls.append(kwargs)
+        return read_excel(*args, **kwargs)
+    monkeypatch.setattr(pd, "read_excel", counting)
+    monkeypatch.setattr(excel_cache, "_snapshots", {})
+    return calls
+
+
+def test_sheets_are_parsed_once(tmp_path, monkeypatch):
+    path, cache = workbook(tmp_path / "report.xlsx"), str(tmp_path / "cache")
+    with CachedWorkbook(path, cache) as wb:
+        assert wb.sheets == [{"name": "Master", "rows": 31, "cols": 2}, {"name": "Notes", "rows": 3, "cols": 2}]
+        master = wb.read("Master")
+        pdt.assert_frame_equal(master, pd.read_excel(path, sheet_name="Master"))
+
+    monkeypatch.setattr(pd, "ExcelFile", None)  # a second run only loads from disk
+    with CachedWorkbook(path, cache) as wb:
+        pdt.assert_frame_equal(wb.read("Master"), master)
+        pdt.assert_frame_equal(wb.read("Master", nrows=5), master.head(5))
+        assert wb.sheetnames == ["Master", "Notes"]
+
+
+def test_previews_parse_only_the_first_rows(tmp_path, monkeypatch):
+    path, cache = workbook(tmp_path / "report.xlsx"), str(tmp_path / "cache")
+    with CachedWorkbook(path, cache) as wb:
+        head = wb.read("Master", nrows=10)
+        pdt.assert_frame_equal(head, pd.read_excel(path, sheet_name="Master", nrows=10))
+        assert sorted(os.listdir(wb.dir)) == ["sheet0-rows10.parquet", "sheets.json", "source.json"]
+
+    monkeypatch.setattr(pd, "ExcelFile", None)
+    with CachedWorkbook(path, cache) as wb:
+        pdt.assert_frame_equal(wb.read("Master", nrows=10), head)
+
+
+def test_old_versions_are_pruned(tmp_path):
+    cache = str(tmp_path / "cache")
+    first = workbook(tmp_path / "report.xlsx")
+    copy = str(tmp_path / "copy.xlsx")
+    shutil.copyfile(first, copy)
+    old = CachedWorkbook(first, cache).dir
+    assert CachedWorkbook(copy, cache).dir == old  # same content, one folder
+
+    workbook(first, rows=40)
+    new = CachedWorkbook(first, cache).dir
+    assert new != old and os.path.isdir(old)  # still copy.xlsx's current version
+    assert excel_cache._sources(old) == [os.path.abspath(copy)]
+
+    workbook(copy, rows=50)
+    CachedWorkbook(copy, cache)
+    assert not os.path.exists(old)
+    assert sorted(os.listdir(cache)) == sorted([os.path.basename(new), excel_cache.file_hash(copy)])
+
+
+def test_dimensions_of_sheets_saved_without_a_size():
+    class Sheet:
+        max_row = max_column = None
+
+        def calculate_dimension(self, force=False):
+            assert force
+            self.max_row, self.max_column = 12, 931
+
+    assert excel_cache._dimensions(Sheet()) == (12, 931)
+
+
+def test_snapshot_keeps_declared_columns_and_dtypes(tmp_path, parses):
+    path, cache = workbook(tmp_path / "master.xlsx"), str(tmp_path / "cache")
+    df = read_snapshot(path, DTYPES, cache_dir=cache)
+    assert list(df.columns) == ["SKU Code", "MRP"]
+    assert df["MRP"].dtype == "float64" and df["SKU Code"].dtype == "string"
+    assert df["SKU Code"].iloc[3] == "SKU-3"
+    assert len(parses) == 1
+
+
+def test_snapshot_is_reused(tmp_path, parses, monkeypatch):
+    path, cache = workbook(tmp_path / "master.xlsx"), str(tmp_path / "cache")
+    first = read_snapshot(path, DTYPES, cache_dir=cache)
+    # in process: callers get their own copy
+    first.loc[0, "MRP"] = -1
+    assert read_snapshot(path, DTYPES, cache_dir=cache).loc[0, "MRP"] == 0
+    # a new process: loaded from the cache folder
+    monkeypatch.setattr(excel_cache, "_snapshots", {})
+    again = read_snapshot(path, DTYPES, cache_dir=cache)
+    assert again["SKU Code"].dtype == "string" and again["MRP"].tolist() == list(range(30))
+    assert len(parses) == 1
+
+    # other settings or a changed file parse again
+    read_snapshot(path, DTYPES, header=1, cache_dir=cache)
+    assert len(parses) == 2
+    workbook(path, rows=40)
+    assert len(read_snapshot(path, DTYPES, cache_dir=cache)) == 40
+    assert len(parses) == 3
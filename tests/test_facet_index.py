@@ -0,0 +1,60 @@
+import json
+import random
+
+from facet_index import FacetIndex, FacetIndexBuilder, bucket_label, decode_bitmap, encode_bitmap
+
+RECORDS = [
+    {"categoryId": "bedroom", "color": "Wenge", "price": 24999, "dimensions": {"length": 210}},
+    {"categoryId": "bedroom", "color": "White", "price": 18999, "dimensions": {"length": 195}},
+    {"categoryId": "living", "color": "White", "price": 9999},
+    {"categoryId": "living", "color": ["Wenge", "White"], "price": 4999, "dimensions": {"length": 120}},
+    {"categoryId": "storage", "color": "", "price": 45000},
+]
+
+
+def index(tmp_path):
+    builder = FacetIndexBuilder()
+    for record in RECORDS:
+        builder.add(record)
+    path = tmp_path / "facets.json"
+    path.write_text(json.dumps(builder.build()), encoding="utf-8")
+    return FacetIndex.load(str(path))
+
+
+def test_select(tmp_path):
+    facets = index(tmp_path)
+    assert facets.select({}) == [0, 1, 2, 3, 4]
+    assert facets.select({"category": ["bedroom"]}) == [0, 1]
+    # OR within a facet, AND across facets
+    assert facets.select({"category": ["bedroom", "living"], "color": ["White"]}) == [1, 2, 3]
+    assert facets.select({"price": ["40000+"]}) == [4]
+    assert facets.select({"length": ["200+"], "color": ["Wenge"]}) == [0]
+    assert facets.select({"color": ["Teak"]}) == []
+
+
+def test_facet_counts(tmp_path):
+    facets = index(tmp_path)
+    assert facets.facet_counts({})["category"] == {"bedroom": 2, "living": 2, "storage": 1}
+    counts = facets.facet_counts({"category": ["living"]})
+    # a facet's own selection does not narrow its counts
+    assert counts["category"] == {"bedroom": 2, "living": 2, "storage": 1}
+    assert counts["color"] == {"White": 2, "Wenge": 1}
+    assert counts["price"] == {"0-5000": 1, "5000-10000": 1, "10000-20000": 0, "20000-40000": 0,
+                               "40000+": 0}
+
+
+def test_bucket_label():
+    edges = [0, 5000, 10000]
+    assert bucket_label(0, edges) == "0-5000"
+    assert bucket_label(5000, edges) == "5000-10000"
+    assert bucket_label(10**6, edges) == "10000+"
+    assert bucket_label(-1, edges) is None
+
+
+def test_bitmap_encodings_round_trip():
+    rng = random.Random(1)
+    for size in (1, 7, 64, 1000):
+        for density in (0.01, 0.5, 0.99):
+            bits = sum(1 << i for i in range(size) if rng.random() < density)
+            assert decode_bitmap(encode_bitmap(bits, size)) == bits
+    assert "runs" in encode_bitmap((1 << 500) - 1, 500)
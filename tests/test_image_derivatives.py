@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import pytest
+
+import image_derivatives
+from image_derivatives import build_derivatives
+
+pytestmark = pytest.mark.skipif(image_derivatives.Image is None, reason="Pillow is not installed")
+
+
+def build(tmp_path, urls, capsys):
+    results = build_derivatives(urls, str(tmp_path / "public"), str(tmp_path / "public" / "derived"),
+                                workers=1, hash_cache=str(tmp_path / "hashes.json"))
+    return results, capsys.readouterr().out.strip()
+
+
+def derived_files(tmp_path):
+    root = tmp_path / "public" / "derived"
+    return {os.path.relpath(os.path.join(d, f), root): os.stat(os.path.join(d, f)).st_mtime_ns
+            for d, _, files in os.walk(root) for f in files}
+
+
+@pytest.fixture
+def public(tmp_path):
+    Image = image_derivatives.Image
+    folder = tmp_path / "public" / "products" / "pollo"
+    folder.mkdir(parents=True)
+    Image.new("RGB", (300, 200), (120, 60, 20)).save(folder / "B-PL-WG.jpg")
+    Image.new("RGBA", (1600, 900), (10, 200, 30, 128)).save(folder / "B-PL-WH.png")
+    return folder
+
+
+def test_sizes_and_urls(tmp_path, public, capsys):
+    results, out = build(tmp_path, ["/products/pollo/B-PL-WG.jpg", "/products/pollo/B-PL-WH.png"], capsys)
+    assert out == "Image derivatives: 2 encoded or rehashed, 0 cached, 0 failed"
+    small, large = results["/products/pollo/B-PL-WG.jpg"], results["/products/pollo/B-PL-WH.png"]
+    digest = image_derivatives.source_digest(str(public / "B-PL-WG.jpg"))
+
+    # never upscaled: a 300px source has a 240px thumbnail and is its own card and zoom
+    assert (small["width"], small["height"]) == (300, 200)
+    assert small["webp"] == {"thumbnail": f"/derived/{digest[:2]}/{digest}-240.webp",
+                             "card": f"/derived/{digest[:2]}/{digest}-300.webp",
+                             "zoom": f"/derived/{digest[:2]}/{digest}-300.webp"}
+    assert small["srcset"]["jpeg"] == (f"/derived/{digest[:2]}/{digest}-240.jpg 240w, "
+                                       f"/derived/{digest[:2]}/{digest}-300.jpg 300w")
+    assert large["jpeg"]["zoom"].endswith("-1200.jpg")
+    assert len(derived_files(tmp_path)) == 2 + 2 * 2 + 3 * 2  # two .json, then widths x formats
+    Image = image_derivatives.Image
+    with Image.open(tmp_path / "public" / large["jpeg"]["card"].lstrip("/")) as im:
+        assert im.size == (480, 270) and im.mode == "RGB"
+
+
+def test_renamed_and_copied_images_are_not_encoded_again(tmp_path, public, capsys):
+    urls = ["/products/pollo/B-PL-WG.jpg", "/products/pollo/B-PL-WH.png"]
+    first, _ = build(tmp_path, urls, capsys)
+    written = derived_files(tmp_path)
+
+    again, out = build(tmp_path, urls, capsys)
+    assert again == first
+    assert out == "Image derivatives: 0 encoded or rehashed, 2 cached, 0 failed"
+
+    (public.parent / "pollo-wenge").mkdir()
+    shutil.copy2(public / "B-PL-WG.jpg", public.parent / "pollo-wenge" / "front.jpg")
+    os.rename(public / "B-PL-WH.png", public / "white.png")
+    moved = ["/products/pollo-wenge/front.jpg", "/products/pollo/white.png", "/products/pollo/B-PL-WG.jpg"]
+    results, out = build(tmp_path, moved, capsys)
+    assert out == "Image derivatives: 2 encoded or rehashed, 1 cached, 0 failed"
+    assert results["/products/pollo-wenge/front.jpg"] == first["/products/pollo/B-PL-WG.jpg"]
+    assert results["/products/pollo/white.png"] == first["/products/pollo/B-PL-WH.png"]
+    # the new paths were only hashed: every derivative file is the one written first
+    assert derived_files(tmp_path) == written
+
+
+def test_unreadable_images_are_skipped_until_they_change(tmp_path, public, capsys):
+    (public / "broken.jpg").write_bytes(b"not a jpeg")
+    urls = ["/products/pollo/broken.jpg", "/products/pollo/missing.jpg"]
+    results, out = build(tmp_path, urls, capsys)
+    assert results == {} and out.endswith("0 cached, 1 failed")
+    _, out = build(tmp_path, urls, capsys)
+    assert out == "Image derivatives: 0 encoded or rehashed, 0 cached, 0 failed"
+
+    shutil.copy2(public / "B-PL-WG.jpg", public / "broken.jpg")
+    results, _ = build(tmp_path, urls, capsys)
+    assert list(results) == ["/products/pollo/broken.jpg"]
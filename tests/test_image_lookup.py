@@ -0,0 +1,67 @@
+import random
+
+from image_lookup import build_folder_lookup, match_folder_images
+
+
+def baseline_match(folder_index, name_lower, color_lower):
+    """The folder fallback of find_images before the trigram index."""
+    images = []
+    potential_folders = []
+    for folder in folder_index:
+        matches = sum(1 for part in name_lower.split() if len(part) > 3 and part in folder)
+        if matches > 0:
+            potential_folders.append((folder, matches))
+    potential_folders.sort(key=lambda x: x[1], reverse=True)
+
+    for folder, _ in potential_folders:
+        folder_imgs = folder_index[folder]
+        if color_lower:
+            color_matches = [img for img in folder_imgs
+                             if color_lower in img.lower() or color_lower.replace(" ", "") in img.lower()]
+            if color_matches:
+                for img in color_matches:
+                    if img not in images:
+                        images.append(img)
+                continue
+        for img in folder_imgs[:5]:
+            if img not in images:
+                images.append(img)
+    return images[:8]
+
+
+WORDS = ["maltein", "carlem", "oliver", "pollo", "queen", "king", "storage", "shoe", "rack",
+         "bed", "wardrobe", "tv unit", "study", "table"]
+COLORS = ["wenge", "brown maple", "white", "beige", ""]
+
+
+def random_folder_index(rng):
+    index = {}
+    for _ in range(60):
+        folder = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        index[folder] = [f"/images/{folder}/{rng.choice(COLORS).replace(' ', '') or 'plain'}-{i}.jpg"
+                         for i in range(rng.randint(1, 9))]
+    return index
+
+
+def test_matches_baseline_ranking():
+    rng = random.Random(7)
+    for _ in range(20):
+        folder_index = random_folder_index(rng)
+        lookup = build_folder_lookup(folder_index)
+        for _ in range(30):
+            name = " ".join(rng.sample(WORDS, rng.randint(1, 4)))
+            color = rng.choice(COLORS)
+            assert match_folder_images(lookup, name, color) == baseline_match(folder_index, name, color)
+
+
+def test_memoized_ranks_stay_equal():
+    folder_index = {"carlem shoe rack": ["/a/wenge-1.jpg", "/a/white-1.jpg"], "carlem bed": ["/b/1.jpg"]}
+    lookup = build_folder_lookup(folder_index)
+    first = match_folder_images(lookup, "carlem shoe rack", "white")
+    assert first == ["/a/white-1.jpg", "/b/1.jpg"]
+    assert match_folder_images(lookup, "carlem shoe rack", "white") == first
+
+
+def test_short_parts_do_not_match():
+    lookup = build_folder_lookup({"tv unit": ["/tv/1.jpg"]})
+    assert match_folder_images(lookup, "tv", "") == []
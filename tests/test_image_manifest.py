@@ -0,0 +1,82 @@
+import os
+
+import image_manifest
+
+OLD = 1_600_000_000  # well before MTIME_SLACK_NS
+
+
+def touch(path, mtime=OLD):
+    os.utime(path, (mtime, mtime))
+
+
+def tree(root):
+    for rel in ("beds/pollo", "beds/maltein", "racks"):
+        os.makedirs(root / rel)
+    for rel in ("beds/pollo/B-PL-WG.jpg", "beds/pollo/notes.txt", "beds/maltein/B-MLT.png",
+                "racks/SR-CLE.webp", "top.JPG"):
+        (root / rel).write_bytes(b"x")
+    for rel in ("beds/pollo", "beds/maltein", "beds", "racks", ""):
+        touch(root / rel)
+
+
+def load(root, cache, capsys):
+    manifest = image_manifest.load_manifest(str(root), str(cache))
+    return manifest, capsys.readouterr().out.strip()
+
+
+def walked(root, manifest):
+    return sorted((os.path.relpath(d, root), sorted(files))
+                  for d, files in image_manifest.walk(str(root), manifest=manifest))
+
+
+def test_walk_matches_os_walk(tmp_path, capsys):
+    root, cache = tmp_path / "products", tmp_path / "manifest.json"
+    tree(root)
+    manifest, out = load(root, cache, capsys)
+    assert out == "Image manifest: 5 dirs scanned, 0 reused"
+    expected = sorted((os.path.relpath(d, root),
+                       sorted(f for f in files if f.lower().endswith(image_manifest.IMAGE_EXTS)))
+                      for d, _, files in os.walk(root))
+    assert walked(root, manifest) == expected
+
+
+def test_only_changed_directories_are_rescanned(tmp_path, capsys):
+    root, cache = tmp_path / "products", tmp_path / "manifest.json"
+    tree(root)
+    first, _ = load(root, cache, capsys)
+    again, out = load(root, cache, capsys)
+    assert out == "Image manifest: 0 dirs scanned, 5 reused"
+    assert again == first
+
+    # a new image and a removed folder
+    (root / "racks" / "SR-CLE-W.jpg").write_bytes(b"x")
+    touch(root / "racks", OLD + 60)
+    for name in os.listdir(root / "beds" / "maltein"):
+        os.remove(root / "beds" / "maltein" / name)
+    os.rmdir(root / "beds" / "maltein")
+    touch(root / "beds", OLD + 60)
+    manifest, out = load(root, cache, capsys)
+    assert out == "Image manifest: 2 dirs scanned, 2 reused"
+    assert sorted(manifest["racks"]["files"]) == ["SR-CLE-W.jpg", "SR-CLE.webp"]
+    assert "beds/maltein" not in manifest
+    # the removal was saved
+    assert "beds/maltein" not in image_manifest.cached(str(root), str(cache))
+
+
+def test_recently_modified_directories_are_not_trusted(tmp_path, capsys):
+    root, cache = tmp_path / "products", tmp_path / "manifest.json"
+    tree(root)
+    os.utime(root / "racks")  # now: within the mtime slack
+    manifest, _ = load(root, cache, capsys)
+    assert manifest["racks"]["mtime"] is None
+    _, out = load(root, cache, capsys)
+    assert out == "Image manifest: 1 dirs scanned, 4 reused"
+
+
+def test_cache_of_another_root_is_ignored(tmp_path, capsys):
+    root, cache = tmp_path / "products", tmp_path / "manifest.json"
+    tree(root)
+    load(root, cache, capsys)
+    assert image_manifest.cached(str(tmp_path / "elsewhere"), str(cache)) == {}
+    cache.write_text("not json", encoding="utf-8")
+    assert image_manifest.cached(str(root), str(cache)) == {}
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+import image_similarity
+from image_similarity import BKTree, SimilarityMatcher, dhash, image_hashes
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(3)
+    base = [rng.getrandbits(64) for _ in range(20)]
+    # clusters of near hashes, plus exact repeats
+    hashes = [h ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for h in base for _ in range(10)]
+    hashes += base[:5]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+    for radius in (0, 2, 4, 10, 64):
+        for q in base + [rng.getrandbits(64)]:
+            expected = sorted((distance(q, h), i) for i, h in enumerate(hashes) if distance(q, h) <= radius)
+            assert sorted(tree.query(q, radius)) == expected
+    assert BKTree().query(0, 64) == []
+
+
+def test_matcher_ranks_unclaimed_near_images():
+    parent = 0xF0F0F0F0F0F0F0F0
+    hashes = {
+        "/products/pollo/B-PL.jpg": parent,                # found by filename
+        "/products/pollo/side.jpg": parent ^ 0b1,          # 1 bit away
+        "/products/pollo/front wenge.jpg": parent ^ 0b111,  # 3 bits, mentions the color
+        "/products/pollo/B-PL-WH.jpg": parent ^ 0b11,      # another variant's own image
+        "/products/pollo/far.jpg": parent ^ ((1 << 20) - 1),
+    }
+    matcher = SimilarityMatcher(hashes, {"B-PL": ["/products/pollo/B-PL.jpg", "/not/hashed.jpg"]},
+                                claimed=["/products/pollo/B-PL.jpg", "/products/pollo/B-PL-WH.jpg"])
+    assert matcher.match("B-PL", "Wenge") == ["/products/pollo/front wenge.jpg", "/products/pollo/side.jpg"]
+    assert matcher.match("B-PL", None) == ["/products/pollo/side.jpg", "/products/pollo/front wenge.jpg"]
+    assert matcher.match("B-PL", "", limit=1) == ["/products/pollo/side.jpg"]
+    assert matcher.match("B-MLT", "Wenge") == []
+
+
+@pytest.mark.skipif(image_similarity.Image is None, reason="Pillow is not installed")
+def test_hashes_find_edited_copies_and_are_cached(tmp_path, capsys):
+    Image = image_similarity.Image
+    folder = tmp_path / "public" / "products"
+    folder.mkdir(parents=True)
+    photo = Image.new("L", (64, 48))
+    photo.putdata([(x * 4 + (y // 12) * 40) % 256 for y in range(48) for x in range(64)])
+    photo.convert("RGB").save(folder / "B-PL.png")
+    photo.resize((128, 96)).convert("RGB").save(folder / "big.jpg", quality=70)
+    photo.transpose(Image.Transpose.FLIP_LEFT_RIGHT).convert("RGB").save(folder / "mirrored.png")
+    (folder / "broken.jpg").write_bytes(b"not an image")
+
+    urls = ["/products/B-PL.png", "/products/big.jpg", "/products/mirrored.png", "/products/broken.jpg"]
+    cache = str(tmp_path / "phash.json")
+    hashes = image_hashes(urls, str(tmp_path / "public"), 1, cache)
+    assert sorted(hashes) == sorted(urls[:3])
+    assert hashes["/products/B-PL.png"] == dhash(str(folder / "B-PL.png"))
+    assert distance(hashes["/products/B-PL.png"], hashes["/products/big.jpg"]) <= image_similarity.RADIUS
+    assert distance(hashes["/products/B-PL.png"], hashes["/products/mirrored.png"]) > image_similarity.RADIUS
+    assert capsys.readouterr().out.strip() == "Perceptual hashes: 4 computed, 0 cached"
+
+    assert image_hashes(urls, str(tmp_path / "public"), 1, cache) == hashes
+    assert capsys.readouterr().out.strip() == "Perceptual hashes: 0 computed, 4 cached"
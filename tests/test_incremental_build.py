@@ -0,0 +1,90 @@
+import json
+import os
+
+import pandas as pd
+
+from catalog_writer import CatalogWriter
+from incremental_build import IncrementalBuild, fingerprint
+
+
+def make_record(row):
+    make_record.calls += 1
+    return {"sku": row["sku"], "slug": row["sku"].lower(), "name": row["name"].title(),
+            "price": int(row["price"]), "categoryId": row["category"]}
+
+
+def run(cache_dir, out_dir, rows, version="1"):
+    """A small pipeline shaped like generate_products.main; returns the written catalog."""
+    make_record.calls = 0
+    build = IncrementalBuild(cache_dir, version)
+    table = build.stage("rows", [rows], lambda: rows.sort_values("sku", kind="stable"))
+    if table is None:
+        table = rows.sort_values("sku", kind="stable")
+    items = [(fingerprint(row.to_dict()), row) for _, row in table.iterrows()]
+    products = build.records("records", items, make_record)
+
+    def write():
+        writer = CatalogWriter(out_dir, "products", os.path.join(out_dir, "products"), "categoryId",
+                               search_fields=["name", "sku"], workers=1)
+        for p in products:
+            writer.write(p)
+        writer.close()
+
+    build.stage("output", [build.current["records"]], write, persist=False,
+                outputs=[os.path.join(out_dir, "products.json")])
+    build.save()
+    with open(os.path.join(out_dir, "products.json"), 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    with open(os.path.join(out_dir, "products", "manifest.json"), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return catalog, manifest, build.report
+
+
+def frame(prices):
+    return pd.DataFrame({"sku": [f"SKU-{i}" for i in range(len(prices))],
+                         "name": [f"product {i}" for i in range(len(prices))],
+                         "price": prices,
+                         "category": ["bedroom" if i % 2 else "living" for i in range(len(prices))]})
+
+
+def test_warm_build_matches_cold_build(tmp_path):
+    warm_cache, warm_out = str(tmp_path / "warm-cache"), str(tmp_path / "warm")
+    run(warm_cache, warm_out, frame([1000 + i for i in range(20)]))
+
+    changed = frame([1000 + i for i in range(20)])
+    changed.loc[3, "price"] = 5
+    warm, warm_manifest, report = run(warm_cache, warm_out, changed)
+    assert report["records"]["records"] == {"reused": 19, "rebuilt": 1}
+
+    cold, cold_manifest, _ = run(str(tmp_path / "cold-cache"), str(tmp_path / "cold"), changed)
+    assert make_record.calls == 20
+    assert warm == cold
+    assert warm_manifest["build"] == cold_manifest["build"]
+    assert warm_manifest["categories"] == cold_manifest["categories"]
+    assert warm_manifest["patches"][-1]["changed"] == 1
+
+
+def test_unchanged_inputs_reuse_every_stage(tmp_path):
+    cache, out = str(tmp_path / "cache"), str(tmp_path / "out")
+    first, _, _ = run(cache, out, frame([100, 200, 300]))
+    second, _, report = run(cache, out, frame([100, 200, 300]))
+    assert second == first
+    assert make_record.calls == 0
+    assert report["reused"] == ["rows", "output"]
+
+
+def test_code_version_reruns_stages(tmp_path):
+    cache, out = str(tmp_path / "cache"), str(tmp_path / "out")
+    run(cache, out, frame([100, 200, 300]))
+    _, _, report = run(cache, out, frame([100, 200, 300]), version="2")
+    assert report["recomputed"] == ["rows", "output"]
+    assert report["records"]["records"] == {"reused": 0, "rebuilt": 3}
+
+
+def test_missing_output_reruns_stage(tmp_path):
+    cache, out = str(tmp_path / "cache"), str(tmp_path / "out")
+    run(cache, out, frame([100, 200]))
+    os.remove(os.path.join(out, "products.json"))
+    catalog, _, report = run(cache, out, frame([100, 200]))
+    assert "output" in report["recomputed"]
+    assert [p["price"] for p in catalog] == [100, 200]
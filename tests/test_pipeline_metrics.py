@@ -0,0 +1,64 @@
+import json
+import threading
+
+from pipeline_metrics import Metrics, options_from_argv
+
+
+def test_stages_counters_and_report(tmp_path, capsys):
+    metrics = Metrics("build", trace_memory=True, out_dir=str(tmp_path))
+    with metrics.stage("read"):
+        data = [0] * 100000
+    with metrics.stage("write"):
+        del data
+    metrics.count("find_images", "folder")
+    metrics.count("find_images", "folder", 2)
+    metrics.set("products", 3)
+    path = metrics.finish()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert [s["name"] for s in report["stages"]] == ["read", "write"]
+    read, write = report["stages"]
+    assert not read["overlapped"] and not write["overlapped"]
+    assert read["end"] <= write["start"]
+    assert read["peak_traced_mb"] > 0.5
+    assert report["counters"] == {"find_images": {"folder": 3}}
+    assert report["values"] == {"products": 3}
+    # every run is appended to the history
+    metrics = Metrics("build", out_dir=str(tmp_path))
+    metrics.finish()
+    with open(tmp_path / "build.history.ndjson", 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    assert "find_images: folder 3" in capsys.readouterr().out
+
+
+def test_overlapping_stages_are_marked(tmp_path, capsys):
+    metrics = Metrics("build", trace_memory=True, out_dir=str(tmp_path))
+    inside, release = threading.Event(), threading.Event()
+
+    def worker():
+        with metrics.stage("images"):
+            inside.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    inside.wait(5)
+    with metrics.stage("excel"):
+        release.set()
+        thread.join()
+    with metrics.stage("write"):
+        pass
+    metrics.finish()
+
+    stages = {s["name"]: s for s in metrics.stages}
+    assert stages["images"]["overlapped"] and stages["excel"]["overlapped"]
+    assert stages["images"]["peak_traced_mb"] is None
+    assert not stages["write"]["overlapped"]
+    assert stages["write"]["peak_traced_mb"] is not None
+    assert "images *" in capsys.readouterr().out
+
+
+def test_options_from_argv():
+    assert options_from_argv(["generate_products.py", "--sample"]) == \
+        {"trace_memory": False, "profile": False, "sample": True}
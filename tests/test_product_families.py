@@ -0,0 +1,93 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from product_families import cluster_families, family_ids, lsh_candidates, minhash_signatures, shingles
+
+# two models per product type (Product Code prefix)
+MODELS = {
+    "B": ("Pollo Bed", "Maltein Bed"),
+    "SR": ("Carlem Shoe Rack", "Skywood Shoe Rack"),
+    "TU": ("Oliver TV Unit", "Enrique TV Unit"),
+    "BS": ("Lynden Book Shelf", "Ronnie Book Shelf"),
+    "CT": ("Kinsey Coffee Table", "Teodor Coffee Table"),
+    "ST": ("Osborne Study Table", "Vinsent Study Table"),
+}
+COLORS = ["", " Wenge", " White", " Brown Maple & Beige", " Walnut"]
+
+
+def get_base_name(name):
+    """The fixed-word grouping find_unique.py had before product_families."""
+    if pd.isna(name):
+        return ''
+    name = str(name)
+    name = re.sub(r'\b(King|Queen|Single|Double)\b', '', name, flags=re.IGNORECASE)
+    name = re.sub(r'\b(Wenge|Brown Maple|Beige|White|Natural|Oak|Walnut)\b', '', name, flags=re.IGNORECASE)
+    name = re.sub(r'\s*&\s*', ' ', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def catalog(extra=()):
+    rows = [(prefix, model + color) for prefix, models in MODELS.items() for model in models for color in COLORS]
+    return pd.DataFrame(list(rows) + list(extra), columns=["type", "name"])
+
+
+def partition(labels):
+    groups = {}
+    for i, label in enumerate(labels):
+        groups.setdefault(label, set()).add(i)
+    return sorted(sorted(g) for g in groups.values())
+
+
+def test_color_variants_group_like_get_base_name():
+    df = catalog()
+    families = cluster_families(df["name"], blocks=df["type"])
+    assert partition(families) == partition(df["name"].map(get_base_name))
+    assert len(set(families)) == 12
+
+
+def test_differences_from_get_base_name():
+    df = catalog([
+        ("TU", "Oliver TV Unit Frosty Teak"),     # a finish get_base_name does not list
+        ("SR", "Carlem 3 Door Shoe Rack Wenge"),  # door counts are numbers
+        ("SR", "Carlem 4 Door Shoe Rack"),
+        ("B", "Pollo King Bed Wenge"),            # sizes only seen with beds stay apart
+        ("B", "Pollo Queen Bed Wenge"),
+        ("KH", "Pollo Bed"),                      # another product type
+    ])
+    for prefix in ("B", "SR", "BS", "CT", "ST"):  # "frosty teak" in five types: a variant word
+        df.loc[len(df)] = [prefix, MODELS[prefix][0] + " Frosty Teak"]
+    families = pd.Series(cluster_families(df["name"], blocks=df["type"]))
+    family = dict(zip(df["name"] + "/" + df["type"], families))
+
+    assert family["Oliver TV Unit Frosty Teak/TU"] == family["Oliver TV Unit/TU"]
+    assert get_base_name("Oliver TV Unit Frosty Teak") != get_base_name("Oliver TV Unit")
+    assert family["Carlem 3 Door Shoe Rack Wenge/SR"] == family["Carlem 4 Door Shoe Rack/SR"]
+    assert get_base_name("Carlem 3 Door Shoe Rack") != get_base_name("Carlem 4 Door Shoe Rack")
+    assert family["Pollo King Bed Wenge/B"] != family["Pollo Queen Bed Wenge/B"]
+    assert family["Pollo Bed/KH"] != family["Pollo Bed/B"]
+
+
+def test_large_buckets_stay_linear():
+    names = ["Oliver TV Unit"] * 400 + [None] * 400 + ["Oliver TV Unit Wenge"] * 5
+    sets = [shingles(re.findall(r'[a-z0-9]+', n.lower())) if n else set() for n in names]
+    pairs = lsh_candidates(minhash_signatures(sets), ["TU"] * len(names), max_bucket=10)
+    # no pairs with the empty names, and at most 9 per name of the big bucket
+    assert all(i < 400 or j < 400 or i >= 800 for i, j in pairs)
+    assert all(i < j for i, j in pairs)
+    assert len(pairs) <= 405 * 9
+
+    labels = cluster_families(names, blocks=["TU"] * len(names))
+    assert len(set(labels[:400])) == 1
+    assert labels[400:800] == list(range(400, 800))
+
+
+def test_family_ids_are_stable():
+    labels = [0, 0, 2, 2, 4]
+    codes = ["TU-OL-WH", "TU-OL", "SR-CL-W", "SR-CL-B", np.nan]
+    ids = family_ids(labels, codes)
+    assert ids[0] == ids[1] != ids[2] == ids[3]
+    assert len(set(ids)) == 3  # a family without codes gets one too
+    # the same members in another order keep the id
+    assert family_ids([0, 0], ["TU-OL", "TU-OL-WH"])[0] == ids[0]
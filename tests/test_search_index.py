@@ -0,0 +1,56 @@
+import json
+
+from search_index import SearchIndex, SearchIndexBuilder
+
+RECORDS = [
+    {"sku": "W-M0-WH", "name": "Oliver TV Unit", "category": "Living", "color": "White"},
+    {"sku": "B-PL-KG", "name": "Pollo King Bed", "category": "Bedroom", "color": "Wenge"},
+    {"sku": "B-PL-QN", "name": "Pollo Queen Bed", "category": "Bedroom", "color": "Wenge"},
+    {"sku": "B-MLT-QN", "name": "Maltein Queen Bed with storage", "category": "Bedroom",
+     "tags": ["storage", "bed"]},
+    {"sku": "S-CL-WH", "name": "Carlem Shoe Rack", "category": "Storage", "color": "White"},
+]
+
+
+def index(tmp_path):
+    builder = SearchIndexBuilder(["name", "tags", "category", "color", "sku"], code_field="sku")
+    for record in RECORDS:
+        builder.add(record)
+    path = tmp_path / "search.json"
+    path.write_text(json.dumps(builder.build()), encoding="utf-8")
+    return SearchIndex.load(str(path))
+
+
+def docs(results):
+    return [doc for doc, _ in results]
+
+
+def test_search_ranks_matches(tmp_path):
+    idx = index(tmp_path)
+    assert docs(idx.search("pollo")) == [1, 2]
+    # the Maltein bed also has "bed" in its tags
+    assert docs(idx.search("queen bed"))[:2] == [3, 2]
+    assert idx.search("sofa", prefix=False) == []
+    assert idx.search("") == []
+
+
+def test_last_word_is_a_prefix(tmp_path):
+    idx = index(tmp_path)
+    assert docs(idx.search("oliver tv uni")) == [0]
+    assert docs(idx.search("malt")) == [3]
+    assert idx.search("malt", prefix=False) == []
+
+
+def test_whole_code_is_a_term(tmp_path):
+    idx = index(tmp_path)
+    assert docs(idx.search("w-m0-wh"))[0] == 0
+    assert docs(idx.search("b-pl-qn"))[0] == 2
+
+
+def test_completions(tmp_path):
+    idx = index(tmp_path)
+    assert idx.complete("q") == ["qn", "queen"]  # equal counts: alphabetical
+    assert idx.complete("que") == ["queen"]
+    assert idx.complete("stor") == ["storage"]
+    # more frequent terms first
+    assert idx.complete("s")[0] == "storage"
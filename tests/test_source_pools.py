@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import image_derivatives
+import image_similarity
+
+pytestmark = pytest.mark.skipif(image_derivatives.Image is None, reason="Pillow is not installed")
+
+
+@pytest.fixture
+def images(tmp_path):
+    Image = image_derivatives.Image
+    public = tmp_path / "public"
+    (public / "products").mkdir(parents=True)
+    urls = []
+    for i in range(3):
+        Image.new("RGB", (300, 200), (80 * i, 40, 200)).save(public / "products" / f"img{i}.png")
+        urls.append(f"/products/img{i}.png")
+    return str(public), urls
+
+
+def test_pools_are_spawned(monkeypatch, images, tmp_path):
+    contexts = []
+
+    class Recording(image_derivatives.ProcessPoolExecutor):
+        def __init__(self, *args, mp_context=None, **kwargs):
+            contexts.append(mp_context and mp_context.get_start_method())
+            super().__init__(*args, mp_context=mp_context, **kwargs)
+
+    monkeypatch.setattr(image_derivatives, "ProcessPoolExecutor", Recording)
+    monkeypatch.setattr(image_similarity, "ProcessPoolExecutor", Recording)
+    public, urls = images
+    image_derivatives.build_derivatives(urls, public, str(tmp_path / "derived"), workers=1,
+                                        hash_cache=str(tmp_path / "hashes.json"))
+    image_similarity.image_hashes(urls, public, 1, str(tmp_path / "phash.json"))
+    assert contexts == ["spawn", "spawn"]
+
+
+def test_pools_run_beside_other_threads(images, tmp_path):
+    """As in generate_products: both pools start from source threads while a lock is held."""
+    public, urls = images
+    held, release = threading.Lock(), threading.Event()
+
+    def busy():
+        with held:
+            release.wait(30)
+
+    with ThreadPoolExecutor(max_workers=3) as threads:
+        threads.submit(busy)
+        derivatives = threads.submit(image_derivatives.build_derivatives, urls, public,
+                                     str(tmp_path / "derived"), workers=2,
+                                     hash_cache=str(tmp_path / "hashes.json"))
+        hashes = threads.submit(image_similarity.image_hashes, urls, public, 2,
+                                str(tmp_path / "phash.json"))
+        try:
+            assert sorted(derivatives.result(timeout=120)) == urls
+            assert sorted(hashes.result(timeout=120)) == urls
+        finally:
+            release.set()